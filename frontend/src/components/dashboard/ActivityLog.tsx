@@ -1,4 +1,4 @@
-import { useQuery } from "@tanstack/react-query";
+import { useLogFeed, RawLog } from "@/hooks/use-log-stream";
 import { Activity, User, Database, Shield, AlertCircle, CheckCircle } from "lucide-react";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import {
@@ -6,15 +6,6 @@ import {
 } from "@/components/ui/table";
 import { Badge } from "@/components/ui/badge";
 
-interface DynamoDBLog {
-  LogId: string;
-  Timestamp: string;
-  Event: string;
-  Status: string;
-  Details: string;
-  Type: string;
-}
-
 interface LogEntry {
   id: string;
   timestamp: string;
@@ -24,14 +15,7 @@ interface LogEntry {
   resource: string;
 }
 
-const fetchLogs = async (): Promise<LogEntry[]> => {
-  const apiUrl = import.meta.env.VITE_API_URL;
-  const response = await fetch(`${apiUrl}/logs`);
-  if (!response.ok) throw new Error("Failed to fetch logs");
-
-  const json = await response.json();
-  const rawData: DynamoDBLog[] = json.data || [];
-
+const toLogEntries = (rawData: RawLog[] = []): LogEntry[] => {
   return rawData.map((log) => {
     let uiType: LogEntry["type"] = "info";
     if (log.Status === "SUCCESS") uiType = "success";
@@ -60,11 +44,9 @@ const getTypeBadge = (type: LogEntry["type"]) => {
 };
 
 const ActivityLog = () => {
-  const { data: logs, isLoading } = useQuery({
-    queryKey: ["activity-logs"],
-    queryFn: fetchLogs,
-    refetchInterval: 5000,
-  });
+  // Live feed: pushed over the log stream WebSocket (falls back to polling without VITE_WS_URL)
+  const { data: rawLogs, isLoading } = useLogFeed();
+  const logs = toLogEntries(rawLogs);
 
   return (
     <Card className="border-border">
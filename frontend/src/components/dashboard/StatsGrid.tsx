@@ -1,22 +1,16 @@
 import { Shield, Activity, CheckCircle, AlertTriangle } from "lucide-react";
 import { Card, CardContent } from "@/components/ui/card";
-import { useQuery } from "@tanstack/react-query";
+import { useLogFeed, RawLog } from "@/hooks/use-log-stream";
 
-const fetchStats = async () => {
-  const apiUrl = import.meta.env.VITE_API_URL;
-  if (!apiUrl) return { totalScans: 0, criticalRisks: 0, isSecure: false, resources: 0 };
+const computeStats = (logs?: RawLog[]) => {
+  if (!logs) return { totalScans: 0, criticalRisks: 0, isSecure: false, resources: 0 };
 
   try {
-    const response = await fetch(`${apiUrl}/logs`);
-    if (!response.ok) return { totalScans: 0, criticalRisks: 0, isSecure: false, resources: 0 };
-    
-    const json = await response.json();
-    const logs = json.data || [];
-    const latest = logs[0] || {};
+    const latest: any = logs.find((log) => (log.Feed ?? "AUDIT") === "AUDIT") || {};
     const meta = latest.Meta || {};
 
     const riskCount = 
-      (meta.open_sgs?.length || 0) + 
+      (meta.packed?.open_sgs ?? meta.open_sgs?.length ?? 0) + // Large lists arrive as counts (Meta.packed)
       (meta.unencrypted_count || 0) + 
       (meta.unencrypted_rds || 0) + 
       (meta.unencrypted_dynamo || 0) + 
@@ -37,11 +31,9 @@ const fetchStats = async () => {
 };
 
 const StatsGrid = () => {
-  const { data } = useQuery({
-    queryKey: ["securityStats"],
-    queryFn: fetchStats,
-    refetchInterval: 5000
-  });
+  // Derived from the shared live feed instead of a separate /logs poll
+  const { data: feed } = useLogFeed();
+  const data = computeStats(feed);
 
   const stats = [
     {
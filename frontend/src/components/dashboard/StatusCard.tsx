@@ -8,6 +8,7 @@ import {
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { useToast } from "@/hooks/use-toast";
+import { useLogFeed, mergeLogs, LOG_FEED_KEY, RawLog } from "@/hooks/use-log-stream";
 
 // API API Wrapper
 const triggerEngine = async (action: string): Promise<any> => {
@@ -20,80 +21,88 @@ const triggerEngine = async (action: string): Promise<any> => {
     body: JSON.stringify({ action })
   });
 
-  if (!response.ok) throw new Error('Operation failed');
+  if (!response.ok) {
+    // 409: the same scan/remediation is already running for this account
+    const body = await response.json().catch(() => null);
+    throw new Error(body?.message || 'Operation failed');
+  }
   return await response.json();
 };
 
-const fetchLatestStatus = async () => {
+// Current posture: one small GetItem-backed record, independent of log volume
+const STATUS_KEY = ["status"];
+
+const fetchStatus = async () => {
   const apiUrl = import.meta.env.VITE_API_URL;
   if (!apiUrl) return null;
-  const response = await fetch(`${apiUrl}/logs?t=${new Date().getTime()}`);
+  const response = await fetch(`${apiUrl}/status`, { cache: "no-cache" });
 
-  if (!response.ok) return null;
+  if (!response.ok) return null; // 404 until the first scan has run
   const json = await response.json();
-  const logs = json.data || [];
-  if (logs.length === 0) return null;
-  return logs[0];
+  return json.data || null;
 };
 
 const StatusCard = () => {
   const { toast } = useToast();
   const queryClient = useQueryClient();
   
-  const { data: latestLog, isLoading } = useQuery({
-    queryKey: ["latestStatus"],
-    queryFn: fetchLatestStatus,
-    refetchInterval: 3000
+  const { data: status, isLoading } = useQuery({
+    queryKey: STATUS_KEY,
+    queryFn: fetchStatus,
+    staleTime: Infinity
   });
 
-  const meta = latestLog?.Meta || {};
-  const details = latestLog?.Details || "";
+  // No polling: refetch the posture only when the live feed shows a newer engine run
+  const { data: feed } = useLogFeed();
+  const latestRunId = feed?.find((log) => (log.Feed ?? "AUDIT") === "AUDIT")?.LogId;
+  useEffect(() => {
+    if (latestRunId && latestRunId !== status?.last_log_id) {
+      queryClient.invalidateQueries({ queryKey: STATUS_KEY });
+    }
+  }, [latestRunId, status?.last_log_id, queryClient]);
+
+  const counts = status?.counts || {};
+  const findings = status?.findings || {};
 
   // --- SMART RISK LOGIC ---
   // We determine risk based on specific findings, not just global status.
-  const hasNetworkRisk = Array.isArray(meta.open_sgs) && meta.open_sgs.length > 0;
-  const hasEncryptionRisk = (meta.unencrypted_count || 0) > 0 || (meta.unencrypted_rds || 0) > 0 || (meta.unencrypted_dynamo?.length || 0) > 0;
-  const hasIamRisk = meta.root_mfa_secure === false;
-  
-  // Storage Logic: It is risky ONLY if explicitly flagged in a scan, otherwise we assume monitored/safe
-  // The backend currently auto-fixes storage in remediate_all, so we check if we just fixed it.
-  const isStorageFixed = details.includes("Locked") || details.includes("Secured");
-  // If we haven't just fixed it, and we are in a warning state that ISN'T network/IAM/Encryption, it might be storage.
-  // But for safety, we default Storage to "Secure" unless we explicitly add a "Public Bucket" detector in the backend.
-  // For now, we trust the remediation state.
-  const hasStorageRisk = !isStorageFixed && meta.total_buckets > 0 && latestLog?.Status === 'WARNING' && !hasNetworkRisk && !hasIamRisk && !hasEncryptionRisk;
+  const hasNetworkRisk = (counts.open_sgs || 0) > 0;
+  const hasEncryptionRisk = (counts.unencrypted_buckets || 0) + (counts.unencrypted_rds || 0) + (counts.unencrypted_dynamo || 0) > 0;
+  const hasIamRisk = status?.root_mfa_secure === false;
+  // Public buckets are only counted by scans; remediations lock them instead
+  const hasStorageRisk = (counts.public_buckets || 0) > 0;
 
-  const isSecure = latestLog?.Status === 'SUCCESS';
+  const isSecure = status?.status === 'SUCCESS';
 
   const mutation = useMutation({
     mutationFn: triggerEngine,
     onMutate: async () => {
-        // 1. CANCEL POLLING: Stop the background fetch so it doesn't overwrite us mid-update
-        await queryClient.cancelQueries({ queryKey: ["latestStatus"] });
+        // 1. CANCEL FETCHES: Stop any in-flight refresh so it doesn't overwrite us mid-update
+        await queryClient.cancelQueries({ queryKey: STATUS_KEY });
     },
     onSuccess: (data, variables) => {
       const mode = data.data?.Meta?.mode || variables; // fallback if backend response structure varies
       const title = mode === 'scan' ? "🔍 Scan Complete" : "✅ Remediation Executed";
       toast({ title: title, description: "System updated.", duration: 3000 });
 
-      // 2. UPDATE UI INSTANTLY: Trust our mutation response over the DB for now
+      // 2. UPDATE UI INSTANTLY: the posture item is written before the engine responds
       if (data.data) {
-          queryClient.setQueryData(["latestStatus"], data.data);
+          queryClient.setQueryData<RawLog[]>(LOG_FEED_KEY, (old) => mergeLogs(old, ([] as RawLog[]).concat(data.data)));
       }
+      queryClient.invalidateQueries({ queryKey: STATUS_KEY });
 
       // 3. FIX THE PERSISTENCE ISSUE:
       // If we just remediated, the DB still has the old "Error" log. 
       // We must trigger a silent scan to update the DB so the next poll sees "Green".
-      if (variables !== 'scan' && variables.startsWith('remediate')) {
+      // Not needed when the engine applied the last scan's plan: it re-checked every target itself.
+      if (variables !== 'scan' && variables.startsWith('remediate') && !data.data?.Meta?.plan) {
          // Chain a scan automatically so the DB gets the "Success" log
          triggerEngine('scan').then((scanData) => {
              // Update again with the final verified scan result
-             queryClient.setQueryData(["latestStatus"], scanData.data);
+             queryClient.setQueryData<RawLog[]>(LOG_FEED_KEY, (old) => mergeLogs(old, ([] as RawLog[]).concat(scanData.data)));
+             queryClient.invalidateQueries({ queryKey: STATUS_KEY });
          });
       }
-      // 4. REFRESH RELATED QUERIES
-      queryClient.invalidateQueries({ queryKey: ["securityStats"] });
-      queryClient.invalidateQueries({ queryKey: ["activity-logs"] });
     },
     onError: (error) => {
       toast({ title: "❌ Error", description: error.message, variant: "destructive" });
@@ -124,12 +133,17 @@ const StatusCard = () => {
       status: hasNetworkRisk ? "critical" : "secure",
       detail: hasNetworkRisk ? (
         <div className="flex flex-col gap-1">
-          <span>{meta.open_sgs?.length} Open Security Groups:</span>
-          {Array.isArray(meta.open_sgs) && meta.open_sgs.map((sg: string, i: number) => (
+          <span>{counts.open_sgs} Open Security Groups:</span>
+          {Array.isArray(findings.open_sgs) && findings.open_sgs.map((sg: string, i: number) => (
             <span key={i} className="text-[10px] opacity-80 normal-case block">
               • {sg}
             </span>
           ))}
+          {counts.open_sgs > (findings.open_sgs?.length || 0) && (
+            <span className="text-[10px] opacity-80 normal-case block">
+              + {counts.open_sgs - (findings.open_sgs?.length || 0)} more
+            </span>
+          )}
         </div>
       ) : "VPC Locked Down",
       action: hasNetworkRisk && (
@@ -138,7 +152,7 @@ const StatusCard = () => {
           onClick={() => mutation.mutate('remediate_network')}
           disabled={mutation.isPending}
         >
-          <Wrench className="h-3 w-3 mr-2" /> Close Port 22
+          <Wrench className="h-3 w-3 mr-2" /> Close Exposed Ports
         </Button>
       )
     },
@@ -148,7 +162,7 @@ const StatusCard = () => {
       icon: <FileKey className="h-4 w-4" />,
       status: hasEncryptionRisk ? "warning" : "secure",
       detail: hasEncryptionRisk ? "Unencrypted Resources" : "Data Encrypted",
-      action: (meta.unencrypted_count > 0) && (
+      action: (counts.unencrypted_buckets > 0) && (
         <Button 
           variant="outline" size="sm" className="mt-2 h-7 text-[10px] border-amber-500/50 hover:bg-amber-500/10 text-amber-400 w-full justify-start"
           onClick={() => mutation.mutate('remediate_encryption')}
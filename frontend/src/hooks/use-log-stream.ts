@@ -0,0 +1,109 @@
+import { useEffect } from "react";
+import { useQuery, useQueryClient, QueryClient } from "@tanstack/react-query";
+
+// Raw entries as stored in CloudAuditZeroLogs (plus WORKFLOW entries from Step Functions)
+export interface RawLog {
+  LogId: string;
+  Timestamp: string;
+  Feed?: string;
+  Event: string;
+  Status: string;
+  Details: string;
+  Type: string;
+  Meta?: any;
+}
+
+export const LOG_FEED_KEY = ["logs-feed"];
+const MAX_ENTRIES = 20;
+const POLL_FALLBACK_MS = 5000;      // Only used when no VITE_WS_URL is configured
+const MAX_RECONNECT_DELAY_MS = 30000;
+
+const wsUrl = import.meta.env.VITE_WS_URL as string | undefined;
+
+const fetchFeed = async (): Promise<RawLog[]> => {
+  const apiUrl = import.meta.env.VITE_API_URL;
+  if (!apiUrl) return [];
+  // "no-cache" revalidates with If-None-Match: unchanged logs come back as a cheap 304
+  const response = await fetch(`${apiUrl}/logs`, { cache: "no-cache" });
+  if (!response.ok) throw new Error("Failed to fetch logs");
+  const json = await response.json();
+  return json.data || [];
+};
+
+// Newest first, de-duplicated by LogId
+export const mergeLogs = (current: RawLog[] = [], incoming: RawLog[] = []): RawLog[] => {
+  const byId = new Map<string, RawLog>();
+  [...incoming, ...current].forEach((log) => { if (log && !byId.has(log.LogId)) byId.set(log.LogId, log); });
+  return [...byId.values()]
+    .sort((a, b) => (a.Timestamp < b.Timestamp ? 1 : a.Timestamp > b.Timestamp ? -1 : 0))
+    .slice(0, MAX_ENTRIES);
+};
+
+// Resume cursor = newest AUDIT timestamp we hold (WORKFLOW rows are live-only)
+const cursorOf = (logs: RawLog[] = []) =>
+  logs.find((log) => (log.Feed ?? "AUDIT") === "AUDIT")?.Timestamp ?? null;
+
+// ----------------------------------------------------------------
+// One socket per tab, shared by every component using the feed
+// ----------------------------------------------------------------
+let socket: WebSocket | null = null;
+let subscribers = 0;
+let retries = 0;
+let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+
+const connect = (queryClient: QueryClient) => {
+  if (!wsUrl || socket) return;
+  const ws = new WebSocket(wsUrl);
+  socket = ws;
+
+  ws.onopen = () => {
+    retries = 0;
+    const cursor = cursorOf(queryClient.getQueryData<RawLog[]>(LOG_FEED_KEY));
+    ws.send(JSON.stringify({ action: "resume", cursor }));
+    // No snapshot yet: take it now that we are subscribed, so nothing falls in between
+    if (!cursor) queryClient.invalidateQueries({ queryKey: LOG_FEED_KEY });
+  };
+
+  ws.onmessage = (event) => {
+    const message = JSON.parse(event.data);
+    if (message.type === "delta") {
+      queryClient.setQueryData<RawLog[]>(LOG_FEED_KEY, (old) => mergeLogs(old, message.data));
+    } else if (message.type === "reset") {
+      // Too far behind to replay: reload the first page once
+      queryClient.invalidateQueries({ queryKey: LOG_FEED_KEY });
+    }
+  };
+
+  ws.onclose = () => {
+    socket = null;
+    if (subscribers > 0) {
+      const delay = Math.min(MAX_RECONNECT_DELAY_MS, 1000 * 2 ** retries++);
+      reconnectTimer = setTimeout(() => connect(queryClient), delay);
+    }
+  };
+};
+
+export const useLogFeed = () => {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    subscribers += 1;
+    connect(queryClient);
+    return () => {
+      subscribers -= 1;
+      if (subscribers === 0) {
+        clearTimeout(reconnectTimer);
+        socket?.close();
+        socket = null;
+      }
+    };
+  }, [queryClient]);
+
+  return useQuery({
+    queryKey: LOG_FEED_KEY,
+    queryFn: fetchFeed,
+    // With the stream, the REST call is only the initial snapshot; updates are pushed
+    refetchInterval: wsUrl ? false : POLL_FALLBACK_MS,
+    staleTime: wsUrl ? Infinity : 0,
+  });
+};
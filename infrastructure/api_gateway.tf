@@ -40,6 +40,13 @@ resource "aws_apigatewayv2_integration" "get_logs_integration" {
   integration_method = "POST" # AWS Proxy always uses POST internally
 }
 
+resource "aws_apigatewayv2_integration" "get_status_integration" {
+  api_id             = aws_apigatewayv2_api.main_api.id
+  integration_type   = "AWS_PROXY"
+  integration_uri    = aws_lambda_function.get_status.invoke_arn
+  integration_method = "POST"
+}
+
 # 2. The Route (URL Path): POST /remediate -> Triggers Lambda
 # This allows the frontend to POST to https://.../remediate
 resource "aws_apigatewayv2_route" "remediator_route" {
@@ -54,6 +61,13 @@ resource "aws_apigatewayv2_route" "get_logs_route" {
   target    = "integrations/${aws_apigatewayv2_integration.get_logs_integration.id}"
 }
 
+# GET /status -> current posture (one GetItem, independent of log volume)
+resource "aws_apigatewayv2_route" "get_status_route" {
+  api_id    = aws_apigatewayv2_api.main_api.id
+  route_key = "GET /status"
+  target    = "integrations/${aws_apigatewayv2_integration.get_status_integration.id}"
+}
+
 # 3. Permission (Allow API Gateway to invoke Lambda)
 resource "aws_lambda_permission" "api_gw_remediator" {
   statement_id  = "AllowExecutionFromAPIGateway"
@@ -70,4 +84,12 @@ resource "aws_lambda_permission" "api_gw_get_logs" {
   function_name = aws_lambda_function.get_logs.function_name
   principal     = "apigateway.amazonaws.com"
   source_arn    = "${aws_apigatewayv2_api.main_api.execution_arn}/*/*/logs"
-}
\ No newline at end of file
+}
+
+resource "aws_lambda_permission" "api_gw_get_status" {
+  statement_id  = "AllowExecutionFromAPIGatewayGetStatus"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.get_status.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.main_api.execution_arn}/*/*/status"
+}
@@ -4,6 +4,13 @@
 # Free Tier Limit: 3 Dashboards, 50 metrics per dashboard.
 ################################################################################
 
+# Namespace of the embedded metrics printed by the remediator (src/metrics.py).
+# Each stage/service/operation series is a custom metric; set EMF_ENABLED = "false"
+# on the remediator to stay strictly within the 10 free custom metrics.
+locals {
+  metrics_namespace = "CloudAuditZero"
+}
+
 resource "aws_cloudwatch_dashboard" "main" {
   dashboard_name = "Cloud-Audit-Zero-Dashboard"
 
@@ -63,6 +70,82 @@ resource "aws_cloudwatch_dashboard" "main" {
           title   = "System Health (Errors)"
           period  = 300
         }
+      },
+      # Widget 4: Where scans spend their time (EMF from src/metrics.py, one series per stage)
+      {
+        type   = "metric"
+        x      = 0
+        y      = 12
+        width  = 12
+        height = 6
+        properties = {
+          metrics = [
+            [ { "expression": "SEARCH('{${local.metrics_namespace},Stage} MetricName=\"StageDuration\"', 'Average', 300)", "id": "stages", "label": "" } ]
+          ]
+          view    = "timeSeries"
+          stacked = true
+          region  = "us-east-1"
+          title   = "Scan Time by Stage (ms)"
+          period  = 300
+        }
+      },
+      # Widget 5: Slow AWS operations (latency per call, retries and backoff included)
+      {
+        type   = "metric"
+        x      = 12
+        y      = 12
+        width  = 12
+        height = 6
+        properties = {
+          metrics = [
+            [ { "expression": "SEARCH('{${local.metrics_namespace},Service,Operation} MetricName=\"ApiMaxLatency\"', 'Maximum', 300)", "id": "api", "label": "" } ]
+          ]
+          view    = "timeSeries"
+          stacked = false
+          region  = "us-east-1"
+          title   = "AWS API Latency by Operation (max ms)"
+          period  = 300
+        }
+      },
+      # Widget 6: Throttling pressure per service (see API_RATE_LIMITS)
+      {
+        type   = "metric"
+        x      = 0
+        y      = 18
+        width  = 12
+        height = 6
+        properties = {
+          metrics = [
+            [ { "expression": "SEARCH('{${local.metrics_namespace},Service} MetricName=\"ApiThrottles\"', 'Sum', 300)", "id": "throttles", "label": "" } ],
+            [ { "expression": "SEARCH('{${local.metrics_namespace},Service} MetricName=\"ApiRetries\"', 'Sum', 300)", "id": "retries", "label": "" } ]
+          ]
+          view    = "timeSeries"
+          stacked = false
+          region  = "us-east-1"
+          title   = "API Throttles & Retries by Service"
+          period  = 300
+        }
+      },
+      # Widget 7: Scan duration against the amount of work done
+      {
+        type   = "metric"
+        x      = 12
+        y      = 18
+        width  = 12
+        height = 6
+        properties = {
+          metrics = [
+            [ local.metrics_namespace, "ScanDuration", "Mode", "scan", { "stat": "Maximum", "label": "Scan Duration (ms)" } ],
+            [ local.metrics_namespace, "BucketsEvaluated", "Mode", "scan", { "yAxis": "right" } ],
+            [ local.metrics_namespace, "SecurityGroupsEvaluated", "Mode", "scan", { "yAxis": "right" } ],
+            [ local.metrics_namespace, "TablesEvaluated", "Mode", "scan", { "yAxis": "right" } ]
+          ]
+          view    = "timeSeries"
+          stacked = false
+          region  = "us-east-1"
+          title   = "Scan Duration vs Resources Evaluated"
+          period  = 300
+        }
       }
     ]
   })
@@ -7,6 +7,10 @@ resource "aws_dynamodb_table" "audit_logs" {
   hash_key       = "LogId"
   range_key      = "Timestamp"
 
+  # New entries feed the live log stream (log_stream Lambda -> WebSocket clients)
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   attribute {
     name = "LogId"
     type = "S"
@@ -17,8 +21,130 @@ resource "aws_dynamodb_table" "audit_logs" {
     type = "S"
   }
 
+  attribute {
+    name = "Feed"
+    type = "S"
+  }
+
+  # Time-ordered access path: every entry shares one Feed value, so
+  # "latest N" is a single Query (ScanIndexForward = false) instead of a Scan.
+  global_secondary_index {
+    name            = "FeedTimestampIndex"
+    hash_key        = "Feed"
+    range_key       = "Timestamp"
+    projection_type = "ALL"
+    read_capacity   = 5
+    write_capacity  = 5
+  }
+
   tags = {
     Environment = "Production"
     Project     = "Cloud-Audit-Zero"    
   }
-}
\ No newline at end of file
+}
+# Scanner working state (fingerprint snapshots for incremental scans).
+# Generic PK/SK keys so each feature gets its own key prefix in one free-tier table.
+resource "aws_dynamodb_table" "scanner_state" {
+  name           = "CloudAuditZeroState"
+  billing_mode   = "PROVISIONED"
+  read_capacity  = 5
+  write_capacity = 5
+  hash_key       = "PK"
+  range_key      = "SK"
+
+  attribute {
+    name = "PK"
+    type = "S"
+  }
+
+  attribute {
+    name = "SK"
+    type = "S"
+  }
+
+  # Short-lived items (e.g. WebSocket connections) carry an epoch-seconds ExpiresAt
+  ttl {
+    attribute_name = "ExpiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = "Production"
+    Project     = "Cloud-Audit-Zero"
+  }
+}
+
+# One item per finding per scan. ResourceId + ScanKey ("<timestamp>#<scan-id>#<finding>#<pillar>")
+# answers "every scan where resource X was flagged" with a single Query.
+resource "aws_dynamodb_table" "findings" {
+  name           = "CloudAuditZeroFindings"
+  billing_mode   = "PROVISIONED"
+  read_capacity  = 5
+  write_capacity = 5
+  hash_key       = "ResourceId"
+  range_key      = "ScanKey"
+
+  attribute {
+    name = "ResourceId"
+    type = "S"
+  }
+
+  attribute {
+    name = "ScanKey"
+    type = "S"
+  }
+
+  # Findings expire after FINDINGS_RETENTION_DAYS so the table stays within the free tier
+  ttl {
+    attribute_name = "ExpiresAt"
+    enabled        = true
+  }
+
+  tags = {
+    Environment = "Production"
+    Project     = "Cloud-Audit-Zero"
+  }
+}
+
+# Overflow for log entries whose compressed Meta payload would still push the
+# CloudAuditZeroLogs item past 400 KB (see src/log_codec.py). The item keeps a pointer.
+resource "aws_s3_bucket" "log_payloads" {
+  bucket        = "cloud-audit-zero-log-payloads-${random_string.suffix.result}"
+  force_destroy = true
+
+  tags = {
+    Environment = "Production"
+    Project     = "Cloud-Audit-Zero"
+  }
+}
+
+resource "aws_s3_bucket_public_access_block" "log_payloads" {
+  bucket = aws_s3_bucket.log_payloads.id
+
+  block_public_acls       = true
+  block_public_policy     = true
+  ignore_public_acls      = true
+  restrict_public_buckets = true
+}
+
+# Log exports (src/export_logs.py) are shared via presigned URLs; drop them after a week
+resource "aws_s3_bucket_lifecycle_configuration" "log_payloads" {
+  bucket = aws_s3_bucket.log_payloads.id
+
+  rule {
+    id     = "expire-exports"
+    status = "Enabled"
+
+    filter {
+      prefix = "exports/"
+    }
+
+    expiration {
+      days = 7
+    }
+
+    abort_incomplete_multipart_upload {
+      days_after_initiation = 1
+    }
+  }
+}
@@ -4,7 +4,7 @@
 
 resource "aws_cloudwatch_event_rule" "s3_detection" {
   name        = "cloud-audit-zero-s3-guard"
-  description = "Triggers Step Function when an S3 bucket is compromised"
+  description = "Queues S3 security changes for the batched Step Function workflow"
 
   # The "Event Pattern" - This is the filter
   event_pattern = jsonencode({
@@ -23,12 +23,59 @@ resource "aws_cloudwatch_event_rule" "s3_detection" {
 }
 
 ################################################################################
-# IAM Role for EventBridge
-# (EventBridge needs permission to "StartExecution" of the workflow)
+# Event Buffer: SQS queue between the rule and the workflow
+# A burst of bucket changes (e.g. a Terraform apply creating 200 buckets) is
+# collected here and handed to the workflow in batches instead of one
+# execution per CloudTrail event.
 ################################################################################
 
-resource "aws_iam_role" "eventbridge_role" {
-  name = "cloud-audit-zero-eb-role"
+locals {
+  s3_event_batch_size   = 100 # Events per workflow execution
+  s3_event_batch_window = 30  # Seconds the pipe waits to fill a batch
+}
+
+resource "aws_sqs_queue" "s3_events" {
+  name                       = "cloud-audit-zero-s3-events"
+  message_retention_seconds  = 86400
+  visibility_timeout_seconds = 60
+
+  tags = {
+    Environment = "Production"
+    Project     = "Cloud-Audit-Zero"
+  }
+}
+
+# Allow the rule (and only this rule) to enqueue events
+resource "aws_sqs_queue_policy" "s3_events" {
+  queue_url = aws_sqs_queue.s3_events.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "events.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.s3_events.arn
+      Condition = {
+        ArnEquals = { "aws:SourceArn" = aws_cloudwatch_event_rule.s3_detection.arn }
+      }
+    }]
+  })
+}
+
+resource "aws_cloudwatch_event_target" "buffer_s3_events" {
+  rule      = aws_cloudwatch_event_rule.s3_detection.name
+  target_id = "BufferS3Events"
+  arn       = aws_sqs_queue.s3_events.arn
+}
+
+################################################################################
+# IAM Role for the Pipe
+# (The pipe needs to drain the queue and "StartExecution" of the workflow)
+################################################################################
+
+resource "aws_iam_role" "pipe_role" {
+  name = "cloud-audit-zero-pipe-role"
 
   assume_role_policy = jsonencode({
     Version = "2012-10-17"
@@ -36,40 +83,104 @@ resource "aws_iam_role" "eventbridge_role" {
       Action = "sts:AssumeRole"
       Effect = "Allow"
       Principal = {
-        Service = "events.amazonaws.com"
+        Service = "pipes.amazonaws.com"
       }
     }]
   })
 }
 
-resource "aws_iam_policy" "eb_policy" {
-  name        = "cloud-audit-zero-eb-policy"
-  description = "Allows EventBridge to start the specific Step Function"
+resource "aws_iam_policy" "pipe_policy" {
+  name        = "cloud-audit-zero-pipe-policy"
+  description = "Allows the S3 event pipe to read its queue and start the Step Function"
 
   policy = jsonencode({
     Version = "2012-10-17"
     Statement = [
       {
         Effect = "Allow"
-        Action = "states:StartExecution"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes"
+        ]
+        Resource = aws_sqs_queue.s3_events.arn
+      },
+      {
+        Effect   = "Allow"
+        Action   = "states:StartExecution"
         Resource = aws_sfn_state_machine.sfn_workflow.arn
       }
     ]
   })
 }
 
-resource "aws_iam_role_policy_attachment" "attach_eb" {
-  role       = aws_iam_role.eventbridge_role.name
-  policy_arn = aws_iam_policy.eb_policy.arn
+resource "aws_iam_role_policy_attachment" "attach_pipe" {
+  role       = aws_iam_role.pipe_role.name
+  policy_arn = aws_iam_policy.pipe_policy.arn
 }
 
 ################################################################################
-# Target: Connect EventBridge to Step Functions
+# Pipe: Connect the queue to Step Functions, one execution per batch
+# The execution input is the batch: a JSON array of SQS messages whose
+# `body` is the original EventBridge event.
 ################################################################################
 
-resource "aws_cloudwatch_event_target" "trigger_sfn" {
-  rule      = aws_cloudwatch_event_rule.s3_detection.name
-  target_id = "TriggerStepFunction"
-  arn       = aws_sfn_state_machine.sfn_workflow.arn
-  role_arn  = aws_iam_role.eventbridge_role.arn
-}
\ No newline at end of file
+resource "aws_pipes_pipe" "s3_events" {
+  name     = "cloud-audit-zero-s3-events"
+  role_arn = aws_iam_role.pipe_role.arn
+  source   = aws_sqs_queue.s3_events.arn
+  target   = aws_sfn_state_machine.sfn_workflow.arn
+
+  source_parameters {
+    sqs_queue_parameters {
+      batch_size                         = local.s3_event_batch_size
+      maximum_batching_window_in_seconds = local.s3_event_batch_window
+    }
+  }
+
+  target_parameters {
+    step_function_state_machine_parameters {
+      invocation_type = "FIRE_AND_FORGET"
+    }
+  }
+
+  depends_on = [aws_iam_role_policy_attachment.attach_pipe]
+}
+
+################################################################################
+# EventBridge Rule: Incremental Scan
+# Config changes on scanned resources invoke the remediator directly; it
+# re-checks only the resources named in `detail.requestParameters`.
+################################################################################
+
+resource "aws_cloudwatch_event_rule" "incremental_scan" {
+  name        = "cloud-audit-zero-incremental-scan"
+  description = "Re-evaluates resources touched by a configuration change"
+
+  event_pattern = jsonencode({
+    detail-type = ["AWS API Call via CloudTrail"]
+    detail = {
+      eventSource = ["s3.amazonaws.com", "ec2.amazonaws.com", "dynamodb.amazonaws.com"]
+      eventName = [
+        "CreateBucket", "DeleteBucketPublicAccessBlock", "PutBucketPublicAccessBlock", "PutBucketAcl",
+        "PutBucketPolicy", "DeleteBucketEncryption",
+        "AuthorizeSecurityGroupIngress", "CreateSecurityGroup",
+        "CreateTable", "UpdateTable"
+      ]
+    }
+  })
+}
+
+resource "aws_cloudwatch_event_target" "trigger_incremental_scan" {
+  rule      = aws_cloudwatch_event_rule.incremental_scan.name
+  target_id = "IncrementalScan"
+  arn       = aws_lambda_function.remediator.arn
+}
+
+resource "aws_lambda_permission" "eventbridge_incremental_scan" {
+  statement_id  = "AllowExecutionFromEventBridgeIncrementalScan"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.remediator.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.incremental_scan.arn
+}
@@ -4,20 +4,167 @@
 
 data "archive_file" "lambda_zip" {
   type        = "zip"
-  source_file = "${path.module}/../src/remediate.py"
   output_path = "${path.module}/../src/remediate.zip"
+
+  source {
+    content  = file("${path.module}/../src/remediate.py")
+    filename = "remediate.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/snapshot.py")
+    filename = "snapshot.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/network_rules.py")
+    filename = "network_rules.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/findings.py")
+    filename = "findings.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/log_codec.py")
+    filename = "log_codec.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/idempotency.py")
+    filename = "idempotency.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/metrics.py")
+    filename = "metrics.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/plan.py")
+    filename = "plan.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/shards.py")
+    filename = "shards.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/lease.py")
+    filename = "lease.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/identity.py")
+    filename = "identity.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/aws_clients.py")
+    filename = "aws_clients.py"
+  }
 }
 
 data "archive_file" "validate_zip" {
   type        = "zip"
-  source_file = "${path.module}/../src/validate.py"
   output_path = "${path.module}/../src/validate.zip"
+
+  source {
+    content  = file("${path.module}/../src/validate.py")
+    filename = "validate.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/idempotency.py")
+    filename = "idempotency.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/aws_clients.py")
+    filename = "aws_clients.py"
+  }
 }
 
 data "archive_file" "get_logs_zip" {
   type        = "zip"
-  source_file = "${path.module}/../src/get_logs.py"
   output_path = "${path.module}/../src/get_logs.zip"
+
+  source {
+    content  = file("${path.module}/../src/get_logs.py")
+    filename = "get_logs.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/log_codec.py")
+    filename = "log_codec.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/aws_clients.py")
+    filename = "aws_clients.py"
+  }
+}
+
+data "archive_file" "export_logs_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../src/export_logs.zip"
+
+  source {
+    content  = file("${path.module}/../src/export_logs.py")
+    filename = "export_logs.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/log_codec.py")
+    filename = "log_codec.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/aws_clients.py")
+    filename = "aws_clients.py"
+  }
+}
+
+data "archive_file" "get_status_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../src/get_status.zip"
+
+  source {
+    content  = file("${path.module}/../src/get_status.py")
+    filename = "get_status.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/log_codec.py")
+    filename = "log_codec.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/aws_clients.py")
+    filename = "aws_clients.py"
+  }
+}
+
+data "archive_file" "log_stream_zip" {
+  type        = "zip"
+  output_path = "${path.module}/../src/log_stream.zip"
+
+  source {
+    content  = file("${path.module}/../src/log_stream.py")
+    filename = "log_stream.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/log_codec.py")
+    filename = "log_codec.py"
+  }
+
+  source {
+    content  = file("${path.module}/../src/aws_clients.py")
+    filename = "aws_clients.py"
+  }
 }
 
 ################################################################################
@@ -32,7 +179,33 @@ resource "aws_lambda_function" "remediator" {
   handler          = "remediate.lambda_handler"
   runtime          = "python3.12"
   source_code_hash = data.archive_file.lambda_zip.output_base64sha256
-  timeout          = 10
+  timeout          = 120 # Headroom for multi-region / multi-account fan-out
+
+  environment {
+    variables = {
+      SCAN_CONCURRENCY          = "16" # Parallel per-resource checks (S3 buckets, DynamoDB tables)
+      SCAN_REGIONS              = ""   # "" = Lambda region only, "all" = every enabled region
+      TARGET_ROLE_ARNS          = ""   # Comma-separated audit roles in other accounts ("" = this account)
+      ACCOUNT_CONCURRENCY       = "8"  # Accounts audited in parallel
+      FULL_SCAN_INTERVAL_HOURS  = "24" # Incremental scans still re-evaluate everything this often
+      SENSITIVE_PORTS           = "22,3389,3306,5432,1433,1521,6379,11211,27017,9200,2375-2376,5601"
+      API_RATE_LIMITS           = "s3=200,ec2=50,iam=10,rds=20,dynamodb=100,sts=20" # Per-service req/s ceilings
+      FINDINGS_RETENTION_DAYS   = "90" # TTL for per-resource findings
+      LOG_PAYLOAD_BUCKET        = aws_s3_bucket.log_payloads.id # Overflow for log entries near the 400 KB item limit
+      GUARD_SUPPRESS_SECONDS    = "900" # Echo of our own PutBucketPublicAccessBlock is ignored this long
+      METRICS_NAMESPACE         = local.metrics_namespace # Embedded metrics (stage/API timings), see dashboard.tf
+      EMF_ENABLED               = "true"
+      PLAN_MAX_AGE_SECONDS      = "900" # Remediations apply the last scan's plan while it is this fresh
+      SHARD_SIZE                = "500" # Buckets/tables per shard in sharded scans (step_function.tf)
+      SHARD_CHECKPOINT_EVERY    = "200" # Resources evaluated between shard checkpoints
+      SHARD_TIME_MARGIN_SECONDS = "15"  # A shard stops at a checkpoint when less time than this is left
+      S3_EXPOSURE_CHECKS        = "true" # Scans read policy status + ACL of unblocked buckets (PUBLIC vs UNBLOCKED)
+      LEASE_SECONDS             = "180" # Single-flight lease per account/request; outlives the 120 s timeout
+      LEASE_WAIT_SECONDS        = "25"  # Duplicate/conflicting requests wait this long, then get a 409 (API Gateway cuts at 29 s)
+      IAM_STALE_KEY_DAYS        = "90"  # Active access keys unused this long are reported
+      IAM_UNUSED_PASSWORD_DAYS  = "90"  # Console passwords unused this long are reported
+    }
+  }
 }
 
 # 2. The Validator (Checks the problem)
@@ -43,7 +216,14 @@ resource "aws_lambda_function" "validator" {
   handler          = "validate.lambda_handler"
   runtime          = "python3.12"
   source_code_hash = data.archive_file.validate_zip.output_base64sha256
-  timeout          = 10
+  timeout          = 30 # A workflow batch holds up to 100 buckets
+
+  environment {
+    variables = {
+      VALIDATE_CONCURRENCY    = "16"  # Buckets checked in parallel per batch
+      GUARD_IN_FLIGHT_SECONDS = "300" # A bucket claimed by one execution is skipped by others this long
+    }
+  }
 }
 
 resource "aws_lambda_function" "get_logs" {
@@ -56,6 +236,57 @@ resource "aws_lambda_function" "get_logs" {
   timeout         = 10
 }
 
+# Full-history NDJSON export (parallel segmented Scan -> S3 multipart upload).
+# Invoked directly (aws lambda invoke), not through API Gateway: an export can
+# outlast the 29 s integration timeout. Returns a presigned URL to the object.
+resource "aws_lambda_function" "export_logs" {
+  filename         = data.archive_file.export_logs_zip.output_path
+  function_name    = "cloud-audit-zero-export-logs"
+  role             = aws_iam_role.lambda_role.arn
+  handler          = "export_logs.lambda_handler"
+  runtime          = "python3.12"
+  source_code_hash = data.archive_file.export_logs_zip.output_base64sha256
+  timeout          = 900
+  memory_size      = 512
+
+  environment {
+    variables = {
+      EXPORT_BUCKET         = aws_s3_bucket.log_payloads.id # Written under exports/
+      LOG_PAYLOAD_BUCKET    = aws_s3_bucket.log_payloads.id # Read when an export expands packed payloads
+      EXPORT_SEGMENTS       = "2"                           # Parallel Scan segments (one worker each, at most 16)
+      EXPORT_RCU_PER_SECOND = "2"                           # Read budget shared by all segments: CloudAuditZeroLogs has 5 provisioned RCU
+    }
+  }
+}
+
+resource "aws_lambda_function" "get_status" {
+  filename         = data.archive_file.get_status_zip.output_path
+  function_name    = "cloud-audit-zero-get-status"
+  role             = aws_iam_role.lambda_role.arn
+  handler          = "get_status.lambda_handler"
+  runtime          = "python3.12"
+  source_code_hash = data.archive_file.get_status_zip.output_base64sha256
+  timeout          = 10
+}
+
+# 4. The Log Stream (WebSocket routes + DynamoDB Streams fan-out, see websocket.tf)
+resource "aws_lambda_function" "log_stream" {
+  filename         = data.archive_file.log_stream_zip.output_path
+  function_name    = "cloud-audit-zero-log-stream"
+  role             = aws_iam_role.lambda_role.arn
+  handler          = "log_stream.lambda_handler"
+  runtime          = "python3.12"
+  source_code_hash = data.archive_file.log_stream_zip.output_base64sha256
+  timeout          = 30
+
+  environment {
+    variables = {
+      STREAM_ENDPOINT    = "${replace(aws_apigatewayv2_api.log_stream.api_endpoint, "wss://", "https://")}/${local.log_stream_stage}"
+      FANOUT_CONCURRENCY = "16" # Parallel PostToConnection calls per stream batch
+    }
+  }
+}
+
 ################################################################################
 # IAM Role & Permissions (The "Identity" for the Lambda)
 ################################################################################
@@ -97,7 +328,8 @@ resource "aws_iam_policy" "remediate_policy" {
       {
         # Allow Listing all buckets
         Action = [
-          "s3:ListAllMyBuckets"
+          "s3:ListAllMyBuckets",
+          "s3:GetAccountPublicAccessBlock" # Account-level block: skips per-bucket public checks when on
         ]
         Effect   = "Allow"
         Resource = "*"
@@ -108,11 +340,23 @@ resource "aws_iam_policy" "remediate_policy" {
           "s3:PutBucketPublicAccessBlock",
           "s3:GetBucketPublicAccessBlock",
           "s3:ListBucket",
-          "s3:GetBucketEncryption"
+          "s3:GetBucketEncryption",
+          "s3:GetBucketPolicyStatus",
+          "s3:GetBucketAcl"
         ]
         Effect   = "Allow"
         Resource = "arn:aws:s3:::*"
       },
+      {
+        # Allow storing/reading log payloads too large for a DynamoDB item, and log exports (multipart)
+        Action = [
+          "s3:PutObject",
+          "s3:GetObject",
+          "s3:AbortMultipartUpload"
+        ]
+        Effect   = "Allow"
+        Resource = "${aws_s3_bucket.log_payloads.arn}/*"
+      },
       {
         # Allow Writing to the Cloud-Audit-Zero Database
         Action = [
@@ -122,8 +366,54 @@ resource "aws_iam_policy" "remediate_policy" {
         Resource = aws_dynamodb_table.audit_logs.arn
       },
       {
+        # Allow reading/writing scanner state (incremental snapshots, posture, remediation plans, leases, connections)
         Action = [
-          "iam:GetAccountSummary"   # Allows checking Root MFA status
+          "dynamodb:GetItem",
+          "dynamodb:Query",
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
+          "dynamodb:BatchWriteItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.scanner_state.arn
+      },
+      {
+        # Allow writing per-resource findings
+        Action = [
+          "dynamodb:BatchWriteItem",
+          "dynamodb:PutItem"
+        ]
+        Effect   = "Allow"
+        Resource = aws_dynamodb_table.findings.arn
+      },
+      {
+        # Allow the log stream to follow both log tables' DynamoDB Streams
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Effect   = "Allow"
+        Resource = [
+          aws_dynamodb_table.audit_logs.stream_arn,
+          aws_dynamodb_table.audit_log.stream_arn
+        ]
+      },
+      {
+        # Allow pushing messages to connected dashboards
+        Action = [
+          "execute-api:ManageConnections"
+        ]
+        Effect   = "Allow"
+        Resource = "${aws_apigatewayv2_api.log_stream.execution_arn}/*"
+      },
+      {
+        Action = [
+          "iam:GetAccountSummary",        # Root MFA status (fallback when no credential report)
+          "iam:GenerateCredentialReport", # Every user's password/MFA/key usage in one report
+          "iam:GetCredentialReport"
         ]
         Effect   = "Allow"
         Resource = "*"
@@ -132,11 +422,20 @@ resource "aws_iam_policy" "remediate_policy" {
         # Allow scanning network firewalls
         Action = [
           "ec2:DescribeSecurityGroups",       # Look at rules
+          "ec2:DescribeRegions",              # Enumerate enabled regions for multi-region scans
           "ec2:RevokeSecurityGroupIngress"    # DELETE dangerous rules
         ]
         Effect   = "Allow"
         Resource = "*"
       },
+      {
+        # Allow fan-out scans into other accounts (target roles must use this name prefix)
+        Action = [
+          "sts:AssumeRole"
+        ]
+        Effect   = "Allow"
+        Resource = "arn:aws:iam::*:role/cloud-audit-zero-*"
+      },
       {
         # Allow Scanning Databases for Encryption
         Action = [
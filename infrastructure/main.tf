@@ -55,6 +55,10 @@ resource "aws_dynamodb_table" "audit_log" {
   write_capacity = 1
   hash_key       = "RequestId"
 
+  # LogRemediation rows are pushed to dashboards by the log_stream Lambda
+  stream_enabled   = true
+  stream_view_type = "NEW_IMAGE"
+
   attribute {
     name = "RequestId"
     type = "S"
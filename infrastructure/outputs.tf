@@ -1,4 +1,16 @@
 output "api_endpoint" {
   description = "The public URL for the Cloud Audit Zero API"
   value       = aws_apigatewayv2_api.main_api.api_endpoint
-}
\ No newline at end of file
+}
+output "log_stream_endpoint" {
+  description = "WebSocket URL for the live log stream (VITE_WS_URL in the dashboard)"
+  value       = "${aws_apigatewayv2_api.log_stream.api_endpoint}/${local.log_stream_stage}"
+}
+output "sharded_scan_state_machine" {
+  description = "Step Functions state machine for sharded scans of large accounts"
+  value       = aws_sfn_state_machine.sharded_scan.arn
+}
+output "export_logs_function" {
+  description = "Lambda for full audit-log exports (aws lambda invoke --function-name ... --payload '{\"since\": \"2026-01-01\"}')"
+  value       = aws_lambda_function.export_logs.function_name
+}
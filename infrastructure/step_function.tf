@@ -60,63 +60,178 @@ resource "aws_sfn_state_machine" "sfn_workflow" {
   role_arn = aws_iam_role.step_function_role.arn
 
   definition = jsonencode({
-    Comment = "Orchestrates the detection and remediation of S3 security issues"
-    StartAt = "ValidateBucket"
+    Comment = "Orchestrates the detection and remediation of S3 security issues, one batch of events at a time"
+    StartAt = "ValidateBuckets"
     States = {
-      # Step 1: Call the Validator Lambda
-      ValidateBucket = {
+      # Step 1: Call the Validator Lambda with the whole batch (de-duplicated, checked concurrently)
+      ValidateBuckets = {
         Type     = "Task"
         Resource = aws_lambda_function.validator.arn
-        Next     = "IsBucketPublic?"
-        # Pass the input straight through
-        InputPath = "$"
+        Parameters = {
+          "records.$" = "$" # The pipe delivers a JSON array of SQS messages
+        }
+        Next = "AnyBucketPublic?"
       }
 
       # Step 2: Decision Logic (The Brain)
-      "IsBucketPublic?" = {
+      "AnyBucketPublic?" = {
         Type = "Choice"
         Choices = [
           {
-            Variable = "$.is_public"
-            BooleanEquals = true
-            Next = "RemediateBucket"
+            Variable  = "$.public[0]"
+            IsPresent = true
+            Next      = "RemediatePublicBuckets"
           }
         ]
-        # If it's NOT public, just end successfully
+        # If nothing is public, just end successfully
         Default = "AuditComplete_Safe"
       }
 
-      # Step 3: Call the Remediator (Only if Public)
-      RemediateBucket = {
+      # Step 3: Fan out over the public buckets only
+      RemediatePublicBuckets = {
+        Type           = "Map"
+        ItemsPath      = "$.public"
+        MaxConcurrency = 10
+        ResultPath     = "$.remediations"
+        Iterator = {
+          StartAt = "RemediateBucket"
+          States = {
+            # Step 3a: Call the Remediator for this bucket ({"bucket_name", "is_public", "guard_owner"})
+            RemediateBucket = {
+              Type       = "Task"
+              Resource   = aws_lambda_function.remediator.arn
+              Next       = "LogRemediation"
+              ResultPath = "$.remediation_result"
+            }
+
+            # Step 3b: Log to DynamoDB (Direct Integration), one row per bucket
+            LogRemediation = {
+              Type     = "Task"
+              Resource = "arn:aws:states:::dynamodb:putItem"
+              Parameters = {
+                TableName = aws_dynamodb_table.audit_log.name
+                Item = {
+                  RequestId  = { "S.$" = "States.Format('{}#{}', $$.Execution.Id, $.bucket_name)" }
+                  Timestamp  = { "S.$" = "$$.State.EnteredTime" }
+                  BucketName = { "S.$" = "$.bucket_name" }
+                  Action     = { "S" = "Remediated Public Access" }
+                  Status     = { "S.$" = "$.remediation_result.status" }
+                }
+              }
+              End = true
+            }
+          }
+        }
+        End = true
+      }
+
+      # Step 4: No Action Needed
+      AuditComplete_Safe = {
+        Type   = "Pass"
+        Result = "Buckets are secure. No action taken."
+        End    = true
+      }
+    }
+  })
+}
+
+################################################################################
+# Sharded Scan (large accounts)
+# Plan -> one Map item per shard (re-invoked until its checkpoints say done) -> Reduce.
+# Start with {"action": "scan", "regions": "all"}; add "account": <role ARN> for a
+# target account and "run_id" to resume an earlier run. A failed execution can
+# also be redriven: finished shards return at once, the rest resume at their checkpoint.
+################################################################################
+
+resource "aws_sfn_state_machine" "sharded_scan" {
+  name     = "CloudAuditZero-ShardedScan"
+  role_arn = aws_iam_role.step_function_role.arn
+
+  definition = jsonencode({
+    Comment = "Splits a full-account scan into checkpointed shards that each fit in one Lambda invocation"
+    StartAt = "PlanShards"
+    States = {
+      # Step 1: List buckets/tables once and write the shard items (or return the existing run's)
+      PlanShards = {
         Type     = "Task"
         Resource = aws_lambda_function.remediator.arn
-        Next     = "LogRemediation"
-        ResultPath = "$.remediation_result"
+        Parameters = {
+          "shard_op"    = "plan"
+          "input.$"     = "$"
+          "execution.$" = "$$.Execution.Name"
+        }
+        Retry = [{
+          ErrorEquals     = ["Lambda.ServiceException", "Lambda.TooManyRequestsException", "Lambda.SdkClientException"]
+          IntervalSeconds = 2
+          MaxAttempts     = 3
+          BackoffRate     = 2
+        }]
+        Next = "ScanShards"
       }
 
-      # Step 4: Log to DynamoDB (Direct Integration)
-      LogRemediation = {
-        Type = "Task"
-        Resource = "arn:aws:states:::dynamodb:putItem"
+      # Step 2: Shards in parallel; each one loops until its last checkpoint marks it DONE
+      ScanShards = {
+        Type           = "Map"
+        ItemsPath      = "$.shards"
+        MaxConcurrency = 10
+        ResultPath     = null
         Parameters = {
-          TableName = aws_dynamodb_table.audit_log.name
-          Item = {
-            RequestId = { "S.$": "$$.Execution.Id" }
-            Timestamp = { "S.$": "$$.State.EnteredTime" }
-            BucketName = { "S.$": "$.bucket_name" }
-            Action = { "S": "Remediated Public Access" }
-            Status = { "S": "Success" }
+          "shard_op" = "run"
+          "run_id.$" = "$$.Map.Item.Value.run_id"
+          "shard.$"  = "$$.Map.Item.Value.shard"
+        }
+        Iterator = {
+          StartAt = "RunShard"
+          States = {
+            RunShard = {
+              Type     = "Task"
+              Resource = aws_lambda_function.remediator.arn
+              # Timeouts and crashes resume from the shard's last checkpoint
+              Retry = [{
+                ErrorEquals     = ["States.ALL"]
+                IntervalSeconds = 5
+                MaxAttempts     = 3
+                BackoffRate     = 2
+              }]
+              Next = "ShardComplete?"
+            }
+
+            "ShardComplete?" = {
+              Type = "Choice"
+              Choices = [
+                {
+                  Variable      = "$.complete"
+                  BooleanEquals = false
+                  Next          = "RunShard" # Stopped before the Lambda timeout: continue from the checkpoint
+                }
+              ]
+              Default = "ShardDone"
+            }
+
+            ShardDone = {
+              Type = "Succeed"
+            }
           }
         }
-        End = true
+        Next = "ReduceShards"
       }
 
-      # Step 5: No Action Needed
-      AuditComplete_Safe = {
-        Type = "Pass"
-        Result = "Bucket is secure. No action taken."
+      # Step 3: Merge shard results into one log entry, posture and remediation plan
+      ReduceShards = {
+        Type     = "Task"
+        Resource = aws_lambda_function.remediator.arn
+        Parameters = {
+          "shard_op" = "reduce"
+          "run_id.$" = "$.run_id"
+        }
+        Retry = [{
+          ErrorEquals     = ["Lambda.ServiceException", "Lambda.TooManyRequestsException", "Lambda.SdkClientException"]
+          IntervalSeconds = 2
+          MaxAttempts     = 3
+          BackoffRate     = 2
+        }]
         End = true
       }
     }
   })
-}
\ No newline at end of file
+}
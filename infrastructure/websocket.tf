@@ -0,0 +1,77 @@
+################################################################################
+# Live Log Stream (WebSocket API)
+# Dashboards connect once and receive new log entries as they are written,
+# instead of polling GET /logs. Clients send {"action": "resume", "cursor": ...}
+# after (re)connecting to replay anything they missed.
+################################################################################
+
+locals {
+  log_stream_stage = "live"
+}
+
+resource "aws_apigatewayv2_api" "log_stream" {
+  name                       = "cloud-audit-zero-log-stream"
+  protocol_type              = "WEBSOCKET"
+  route_selection_expression = "$request.body.action"
+}
+
+resource "aws_apigatewayv2_stage" "log_stream" {
+  api_id      = aws_apigatewayv2_api.log_stream.id
+  name        = local.log_stream_stage
+  auto_deploy = true
+}
+
+resource "aws_apigatewayv2_integration" "log_stream_integration" {
+  api_id           = aws_apigatewayv2_api.log_stream.id
+  integration_type = "AWS_PROXY"
+  integration_uri  = aws_lambda_function.log_stream.invoke_arn
+}
+
+resource "aws_apigatewayv2_route" "log_stream_routes" {
+  for_each  = toset(["$connect", "$disconnect", "resume"])
+  api_id    = aws_apigatewayv2_api.log_stream.id
+  route_key = each.value
+  target    = "integrations/${aws_apigatewayv2_integration.log_stream_integration.id}"
+}
+
+resource "aws_lambda_permission" "api_gw_log_stream" {
+  statement_id  = "AllowExecutionFromWebSocketAPI"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.log_stream.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_apigatewayv2_api.log_stream.execution_arn}/*"
+}
+
+################################################################################
+# Stream Sources: new rows in either log table are pushed to connected clients
+################################################################################
+
+resource "aws_lambda_event_source_mapping" "audit_logs_stream" {
+  event_source_arn                   = aws_dynamodb_table.audit_logs.stream_arn
+  function_name                      = aws_lambda_function.log_stream.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 3
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ eventName = ["INSERT"] })
+    }
+  }
+}
+
+resource "aws_lambda_event_source_mapping" "workflow_log_stream" {
+  event_source_arn                   = aws_dynamodb_table.audit_log.stream_arn
+  function_name                      = aws_lambda_function.log_stream.arn
+  starting_position                  = "LATEST"
+  batch_size                         = 100
+  maximum_batching_window_in_seconds = 1
+  maximum_retry_attempts             = 3
+
+  filter_criteria {
+    filter {
+      pattern = jsonencode({ eventName = ["INSERT"] })
+    }
+  }
+}
@@ -0,0 +1,279 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import Counter
+import boto3
+import botocore.session
+from botocore.config import Config
+
+# Shared client-side rate limiting + retry layer for every AWS call made by the
+# Lambdas. Each service gets one adaptive token bucket shared by all threads,
+# regions and accounts in the container; throttling responses shrink the rate
+# (AIMD) and are retried with exponential backoff + full jitter, so findings
+# are not lost to swallowed ThrottlingException errors.
+#
+# Clients are also built lazily here: one botocore session per container, one
+# client per (service, region) on first use, reused across warm invocations.
+
+logger = logging.getLogger()
+
+# Ceiling requests/second per service ("s3=200,ec2=50"); unlisted services use DEFAULT_RATE
+DEFAULT_RATES = "s3=200,ec2=50,iam=10,rds=20,dynamodb=100,sts=20"
+DEFAULT_RATE = float(os.environ.get('API_DEFAULT_RATE', '50'))
+MAX_ATTEMPTS = int(os.environ.get('API_MAX_ATTEMPTS', '8'))
+BACKOFF_BASE = 0.1   # seconds
+BACKOFF_CAP = 10.0   # seconds
+
+# Rate limiting only. LimitExceededException is left out: on IAM, CloudFormation and
+# others it is a hard quota, and retrying it would also cut the service's shared rate.
+THROTTLE_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'ProvisionedThroughputExceededException', 'RequestLimitExceeded',
+    'BandwidthLimitExceeded', 'RequestThrottled', 'SlowDown', 'EC2ThrottledException',
+    'PriorRequestNotComplete', 'TransactionInProgressException'
+}
+TRANSIENT_STATUS = {500, 502, 503, 504}
+
+# botocore's own retries are disabled; the needs-retry hook below owns retrying
+CLIENT_CONFIG = Config(retries={'mode': 'standard', 'total_max_attempts': 1})
+
+class TokenBucket:
+    """Thread-safe token bucket whose refill rate adapts to throttling (AIMD)."""
+    def __init__(self, max_rate):
+        self.max_rate = max_rate
+        self.min_rate = max(max_rate * 0.05, 0.5)
+        self.rate = max_rate
+        self.tokens = max_rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_throttle(self):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self.tokens = min(self.tokens, self.rate)
+
+    def on_success(self):
+        with self.lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.02)
+
+def _parse_rates(spec):
+    rates = {}
+    for part in spec.split(','):
+        name, _, value = part.partition('=')
+        if name.strip() and value.strip():
+            rates[name.strip()] = float(value)
+    return rates
+
+RATES = _parse_rates(os.environ.get('API_RATE_LIMITS', DEFAULT_RATES))
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+class ApiStats:
+    """
+    Per-service call/throttle/retry/error counters and per-operation latency. One
+    covers the whole invocation (EMF, module functions below); each remediate.ClientPool
+    keeps its own, so an account's log entry reports only that account's calls.
+    """
+    def __init__(self):
+        self.counters = {'calls': Counter(), 'throttles': Counter(), 'retries': Counter(), 'errors': Counter()}
+        self.timings = {}  # "service.Operation" -> [calls, total_ms, max_ms], retries and backoff included
+        self.lock = threading.Lock()
+
+    def count(self, kind, service):
+        with self.lock:
+            self.counters[kind][service] += 1
+
+    def time_operation(self, operation, elapsed):
+        with self.lock:
+            t = self.timings.setdefault(operation, [0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += elapsed
+            t[2] = max(t[2], elapsed)
+
+    def stats(self):
+        with self.lock:
+            return {kind: dict(counter) for kind, counter in self.counters.items()}
+
+    def operation_timings(self):
+        with self.lock:
+            return {op: list(t) for op, t in self.timings.items()}
+
+    def reset(self):
+        with self.lock:
+            for counter in self.counters.values():
+                counter.clear()
+            self.timings.clear()
+
+_totals = ApiStats()
+
+def bucket_for(service):
+    if service not in _buckets:
+        with _buckets_lock:
+            if service not in _buckets:
+                _buckets[service] = TokenBucket(RATES.get(service, DEFAULT_RATE))
+    return _buckets[service]
+
+def api_stats():
+    """Per-service call/throttle/retry/error counters since the last reset."""
+    return _totals.stats()
+
+def api_timings():
+    """Per-operation latency since the last reset: {"s3.GetBucketEncryption": [calls, total_ms, max_ms]}."""
+    return _totals.operation_timings()
+
+def reset_stats():
+    _totals.reset()
+
+def instrument(client, stats=None):
+    """
+    Attaches the shared token bucket and retry policy to a boto3 client. Its calls
+    are counted in the invocation totals and, when given, in `stats` too.
+    """
+    service = client.meta.service_model.service_id.hyphenize()
+    bucket = bucket_for(service)
+    scopes = (_totals, stats) if stats is not None else (_totals,)
+
+    def _count(kind, service):
+        for scope in scopes:
+            scope.count(kind, service)
+
+    def before_send(**kwargs):
+        # Fires once per HTTP attempt, so retries are rate limited too
+        bucket.acquire()
+        _count('calls', service)
+
+    def needs_retry(response=None, attempts=1, caught_exception=None, **kwargs):
+        code, status = None, None
+        if response is not None:
+            status = response[0].status_code
+            code = response[1].get('Error', {}).get('Code')
+        throttled = code in THROTTLE_CODES or status == 429
+        transient = caught_exception is not None or status in TRANSIENT_STATUS
+
+        if throttled:
+            _count('throttles', service)
+            bucket.on_throttle()
+        elif not transient:
+            if status is not None and status < 400:
+                bucket.on_success()
+            elif status is not None:
+                _count('errors', service)
+            return None
+
+        if attempts >= MAX_ATTEMPTS:
+            _count('errors', service)
+            return None
+        _count('retries', service)
+        delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempts)))
+        logger.warning(f"Retrying {service} ({code or status or type(caught_exception).__name__}) in {delay:.2f}s [attempt {attempts}]")
+        return delay
+
+    def before_call(model=None, context=None, **kwargs):
+        # Once per API call (not per attempt): the span covers retries and backoff
+        if context is not None:
+            context['timed'] = (f"{service}.{model.name}", time.perf_counter())
+
+    def after_call(context=None, **kwargs):
+        # after-call-error (connection failures) carries no model, hence the context
+        if context and 'timed' in context:
+            operation, started = context.pop('timed')
+            elapsed = (time.perf_counter() - started) * 1000
+            for scope in scopes:
+                scope.time_operation(operation, elapsed)
+
+    client.meta.events.register(f"before-send.{service}", before_send)
+    client.meta.events.register(f"needs-retry.{service}", needs_retry)
+    client.meta.events.register(f"before-call.{service}", before_call)
+    client.meta.events.register(f"after-call.{service}", after_call)
+    client.meta.events.register(f"after-call-error.{service}", after_call)
+    return client
+
+# ====================================================
+# FACTORY: Shared session, clients built on first use
+# ====================================================
+_session = None
+_session_lock = threading.Lock()
+_cache = {}
+
+def shared_session():
+    """The container's shared boto3 Session (built on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = boto3.Session()
+    return _session
+
+def session_lock(session):
+    """
+    The one lock serialising client/resource creation on `session` (boto3 sessions
+    are not thread-safe): cached clients and ClientPool clients both take it.
+    Reentrant, so a cached build can call client() while holding it.
+    """
+    lock = getattr(session, '_client_lock', None)
+    if lock is None:
+        with _session_lock:
+            lock = getattr(session, '_client_lock', None)
+            if lock is None:
+                lock = session._client_lock = threading.RLock()
+    return lock
+
+def home_region():
+    return shared_session().region_name
+
+def credentials_session(credentials, region=None):
+    """
+    Session for other credentials (e.g. an assumed role). It shares the shared
+    session's data loader, so service models are only parsed once per container.
+    """
+    bc_session = botocore.session.get_session()
+    bc_session.register_component('data_loader', shared_session()._session.get_component('data_loader'))
+    bc_session._credentials = credentials
+    return boto3.Session(botocore_session=bc_session, region_name=region or home_region())
+
+def client(service, session=None, region=None, config=None, endpoint_url=None, stats=None):
+    """New boto3 client wired into the shared rate limiter and retry layer (`stats`: see ApiStats)."""
+    merged = CLIENT_CONFIG.merge(config) if config else CLIENT_CONFIG
+    session = session or shared_session()
+    with session_lock(session):
+        built = session.client(service, region_name=region, config=merged, endpoint_url=endpoint_url)
+    return instrument(built, stats)
+
+def resource(service, session=None, region=None, config=None):
+    merged = CLIENT_CONFIG.merge(config) if config else CLIENT_CONFIG
+    session = session or shared_session()
+    with session_lock(session):
+        res = session.resource(service, region_name=region, config=merged)
+    instrument(res.meta.client)
+    return res
+
+def _cached(key, build):
+    if key not in _cache:
+        # Under the shared session's lock, so a client is never built twice
+        with session_lock(shared_session()):
+            if key not in _cache:
+                _cache[key] = build()
+    return _cache[key]
+
+def get_client(service, region=None, config=None, endpoint_url=None):
+    """Cached client on the shared session. `config` only applies when the client is first built."""
+    return _cached(('client', service, region, endpoint_url),
+                   lambda: client(service, region=region, config=config, endpoint_url=endpoint_url))
+
+def get_resource(service, region=None, config=None):
+    return _cached(('resource', service, region), lambda: resource(service, region=region, config=config))
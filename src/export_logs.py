@@ -0,0 +1,259 @@
+import os
+import io
+import sys
+import json
+import gzip
+import time
+import uuid
+import queue
+import base64
+import logging
+import argparse
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.types import Binary
+import aws_clients
+import log_codec
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Full-history export of CloudAuditZeroLogs as NDJSON (one entry per line, optionally gzip).
+# A parallel segmented Scan (Segment/TotalSegments) runs one worker per segment; pages
+# flow through a bounded queue to a single writer, so memory holds at most
+# QUEUE_PAGES + segments pages whatever the table size. Lines come out in no
+# particular order. All segments share one read-capacity budget (RCU/s).
+# The time filter is a FilterExpression: it trims the output, not the RCU, since a
+# Scan reads every item either way.
+#
+# Lambda (cloud-audit-zero-export-logs, invoked directly: exports outlast API Gateway's
+# 29 s limit) streams into s3://EXPORT_BUCKET/exports/ and returns a presigned URL.
+# Locally: python3 src/export_logs.py --since 2026-01-01 --gzip > audit.ndjson.gz
+
+TABLE_NAME = "CloudAuditZeroLogs"
+EXPORT_BUCKET = os.environ.get('EXPORT_BUCKET', '')
+EXPORT_PREFIX = "exports/"
+URL_EXPIRES = 3600
+DEFAULT_SEGMENTS = max(1, int(os.environ.get('EXPORT_SEGMENTS', '2')))
+MAX_SEGMENTS = 16  # One worker thread each
+# Shared by all segments. CloudAuditZeroLogs is provisioned at 5 RCU (dynamodb.tf) and also
+# serves get_logs and the dashboard, so an export takes a fraction of it; raise it with the table's capacity.
+DEFAULT_RCU = float(os.environ.get('EXPORT_RCU_PER_SECOND', '2'))
+PAGE_ITEMS = max(1, int(os.environ.get('EXPORT_PAGE_ITEMS', '100')))   # Scan Limit: small pages keep each read's spike short
+QUEUE_PAGES = 16
+PART_BYTES = 8 * 1024 * 1024  # S3 multipart part size (minimum 5 MiB)
+
+class ReadBudget:
+    """
+    Read-capacity budget shared by every segment. A page's cost is only known
+    afterwards (ConsumedCapacity), so it is paid after the fact: segments wait
+    before their next page while the budget is in debt.
+    """
+    def __init__(self, rcu_per_second):
+        self.rate = rcu_per_second
+        self.balance = rcu_per_second  # One second of burst
+        self.updated = time.monotonic()
+        self.consumed = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self, stop=None):
+        while not (stop and stop.is_set()):
+            with self.lock:
+                now = time.monotonic()
+                self.balance = min(self.rate, self.balance + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.balance >= 0:
+                    return
+                delay = -self.balance / self.rate
+            time.sleep(min(delay, 1.0))
+
+    def spend(self, units):
+        with self.lock:
+            self.balance -= units
+            self.consumed += units
+
+class S3Writer:
+    """File-like sink that streams into one S3 object via multipart upload, PART_BYTES at a time."""
+    def __init__(self, s3, bucket, key, content_type):
+        self.s3, self.bucket, self.key = s3, bucket, key
+        self.upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType=content_type)['UploadId']
+        self.parts = []
+        self.buffer = io.BytesIO()
+        self.size = 0
+
+    def write(self, data):
+        self.buffer.write(data)
+        if self.buffer.tell() >= PART_BYTES:
+            self._flush_part()
+        return len(data)
+
+    def flush(self):
+        pass  # GzipFile flushes on close; parts are only sent once PART_BYTES are buffered
+
+    def _flush_part(self):
+        body = self.buffer.getvalue()
+        number = len(self.parts) + 1
+        etag = self.s3.upload_part(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                   PartNumber=number, Body=body)['ETag']
+        self.parts.append({'PartNumber': number, 'ETag': etag})
+        self.size += len(body)
+        self.buffer = io.BytesIO()
+
+    def close(self):
+        if self.buffer.tell() or not self.parts:
+            self._flush_part()  # The last part may be smaller than 5 MiB
+        self.s3.complete_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id,
+                                          MultipartUpload={'Parts': self.parts})
+
+    def abort(self):
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except Exception as e:
+            logger.error(f"Abort failed for s3://{self.bucket}/{self.key}: {str(e)}")
+
+def to_json(value):
+    """DynamoDB values -> JSON: Decimal as int/float, Binary as base64, sets as sorted lists."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (Binary, bytes, bytearray)):
+        return base64.b64encode(bytes(value)).decode()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    raise TypeError(f"Unserialisable {type(value).__name__}")
+
+def scan_request(since=None, until=None, fields=None, expand=False):
+    """Scan kwargs shared by every segment: time filter on Timestamp plus optional projection."""
+    request = {'Limit': PAGE_ITEMS, 'ReturnConsumedCapacity': 'TOTAL'}
+    if since and until:
+        request['FilterExpression'] = Attr('Timestamp').between(since, until)
+    elif since:
+        request['FilterExpression'] = Attr('Timestamp').gte(since)
+    elif until:
+        request['FilterExpression'] = Attr('Timestamp').lte(until)
+    if fields:
+        names = list(dict.fromkeys(fields))
+        if expand and 'Meta' in names:
+            names += [a for a in log_codec.PAYLOAD_ATTRIBUTES if a not in names]  # Needed to rebuild Meta
+        request['ProjectionExpression'] = ", ".join(f"#p{i}" for i in range(len(names)))
+        request['ExpressionAttributeNames'] = {f"#p{i}": name for i, name in enumerate(names)}
+    return request
+
+def scan_segment(table, segment, total, request, budget, pages, stop):
+    """One worker: pages through its segment, handing each page to the writer via `pages`."""
+    kwargs = {**request, 'Segment': segment, 'TotalSegments': total}
+    while not stop.is_set():
+        budget.wait(stop)
+        response = table.scan(**kwargs)
+        budget.spend((response.get('ConsumedCapacity') or {}).get('CapacityUnits', 0))
+        items = response.get('Items', [])
+        while items and not stop.is_set():
+            try:
+                pages.put(items, timeout=1)  # Blocks while the writer is behind (back-pressure)
+                break
+            except queue.Full:
+                continue
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def export(table, out, since=None, until=None, fields=None, expand=False,
+           segments=DEFAULT_SEGMENTS, rcu_per_second=DEFAULT_RCU):
+    """
+    Writes every matching entry of `table` to the binary file-like `out` as NDJSON.
+    `expand` restores packed Meta payloads (see log_codec; may read S3); otherwise
+    entries are exported as the list view shows them. Returns export statistics.
+    """
+    segments = min(max(1, segments), MAX_SEGMENTS)
+    request = scan_request(since, until, fields, expand)
+    budget = ReadBudget(rcu_per_second)
+    pages = queue.Queue(maxsize=QUEUE_PAGES)
+    stop = threading.Event()
+    started = time.perf_counter()
+    count = 0
+
+    executor = ThreadPoolExecutor(max_workers=segments)
+    futures = [executor.submit(scan_segment, table, s, segments, request, budget, pages, stop) for s in range(segments)]
+    try:
+        # Single writer: drain pages until every segment has finished and the queue is empty
+        while True:
+            try:
+                items = pages.get(timeout=0.2)
+            except queue.Empty:
+                if all(f.done() for f in futures) and pages.empty():
+                    break
+                continue
+            lines = []
+            for item in items:
+                entry = log_codec.expand(item) if expand else log_codec.summary(item)
+                if fields:
+                    entry = {k: v for k, v in entry.items() if k in fields}
+                lines.append(json.dumps(entry, default=to_json, separators=(',', ':')))
+            out.write(("\n".join(lines) + "\n").encode())
+            count += len(lines)
+        for f in futures:
+            f.result()  # Re-raise a failed segment
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+    return {
+        'items': count,
+        'segments': segments,
+        'consumed_rcu': round(budget.consumed, 1),
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+def lambda_handler(event, context):
+    """
+    Direct invocation: {"since": "2026-01-01", "until": "2026-03-31T23:59:59", "fields": [...],
+    "gzip": true, "expand": false, "segments": 2, "rcu": 2} (all optional; always CloudAuditZeroLogs).
+    Returns {"success", "bucket", "key", "url", "items", "bytes", ...}.
+    """
+    if not EXPORT_BUCKET:
+        return {"success": False, "message": "EXPORT_BUCKET is not set"}
+    compress = bool(event.get('gzip', True))
+    key = f"{EXPORT_PREFIX}{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{uuid.uuid4().hex[:8]}.ndjson{'.gz' if compress else ''}"
+    s3 = aws_clients.get_client('s3')
+    table = aws_clients.get_resource('dynamodb').Table(TABLE_NAME)
+
+    writer = S3Writer(s3, EXPORT_BUCKET, key, 'application/gzip' if compress else 'application/x-ndjson')
+    try:
+        out = gzip.GzipFile(fileobj=writer, mode='wb') if compress else writer
+        stats = export(
+            table, out, since=event.get('since'), until=event.get('until'), fields=event.get('fields'),
+            expand=bool(event.get('expand', False)),
+            segments=int(event.get('segments', DEFAULT_SEGMENTS)),
+            rcu_per_second=float(event.get('rcu', DEFAULT_RCU))
+        )
+        if compress:
+            out.close()  # Writes the gzip trailer into the writer
+        writer.close()
+    except Exception as e:
+        logger.error(f"Export failed: {str(e)}")
+        writer.abort()
+        return {"success": False, "message": str(e)}
+
+    url = s3.generate_presigned_url('get_object', Params={'Bucket': EXPORT_BUCKET, 'Key': key}, ExpiresIn=URL_EXPIRES)
+    logger.info(f"Exported {stats['items']} entries to s3://{EXPORT_BUCKET}/{key} ({writer.size} bytes, {stats['consumed_rcu']} RCU)")
+    return {"success": True, "bucket": EXPORT_BUCKET, "key": key, "url": url, "bytes": writer.size, **stats}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export CloudAuditZeroLogs as NDJSON to stdout")
+    parser.add_argument("--since", help="Earliest Timestamp (ISO 8601, inclusive)")
+    parser.add_argument("--until", help="Latest Timestamp (ISO 8601, inclusive)")
+    parser.add_argument("--fields", help="Comma-separated attributes to keep (default: all)")
+    parser.add_argument("--expand", action="store_true", help="Restore packed Meta payloads")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    parser.add_argument("--segments", type=int, default=DEFAULT_SEGMENTS)
+    parser.add_argument("--rcu", type=float, default=DEFAULT_RCU, help="Read capacity units per second")
+    parser.add_argument("--table", default=TABLE_NAME)
+    args = parser.parse_args()
+
+    sink = gzip.GzipFile(fileobj=sys.stdout.buffer, mode='wb') if args.gzip else sys.stdout.buffer
+    stats = export(aws_clients.get_resource('dynamodb').Table(args.table), sink, since=args.since, until=args.until,
+                   fields=[f.strip() for f in args.fields.split(',')] if args.fields else None,
+                   expand=args.expand, segments=args.segments, rcu_per_second=args.rcu)
+    sink.close() if args.gzip else sink.flush()
+    print(json.dumps(stats), file=sys.stderr)
@@ -0,0 +1,82 @@
+import os
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Per-resource findings, one item each, in CloudAuditZeroFindings.
+# ResourceId (hash) + ScanKey ("<timestamp>#<scan id>#<finding>#<pillar>", range) makes "every scan
+# where bucket X was public" a single Query, newest last.
+# Items are written in 25-item BatchWriteItem chunks on a small worker pool;
+# UnprocessedItems are retried with jittered backoff until the budget runs out.
+
+logger = logging.getLogger()
+
+FINDINGS_TABLE_NAME = "CloudAuditZeroFindings"
+BATCH_SIZE = 25  # BatchWriteItem limit
+WRITE_CONCURRENCY = max(1, int(os.environ.get('FINDINGS_WRITE_CONCURRENCY', '4')))
+MAX_BATCH_ATTEMPTS = 8
+RETENTION_DAYS = int(os.environ.get('FINDINGS_RETENTION_DAYS', '90'))  # TTL on ExpiresAt
+
+def finding(service, region, resource, pillar, kind, severity, action, detail=None):
+    """One finding as produced by the scan; `resource_id` adds the account when written."""
+    return {
+        'service': service, 'region': region, 'resource': resource, 'pillar': pillar,
+        'finding': kind, 'severity': severity, 'action': action, 'detail': detail
+    }
+
+def resource_id(account_id, f):
+    """Stable id to query by: bucket names are global, everything else is per account + region."""
+    if f['service'] == 's3':
+        return f"s3/{f['resource']}"
+    return f"{f['service']}/{account_id}/{f['region']}/{f['resource']}"
+
+def to_item(f, scan_id, timestamp, account_id, expires_at):
+    item = {
+        'ResourceId': resource_id(account_id, f),
+        # A bucket can be both public and unencrypted, or unreadable on both pillars
+        'ScanKey': f"{timestamp}#{scan_id}#{f['finding']}#{f['pillar']}",
+        'ScanId': scan_id,
+        'Timestamp': timestamp,
+        'AccountId': account_id,
+        'Region': f['region'],
+        'Pillar': f['pillar'],
+        'Finding': f['finding'],
+        'Severity': f['severity'],
+        'Action': f['action'],
+        'ExpiresAt': expires_at
+    }
+    if f.get('detail'):
+        item['Detail'] = f['detail']
+    return item
+
+def write_batch(table, requests):
+    """Writes up to 25 put requests, retrying UnprocessedItems. Returns the count left unwritten."""
+    pending = {table.name: requests}
+    for attempt in range(MAX_BATCH_ATTEMPTS):
+        # The resource's client accepts plain Python values (same as Table.put_item)
+        pending = table.meta.client.batch_write_item(RequestItems=pending).get('UnprocessedItems') or {}
+        if not pending:
+            return 0
+        time.sleep(random.uniform(0, min(5.0, 0.05 * (2 ** attempt))))
+    return len(pending.get(table.name, []))
+
+def write_findings(table, findings, scan_id, timestamp, account_id):
+    """Stores every finding of one scan in `table` (a CloudAuditZeroFindings Table). Returns (written, failed)."""
+    if not findings:
+        return 0, 0
+    expires_at = int(time.time()) + RETENTION_DAYS * 86400
+    requests = [{'PutRequest': {'Item': to_item(f, scan_id, timestamp, account_id, expires_at)}} for f in findings]
+    chunks = [requests[i:i + BATCH_SIZE] for i in range(0, len(requests), BATCH_SIZE)]
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=min(len(chunks), WRITE_CONCURRENCY)) as executor:
+        for chunk, future in zip(chunks, [executor.submit(write_batch, table, c) for c in chunks]):
+            try:
+                failed += future.result()
+            except Exception as e:
+                logger.error(f"Findings Write Error: {str(e)}")
+                failed += len(chunk)
+    if failed:
+        logger.error(f"{failed} of {len(requests)} findings could not be written")
+    return len(requests) - failed, failed
@@ -1,44 +1,147 @@
+import os
 import json
-import boto3
+import time
+import base64
+import hashlib
 import logging
-from decimal import Decimal
+import aws_clients
+import log_codec
+from boto3.dynamodb.conditions import Key
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-dynamodb = boto3.resource('dynamodb')
 TABLE_NAME = "CloudAuditZeroLogs"
+INDEX_NAME = "FeedTimestampIndex"  # Feed (hash) + Timestamp (range), see dynamodb.tf
+LOG_FEED = "AUDIT"                 # Written on every entry by remediate.py
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
 
-# Helper to convert DynamoDB JSON format to standard JSON
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+# Identical polls within this window are answered from the warm container, not DynamoDB
+CACHE_TTL = float(os.environ.get('LOGS_CACHE_TTL', '2'))
+CACHE_MAX_ENTRIES = 256
+_cache = {}  # (limit, cursor) -> (expires_at, etag, body)
 
-def lambda_handler(event, context):
-    table = dynamodb.Table(TABLE_NAME)
+# The list view reads everything except the packed Meta payload (see log_codec);
+# GET /logs?id=<LogId> returns one entry with its payload expanded.
+LIST_ATTRIBUTES = ('LogId', 'Timestamp', 'Feed', 'AccountId', 'Event', 'Status', 'Details', 'Type', 'Product', 'Meta')
+LIST_PROJECTION = {
+    'ProjectionExpression': ", ".join(f"#a{i}" for i in range(len(LIST_ATTRIBUTES))),
+    'ExpressionAttributeNames': {f"#a{i}": name for i, name in enumerate(LIST_ATTRIBUTES)}
+}
+
+def encode_cursor(last_key):
+    """LastEvaluatedKey -> opaque, URL-safe token for the client."""
+    if not last_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_key, cls=log_codec.DecimalEncoder).encode()).decode()
 
+def decode_cursor(token):
+    """Opaque token -> ExclusiveStartKey. Raises ValueError on tampered/garbage input."""
     try:
-        # Scan the table (In production, Query is better, but Scan is fine for <1MB free tier)
-        response = table.scan(Limit=20)
-        items = response.get('Items', [])
+        key = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, dict) or key.get('Feed') != LOG_FEED:
+        raise ValueError("Invalid cursor")
+    return key
 
-        # Sort by Timestamp descending (newest first)
-        items.sort(key=lambda x: x.get('Timestamp', ''), reverse=True)
+def page_etag(newest, limit, cursor):
+    """
+    Entries are immutable once written, so a page is identified by its newest
+    entry plus the page parameters.
+    """
+    marker = f"{newest.get('LogId')}|{newest.get('Timestamp')}" if newest else "empty"
+    return '"' + hashlib.sha1(f"{marker}|{limit}|{cursor or ''}".encode()).hexdigest()[:16] + '"'
 
-        return {
-            "statusCode": 200,
-            "headers": {
+def get_entry(table, log_id, if_none_match, headers):
+    """Single entry with its full Meta. Entries never change, so the LogId is the ETag."""
+    etag = f'"{log_id}"'
+    headers = {**headers, "ETag": etag}
+    if if_none_match == etag:
+        return {"statusCode": 304, "headers": headers, "body": ""}
+    items = table.query(KeyConditionExpression=Key('LogId').eq(log_id), Limit=1).get('Items', [])
+    if not items:
+        return {"statusCode": 404, "headers": headers,
+                "body": json.dumps({"success": False, "message": f"Log {log_id} not found"})}
+    return {"statusCode": 200, "headers": headers,
+            "body": json.dumps({"success": True, "data": log_codec.expand(items[0])}, cls=log_codec.DecimalEncoder)}
+
+def lambda_handler(event, context):
+    table = aws_clients.get_resource('dynamodb').Table(TABLE_NAME)
+    params = event.get('queryStringParameters') or {}
+    request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+    if_none_match = request_headers.get('if-none-match')
+
+    try:
+        if params.get('id'):
+            return get_entry(table, params['id'], if_none_match, {
                 "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*", # Required for CORS
-                "Access-Control-Allow-Methods": "GET"
-            },
-            "body": json.dumps({
-                "success": True,
-                "data": items
-            }, cls=DecimalEncoder)
+                "Access-Control-Allow-Origin": "*",
+                "Access-Control-Allow-Methods": "GET",
+                "Access-Control-Expose-Headers": "ETag",
+                "Cache-Control": "no-cache"
+            })
+
+        try:
+            limit = min(max(int(params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+            query = {
+                'IndexName': INDEX_NAME,
+                'KeyConditionExpression': Key('Feed').eq(LOG_FEED),
+                'ScanIndexForward': False,  # Newest first
+                'Limit': limit,
+                **LIST_PROJECTION
+            }
+            if params.get('cursor'):
+                query['ExclusiveStartKey'] = decode_cursor(params['cursor'])
+        except ValueError as e:
+            return {
+                "statusCode": 400,
+                "headers": {
+                    "Content-Type": "application/json",
+                    "Access-Control-Allow-Origin": "*"
+                },
+                "body": json.dumps({"success": False, "message": str(e)})
+            }
+
+        headers = {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*", # Required for CORS
+            "Access-Control-Allow-Methods": "GET",
+            "Access-Control-Expose-Headers": "ETag",
+            "Cache-Control": "no-cache"  # Browsers may keep the body but must revalidate (If-None-Match)
         }
+        cursor = params.get('cursor')
+        key = (limit, cursor)
+        now = time.time()
+
+        cached = _cache.get(key)
+        if cached and cached[0] > now:
+            etag, body = cached[1], cached[2]
+        else:
+            if if_none_match and not cursor:
+                # Cheap probe: if the newest entry is unchanged, the client's copy is current
+                head = table.query(**{**query, 'Limit': 1}).get('Items', [])
+                if page_etag(head[0] if head else None, limit, cursor) == if_none_match:
+                    return {"statusCode": 304, "headers": {**headers, "ETag": if_none_match}, "body": ""}
+
+            # Query the time-ordered index: cost depends on `limit`, not on table size
+            response = table.query(**query)
+            items = response.get('Items', [])
+            etag = page_etag(items[0] if items else None, limit, cursor)
+            body = json.dumps({
+                "success": True,
+                "data": items,
+                "next_cursor": encode_cursor(response.get('LastEvaluatedKey'))
+            }, cls=log_codec.DecimalEncoder)
+            if len(_cache) >= CACHE_MAX_ENTRIES:
+                _cache.clear()
+            _cache[key] = (now + CACHE_TTL, etag, body)
+
+        headers["ETag"] = etag
+        if if_none_match == etag:
+            return {"statusCode": 304, "headers": headers, "body": ""}
+        return {"statusCode": 200, "headers": headers, "body": body}
 
     except Exception as e:
         logger.error(f"Error fetching logs: {str(e)}")
@@ -49,4 +152,4 @@ def lambda_handler(event, context):
                 "Access-Control-Allow-Origin": "*"
             },
             "body": json.dumps({"success": False, "message": str(e)})
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,64 @@
+import json
+import logging
+import aws_clients
+import log_codec
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+STATE_TABLE_NAME = "CloudAuditZeroState"
+POSTURE_PK = "POSTURE"  # Maintained by remediate.update_posture, one item per account
+
+def lambda_handler(event, context):
+    """
+    GET /status[?account=<id>]: the current posture in a single GetItem, so the
+    cost is the same whether the log table holds ten entries or ten million.
+    """
+    headers = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "GET",
+        "Access-Control-Expose-Headers": "ETag",
+        "Cache-Control": "no-cache"
+    }
+    params = event.get('queryStringParameters') or {}
+    request_headers = {k.lower(): v for k, v in (event.get('headers') or {}).items()}
+
+    try:
+        account_id = params.get('account')
+        if not account_id:
+            # Default to this account: arn:aws:lambda:<region>:<account-id>:function:<name>
+            function_arn = getattr(context, 'invoked_function_arn', '') or ''
+            account_id = function_arn.split(':')[4] if function_arn.count(':') >= 5 else 'unknown'
+
+        item = aws_clients.get_resource('dynamodb').Table(STATE_TABLE_NAME).get_item(
+            Key={'PK': POSTURE_PK, 'SK': account_id}
+        ).get('Item')
+
+        if not item:
+            return {"statusCode": 404, "headers": headers,
+                    "body": json.dumps({"success": False, "message": f"No posture recorded for {account_id} yet"})}
+
+        etag = f'"{item.get("LastLogId")}"'
+        if request_headers.get('if-none-match') == etag:
+            return {"statusCode": 304, "headers": {**headers, "ETag": etag}, "body": ""}
+
+        data = {
+            'account_id': account_id,
+            'status': item.get('Status'),
+            'details': item.get('Details'),
+            'mode': item.get('Mode'),
+            'last_log_id': item.get('LastLogId'),
+            'last_scan_at': item.get('LastScanAt'),
+            'last_remediation_at': item.get('LastRemediationAt'),
+            'updated_at': item.get('UpdatedAt'),
+            'root_mfa_secure': item.get('RootMfaSecure'),
+            'counts': item.get('Counts', {}),
+            'findings': item.get('Findings', {})
+        }
+        return {"statusCode": 200, "headers": {**headers, "ETag": etag},
+                "body": json.dumps({"success": True, "data": data}, cls=log_codec.DecimalEncoder)}
+
+    except Exception as e:
+        logger.error(f"Error fetching status: {str(e)}")
+        return {"statusCode": 500, "headers": headers, "body": json.dumps({"success": False, "message": str(e)})}
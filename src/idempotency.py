@@ -0,0 +1,100 @@
+import os
+import time
+import logging
+from botocore.exceptions import ClientError
+
+# Remediation guard for the S3 workflow, one item per bucket in CloudAuditZeroState
+# (PK = GUARD_PK, SK = "s3/<bucket>"), expiring via the table's ExpiresAt TTL:
+#   VALIDATING  claimed by the validator while a workflow execution owns the bucket
+#               (Owner = that execution's claim token, handed to the remediator)
+#   REMEDIATED  written by the remediator after locking it
+# The validator claims each bucket before touching S3. A failed claim means the
+# event is a duplicate of one already in flight, or the CloudTrail echo of our own
+# PutBucketPublicAccessBlock, and is dropped without any S3 call.
+# A claim never replaces a live record: a real change right after a fix is
+# validated without one, so the REMEDIATED record keeps suppressing the echo.
+
+logger = logging.getLogger()
+
+STATE_TABLE_NAME = "CloudAuditZeroState"
+GUARD_PK = "GUARD"
+VALIDATING = "VALIDATING"
+REMEDIATED = "REMEDIATED"
+# Covers validation + the Map remediation of one execution; a crashed run frees the bucket after this
+IN_FLIGHT_TTL = int(os.environ.get('GUARD_IN_FLIGHT_SECONDS', '300'))
+# CloudTrail -> EventBridge delivery usually takes minutes, plus the pipe's batching window
+SUPPRESS_TTL = int(os.environ.get('GUARD_SUPPRESS_SECONDS', '900'))
+
+LOCKED_FLAGS = ('BlockPublicAcls', 'IgnorePublicAcls', 'BlockPublicPolicy', 'RestrictPublicBuckets')
+
+def guard_key(bucket_name):
+    return {'PK': GUARD_PK, 'SK': f"s3/{bucket_name}"}
+
+def is_lock_event(event):
+    """
+    True for the event our own fix produces: PutBucketPublicAccessBlock with every flag on.
+    Such a call cannot expose a bucket; any other change must always be validated.
+    """
+    detail = event.get('detail') or {}
+    if detail.get('eventName') != 'PutBucketPublicAccessBlock':
+        return False
+    conf = (detail.get('requestParameters') or {}).get('PublicAccessBlockConfiguration') or {}
+    return all(str(conf.get(flag)).lower() == 'true' for flag in LOCKED_FLAGS)
+
+def claim(table, bucket_name, owner, lock_only=False):
+    """
+    Takes ownership of `bucket_name` for the execution identified by `owner`.
+    Returns None when the bucket must be validated, otherwise why the event can be
+    dropped ('in_flight' or 'self_event'). Only a missing or expired record is
+    replaced. `lock_only`: every event for the bucket is a lock event, so a recent
+    REMEDIATED record suppresses it; other events are validated unclaimed.
+    """
+    now = int(time.time())
+    try:
+        table.put_item(
+            Item={**guard_key(bucket_name), 'State': VALIDATING, 'Owner': owner, 'ExpiresAt': now + IN_FLIGHT_TTL},
+            ConditionExpression="attribute_not_exists(SK) OR ExpiresAt < :now",
+            ExpressionAttributeValues={':now': now},
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return None
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        held = (e.response.get('Item') or {}).get('State')
+        held = held.get('S') if isinstance(held, dict) else held  # Error payloads are not deserialized
+        if held != REMEDIATED:
+            return 'in_flight'
+        # Real changes right after a fix are still validated
+        return 'self_event' if lock_only else None
+
+def release(table, bucket_name, owner):
+    """
+    Frees a claim once the bucket needs no remediation (or remediation failed).
+    Only `owner`'s in-progress claim is deleted; a REMEDIATED record or another
+    execution's claim is left alone.
+    """
+    try:
+        table.delete_item(
+            Key=guard_key(bucket_name),
+            ConditionExpression="#state = :validating AND #owner = :owner",
+            ExpressionAttributeNames={'#state': 'State', '#owner': 'Owner'},
+            ExpressionAttributeValues={':validating': VALIDATING, ':owner': owner}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            logger.info(f"Guard for {bucket_name} not held by {owner}: kept")
+        else:
+            logger.error(f"Guard release failed for {bucket_name}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Guard release failed for {bucket_name}: {str(e)}")
+
+def mark_remediated(table, bucket_names):
+    """Records fresh fixes so their CloudTrail echoes are suppressed for SUPPRESS_TTL."""
+    expires_at = int(time.time()) + SUPPRESS_TTL
+    try:
+        with table.batch_writer() as batch:
+            for name in bucket_names:
+                batch.put_item(Item={**guard_key(name), 'State': REMEDIATED, 'ExpiresAt': expires_at})
+    except Exception as e:
+        logger.error(f"Guard update failed: {str(e)}")
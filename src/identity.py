@@ -0,0 +1,139 @@
+import io
+import os
+import csv
+import time
+import codecs
+import logging
+import threading
+from datetime import datetime, timezone
+from findings import finding
+
+# Pillar 3 (Identity) from the IAM credential report: one CSV row per IAM user plus
+# <root_account>, with password, MFA and access key usage. Every user is evaluated
+# in one pass over the report, so auditing costs the same few calls at any user count:
+#   cached report still fresh    0 calls (per container and account)
+#   report on AWS still fresh    GetCredentialReport
+#   missing or stale             GenerateCredentialReport (polled until COMPLETE) + GetCredentialReport
+# The CSV is decoded and parsed row by row; only the findings are kept.
+
+logger = logging.getLogger()
+
+ROOT_USER = '<root_account>'
+# AWS regenerates a report at most every 4 hours; older ones are regenerated
+REPORT_MAX_AGE = int(os.environ.get('IAM_REPORT_MAX_AGE_SECONDS', str(4 * 3600)))
+REPORT_WAIT_SECONDS = int(os.environ.get('IAM_REPORT_WAIT_SECONDS', '20'))
+POLL_INTERVAL = 1.0
+STALE_KEY_DAYS = int(os.environ.get('IAM_STALE_KEY_DAYS', '90'))              # Active key unused this long
+UNUSED_PASSWORD_DAYS = int(os.environ.get('IAM_UNUSED_PASSWORD_DAYS', '90'))  # Console password unused this long
+
+_cache = {}  # account id -> (report GeneratedTime, evaluation)
+_cache_lock = threading.Lock()
+
+class ReportUnavailable(Exception):
+    pass
+
+def _error_code(e):
+    return getattr(e, 'response', {}).get('Error', {}).get('Code', '')
+
+def _age(generated_at):
+    return (datetime.now(timezone.utc) - generated_at).total_seconds()
+
+def fetch_report(iam):
+    """The account's credential report ({'Content', 'GeneratedTime'}), regenerated when missing or stale."""
+    try:
+        report = iam.get_credential_report()
+        if _age(report['GeneratedTime']) <= REPORT_MAX_AGE:
+            return report
+    except Exception as e:
+        if _error_code(e) not in ('ReportNotPresent', 'ReportExpired', 'ReportInProgress'):
+            raise
+
+    deadline = time.time() + REPORT_WAIT_SECONDS
+    while iam.generate_credential_report()['State'] != 'COMPLETE':
+        if time.time() + POLL_INTERVAL > deadline:
+            raise ReportUnavailable(f"credential report not ready after {REPORT_WAIT_SECONDS}s")
+        time.sleep(POLL_INTERVAL)
+    return iam.get_credential_report()
+
+def _timestamp(value):
+    """Report dates are ISO 8601; 'N/A', 'no_information' and 'not_supported' mean none."""
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+def _days_since(*values, now):
+    """Days since the first of `values` that is a date (e.g. last used, else created)."""
+    for value in values:
+        ts = _timestamp(value)
+        if ts is not None:
+            return (now - ts).days
+    return None
+
+def evaluate(content, now=None):
+    """One pass over the report CSV (bytes). Returns the pillar result, findings included."""
+    now = now or datetime.now(timezone.utc)
+    result = {'users': 0, 'root_mfa_secure': False, 'root_access_keys': False,
+              'users_without_mfa': [], 'stale_keys': [], 'unused_passwords': [], 'findings': []}
+    rows = csv.DictReader(codecs.iterdecode(io.BytesIO(content), 'utf-8'))
+    for row in rows:
+        user = row['user']
+        keys = [n for n in (1, 2) if row.get(f'access_key_{n}_active') == 'true']
+
+        if user == ROOT_USER:
+            result['root_mfa_secure'] = row.get('mfa_active') == 'true'
+            if not result['root_mfa_secure']:
+                result['findings'].append(finding('iam', 'global', 'root', 'identity', 'ROOT_MFA_MISSING', 'CRITICAL', 'DETECTED'))
+            if keys:
+                result['root_access_keys'] = True
+                result['findings'].append(finding('iam', 'global', 'root', 'identity', 'ROOT_ACCESS_KEY', 'CRITICAL', 'DETECTED',
+                                                  ','.join(f"key{n}" for n in keys)))
+            continue
+
+        result['users'] += 1
+        if row.get('password_enabled') == 'true':
+            if row.get('mfa_active') != 'true':
+                result['users_without_mfa'].append(user)
+                result['findings'].append(finding('iam', 'global', user, 'identity', 'USER_MFA_MISSING', 'WARNING', 'DETECTED'))
+            days = _days_since(row.get('password_last_used'), row.get('password_last_changed'), row.get('user_creation_time'), now=now)
+            if days is not None and days > UNUSED_PASSWORD_DAYS:
+                used = _timestamp(row.get('password_last_used')) is not None
+                result['unused_passwords'].append(user)
+                result['findings'].append(finding('iam', 'global', user, 'identity', 'UNUSED_PASSWORD', 'WARNING', 'DETECTED',
+                                                  f"{days}d since {'last use' if used else 'set, never used'}"))
+        for n in keys:
+            days = _days_since(row.get(f'access_key_{n}_last_used_date'), row.get(f'access_key_{n}_last_rotated'), now=now)
+            if days is not None and days > STALE_KEY_DAYS:
+                used = _timestamp(row.get(f'access_key_{n}_last_used_date')) is not None
+                # One resource per key: a user's two keys must not share a findings item key
+                result['stale_keys'].append(f"{user}/key{n}")
+                result['findings'].append(finding('iam', 'global', f"{user}/key{n}", 'identity', 'STALE_ACCESS_KEY', 'WARNING', 'DETECTED',
+                                                  f"{days}d since {'last use' if used else 'created, never used'}"))
+    return result
+
+def audit(iam, account_id):
+    """
+    Pillar 3 for one account. Falls back to GetAccountSummary (root MFA only) when no
+    report can be had in time; `error` then says why and the per-user checks are skipped.
+    """
+    with _cache_lock:
+        cached = _cache.get(account_id)
+    if cached and _age(cached[0]) <= REPORT_MAX_AGE:
+        return {**cached[1], 'cached': True}
+
+    try:
+        report = fetch_report(iam)
+        result = evaluate(report['Content'])
+        result['report_generated_at'] = report['GeneratedTime'].isoformat()
+        with _cache_lock:
+            _cache[account_id] = (report['GeneratedTime'], result)
+        return {**result, 'cached': False}
+    except Exception as e:
+        logger.error(f"Credential report unavailable for {account_id}: {str(e)}")
+        summary = iam.get_account_summary()
+        secure = summary.get('SummaryMap', {}).get('AccountMFAEnabled', 0) == 1
+        findings = [finding('iam', 'global', 'credential-report', 'identity', 'NOT_EVALUATED', 'ERROR', 'NONE', str(e))]
+        if not secure:
+            findings.append(finding('iam', 'global', 'root', 'identity', 'ROOT_MFA_MISSING', 'CRITICAL', 'DETECTED'))
+        return {'users': None, 'root_mfa_secure': secure, 'root_access_keys': False, 'users_without_mfa': [],
+                'stale_keys': [], 'unused_passwords': [], 'findings': findings, 'error': str(e), 'cached': False}
@@ -0,0 +1,114 @@
+import os
+import time
+import logging
+from botocore.exceptions import ClientError
+from boto3.dynamodb.types import TypeDeserializer
+
+# Single-flight leases for scan/remediation requests, in CloudAuditZeroState
+# (PK = LEASE_PK, SK = lease name), expiring via the table's ExpiresAt TTL:
+#   RUNNING  held by the invocation doing the work (Owner), for at most LEASE_TTL
+#   DONE     finished: LogId/Timestamp point at its log entry for RESULT_TTL
+# Scans lease "<account>/<request>", so only identical scans collide: the later one
+# waits and returns the running scan's entry instead of repeating its API calls.
+# Remediations share "<account>/remediate": an identical one attaches the same way,
+# a different one waits for the lease and then runs, so fixes never interleave.
+# A holder that crashes frees its lease when ExpiresAt passes.
+
+logger = logging.getLogger()
+
+STATE_TABLE_NAME = "CloudAuditZeroState"
+LEASE_PK = "LEASE"
+RUNNING = "RUNNING"
+DONE = "DONE"
+# Longer than the remediator's 120 s timeout: a live holder never loses its lease
+LEASE_TTL = int(os.environ.get('LEASE_SECONDS', '180'))
+# How long waiters can still pick up a finished result; later requests run afresh
+RESULT_TTL = int(os.environ.get('LEASE_RESULT_SECONDS', '60'))
+# Longest a request waits for another one before giving up (409)
+WAIT_SECONDS = int(os.environ.get('LEASE_WAIT_SECONDS', '60'))
+POLL_INTERVAL = 1.0
+
+_deserializer = TypeDeserializer()
+
+class Busy(Exception):
+    """The lease stayed held by another request for longer than the caller could wait."""
+    def __init__(self, holder):
+        self.holder = holder or {}
+        mode = str(self.holder.get('Request') or 'A request').split('|')[0]
+        super().__init__(f"{mode} is already running for this account; try again shortly")
+
+def request_key(mode, scope, incremental=False, full_pass=False):
+    """What makes two requests identical: same mode, region scope and scan flavour."""
+    flavour = 'incremental' if incremental else 'full_pass' if full_pass else 'full'
+    return f"{mode}|{scope or 'home'}|{flavour}"
+
+def lease_name(account_id, mode, request):
+    return f"{account_id}/remediate" if mode != 'scan' else f"{account_id}/{request}"
+
+def lease_key(name):
+    return {'PK': LEASE_PK, 'SK': name}
+
+def _plain(item):
+    """ALL_OLD payloads of failed conditions come back in wire format ({"S": ...})."""
+    return {
+        k: _deserializer.deserialize(v) if isinstance(v, dict) and len(v) == 1 and next(iter(v)) in ('S', 'N', 'M', 'L', 'BOOL') else v
+        for k, v in (item or {}).items()
+    }
+
+def acquire(table, name, owner, request):
+    """
+    Takes the lease for `owner`. Returns None when taken, otherwise the current
+    holder's item (Owner, Request, State, ...).
+    """
+    now = int(time.time())
+    try:
+        table.put_item(
+            Item={**lease_key(name), 'State': RUNNING, 'Owner': owner, 'Request': request,
+                  'StartedAt': now, 'ExpiresAt': now + LEASE_TTL},
+            ConditionExpression="attribute_not_exists(SK) OR ExpiresAt < :now OR #state = :done",
+            ExpressionAttributeNames={'#state': 'State'},
+            ExpressionAttributeValues={':now': now, ':done': DONE},
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return None
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return _plain(e.response.get('Item'))
+
+def wait(table, name, owner, deadline):
+    """
+    Polls until `owner` no longer holds the lease. Returns the lease item at that
+    point (DONE with its result, someone else's, or None when it was released or
+    expired). Raises Busy once `deadline` (epoch seconds) passes.
+    """
+    while True:
+        item = table.get_item(Key=lease_key(name), ConsistentRead=True).get('Item')
+        if (not item or item.get('Owner') != owner or item.get('State') == DONE
+                or int(item.get('ExpiresAt', 0)) < time.time()):
+            return item
+        if time.time() + POLL_INTERVAL > deadline:
+            raise Busy(item)
+        time.sleep(POLL_INTERVAL)
+
+def finish(table, name, owner, log_id, timestamp):
+    """Marks the lease DONE with a pointer to its log entry, for requests waiting on it."""
+    try:
+        table.update_item(
+            Key=lease_key(name),
+            UpdateExpression="SET #state = :done, LogId = :log_id, #ts = :ts, ExpiresAt = :expires",
+            ConditionExpression="#owner = :owner",  # OWNER is a reserved word
+            ExpressionAttributeNames={'#state': 'State', '#ts': 'Timestamp', '#owner': 'Owner'},
+            ExpressionAttributeValues={':done': DONE, ':log_id': log_id, ':ts': timestamp,
+                                       ':expires': int(time.time()) + RESULT_TTL, ':owner': owner}
+        )
+    except Exception as e:
+        logger.error(f"Lease finish failed for {name}: {str(e)}")
+
+def release(table, name, owner):
+    """Drops the lease without a result (the run failed): a waiter takes over."""
+    try:
+        table.delete_item(Key=lease_key(name), ConditionExpression="#owner = :owner",
+                          ExpressionAttributeNames={'#owner': 'Owner'}, ExpressionAttributeValues={':owner': owner})
+    except Exception as e:
+        logger.error(f"Lease release failed for {name}: {str(e)}")
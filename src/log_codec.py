@@ -0,0 +1,83 @@
+import os
+import json
+import zlib
+import logging
+from decimal import Decimal
+import aws_clients
+
+# Storage format for CloudAuditZeroLogs entries.
+# Small entries are stored as-is. When Meta grows past INLINE_META_BYTES, its
+# per-resource lists are moved into one zlib-compressed binary attribute (Payload)
+# and Meta keeps only their sizes under Meta.packed. If the item would still be near
+# DynamoDB's 400 KB limit, the compressed payload goes to S3 and the item keeps
+# PayloadRef = {"Bucket", "Key"} instead.
+# Readers: `summary` never touches the payload (list views, live stream);
+# `expand` restores the original Meta for a single entry.
+
+logger = logging.getLogger()
+
+PACKED_FIELDS = ('open_buckets', 'open_sgs', 'regions')  # Grow with account size
+INLINE_META_BYTES = 8 * 1024
+MAX_ITEM_BYTES = 350 * 1024    # Under the 400 KB item limit, with room for attribute names
+PAYLOAD_BUCKET = os.environ.get('LOG_PAYLOAD_BUCKET', '')
+PAYLOAD_PREFIX = "logs/"
+PAYLOAD_ATTRIBUTES = ('Payload', 'PayloadRef')
+
+# DynamoDB numbers (Decimal) -> int/float; every handler's JSON responses use this one
+class DecimalEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return int(obj) if obj == obj.to_integral_value() else float(obj)
+        return super(DecimalEncoder, self).default(obj)
+
+def json_size(value):
+    return len(json.dumps(value, cls=DecimalEncoder, default=str))
+
+def encode(entry):
+    """Log entry -> item for put_item. Entries that already fit are returned unchanged."""
+    meta = entry.get('Meta') or {}
+    if json_size(meta) <= INLINE_META_BYTES:
+        return entry
+    packed = {f: meta[f] for f in PACKED_FIELDS if meta.get(f)}
+    if not packed:
+        return entry
+
+    slim = {k: v for k, v in meta.items() if k not in packed}
+    slim['packed'] = {f: len(v) for f, v in packed.items()}
+    blob = zlib.compress(json.dumps(packed, cls=DecimalEncoder).encode(), 6)
+    item = {**entry, 'Meta': slim}
+
+    if json_size(item) + len(blob) <= MAX_ITEM_BYTES:
+        item['Payload'] = blob
+        return item
+
+    # Still too large for one item: spill the payload, keep a pointer
+    if not PAYLOAD_BUCKET:
+        logger.error(f"Log {entry.get('LogId')}: {len(blob)} byte payload dropped (LOG_PAYLOAD_BUCKET not set)")
+        return item
+    key = f"{PAYLOAD_PREFIX}{entry.get('LogId')}.json.z"
+    try:
+        aws_clients.get_client('s3').put_object(
+            Bucket=PAYLOAD_BUCKET, Key=key, Body=blob, ContentType='application/octet-stream'
+        )
+        item['PayloadRef'] = {'Bucket': PAYLOAD_BUCKET, 'Key': key}
+    except Exception as e:
+        # The entry itself matters more than the detail lists: store it without them
+        logger.error(f"Log {entry.get('LogId')}: payload overflow write failed: {str(e)}")
+    return item
+
+def summary(item):
+    """Item -> entry without its packed payload (sizes stay available in Meta.packed)."""
+    return {k: v for k, v in item.items() if k not in PAYLOAD_ATTRIBUTES}
+
+def expand(item):
+    """Item -> full entry, decompressing the inline payload or fetching the overflow object."""
+    blob, ref = item.get('Payload'), item.get('PayloadRef')
+    if blob is None and ref is None:
+        return summary(item)
+    if blob is None:
+        blob = aws_clients.get_client('s3').get_object(Bucket=ref['Bucket'], Key=ref['Key'])['Body'].read()
+
+    meta = {k: v for k, v in (item.get('Meta') or {}).items() if k != 'packed'}
+    meta.update(json.loads(zlib.decompress(bytes(blob))))  # boto3 returns Binary; bytes() unwraps it
+    return {**summary(item), 'Meta': meta}
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+import aws_clients
+import log_codec
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Live log stream: one Lambda behind the WebSocket API ($connect, $disconnect,
+# resume) that is also subscribed to the DynamoDB Streams of both log tables.
+# New entries are pushed to every open connection as deltas, so dashboards stop polling.
+
+LOG_TABLE_NAME = "CloudAuditZeroLogs"
+STATE_TABLE_NAME = "CloudAuditZeroState"   # Open connections live here (PK = CONNECTIONS_PK)
+WORKFLOW_TABLE_NAME = "cloud-audit-zero-logs"  # Written by the Step Functions LogRemediation state
+INDEX_NAME = "FeedTimestampIndex"
+LOG_FEED = "AUDIT"
+WORKFLOW_FEED = "WORKFLOW"
+
+CONNECTIONS_PK = "CONNECTIONS"
+CONNECTION_TTL = 2 * 3600 + 300    # API Gateway closes WebSocket connections after 2 hours
+RESUME_PAGE = 100
+RESUME_MAX = 500                   # Beyond this a reconnecting client is told to reload instead
+MAX_MESSAGE_BYTES = 96 * 1024      # API Gateway WebSocket messages are capped at 128 KB
+FANOUT_CONCURRENCY = max(1, int(os.environ.get('FANOUT_CONCURRENCY', '16')))
+# https://{api-id}.execute-api.{region}.amazonaws.com/{stage}, used when invoked by a stream
+STREAM_ENDPOINT = os.environ.get('STREAM_ENDPOINT', '')
+
+deserializer = TypeDeserializer()
+
+def table(name):
+    return aws_clients.get_resource('dynamodb').Table(name)
+
+def management_client(endpoint):
+    return aws_clients.get_client('apigatewaymanagementapi', endpoint_url=endpoint)
+
+# ====================================================
+# ENTRIES: Stream records -> dashboard log entries
+# ====================================================
+def workflow_entry(item):
+    """Step Functions audit rows (RequestId/BucketName/Action) in the CloudAuditZeroLogs shape."""
+    return {
+        'LogId': item.get('RequestId'),
+        'Timestamp': item.get('Timestamp'),
+        'Feed': WORKFLOW_FEED,
+        'Event': 'Remediation',
+        'Status': 'SUCCESS' if str(item.get('Status', '')).upper() == 'SUCCESS' else 'ERROR',
+        'Details': f"[WORKFLOW] {item.get('Action', 'Remediation')}: {item.get('BucketName', 'unknown')}.",
+        'Type': 'REMEDIATION',
+        'Product': 'Cloud Audit Zero',
+        'Meta': {'mode': 'workflow', 'bucket': item.get('BucketName')}
+    }
+
+def entries_from_records(records):
+    entries = []
+    for record in records:
+        if record.get('eventName') != 'INSERT':
+            continue
+        image = record.get('dynamodb', {}).get('NewImage')
+        if not image:
+            continue
+        item = {k: deserializer.deserialize(v) for k, v in image.items()}
+        if f"table/{WORKFLOW_TABLE_NAME}/" in record.get('eventSourceARN', ''):
+            entries.append(workflow_entry(item))
+        elif item.get('Feed') == LOG_FEED:
+            entries.append(log_codec.summary(item))  # Packed payloads stay behind GET /logs?id=
+    return sorted(entries, key=lambda e: e.get('Timestamp') or '')
+
+def delta_messages(entries):
+    """
+    Splits entries into delta payloads under MAX_MESSAGE_BYTES. `cursor` is the newest
+    AUDIT Timestamp delivered so far; clients send it back on `resume` after reconnecting.
+    """
+    messages, batch, size, cursor = [], [], 0, None
+    for entry in entries:
+        raw = json.dumps(entry, cls=log_codec.DecimalEncoder)
+        if batch and size + len(raw) > MAX_MESSAGE_BYTES:
+            messages.append({'type': 'delta', 'data': batch, 'cursor': cursor})
+            batch, size = [], 0
+        batch.append(entry)
+        size += len(raw)
+        if entry.get('Feed') == LOG_FEED:
+            cursor = entry['Timestamp']
+    if batch:
+        messages.append({'type': 'delta', 'data': batch, 'cursor': cursor})
+    return [json.dumps(m, cls=log_codec.DecimalEncoder).encode() for m in messages]
+
+# ====================================================
+# CONNECTIONS
+# ====================================================
+def iter_connections(state):
+    kwargs = {'KeyConditionExpression': Key('PK').eq(CONNECTIONS_PK), 'ProjectionExpression': 'SK'}
+    while True:
+        page = state.query(**kwargs)
+        for item in page.get('Items', []):
+            yield item['SK']
+        if 'LastEvaluatedKey' not in page:
+            break
+        kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+def send(client, state, connection_id, payloads):
+    """Posts payloads to one connection; stale (gone) connections are removed. Returns True if delivered."""
+    try:
+        for data in payloads:
+            client.post_to_connection(ConnectionId=connection_id, Data=data)
+        return True
+    except client.exceptions.GoneException:
+        state.delete_item(Key={'PK': CONNECTIONS_PK, 'SK': connection_id})
+    except Exception as e:
+        logger.error(f"Push to {connection_id} failed: {str(e)}")
+    return False
+
+def fan_out(records):
+    entries = entries_from_records(records)
+    if not entries:
+        return {'entries': 0, 'delivered': 0}
+    if not STREAM_ENDPOINT:
+        logger.error("STREAM_ENDPOINT not configured; dropping stream batch")
+        return {'entries': len(entries), 'delivered': 0}
+
+    payloads = delta_messages(entries)
+    state = table(STATE_TABLE_NAME)
+    client = management_client(STREAM_ENDPOINT)
+    with ThreadPoolExecutor(max_workers=FANOUT_CONCURRENCY) as executor:
+        delivered = sum(executor.map(lambda c: send(client, state, c, payloads), iter_connections(state)))
+    logger.info(f"Pushed {len(entries)} entries to {delivered} connections")
+    return {'entries': len(entries), 'delivered': delivered}
+
+# ====================================================
+# WEBSOCKET ROUTES
+# ====================================================
+def connect(connection_id):
+    now = int(time.time())
+    table(STATE_TABLE_NAME).put_item(Item={
+        'PK': CONNECTIONS_PK, 'SK': connection_id, 'ConnectedAt': now, 'ExpiresAt': now + CONNECTION_TTL
+    })
+
+def disconnect(connection_id):
+    table(STATE_TABLE_NAME).delete_item(Key={'PK': CONNECTIONS_PK, 'SK': connection_id})
+
+def entries_since(cursor):
+    """AUDIT entries newer than `cursor`, oldest first. Returns (entries, truncated)."""
+    kwargs = {
+        'IndexName': INDEX_NAME,
+        'KeyConditionExpression': Key('Feed').eq(LOG_FEED) & Key('Timestamp').gt(cursor),
+        'ScanIndexForward': True,
+        'Limit': RESUME_PAGE
+    }
+    entries = []
+    logs = table(LOG_TABLE_NAME)
+    while len(entries) < RESUME_MAX:
+        page = logs.query(**kwargs)
+        entries.extend(log_codec.summary(item) for item in page.get('Items', []))
+        if 'LastEvaluatedKey' not in page:
+            return entries, False
+        kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+    return entries, True
+
+def resume(connection_id, endpoint, cursor):
+    """Replays what a reconnecting client missed since `cursor` (an AUDIT Timestamp)."""
+    client = management_client(endpoint)
+    state = table(STATE_TABLE_NAME)
+    if not cursor:
+        return send(client, state, connection_id, [json.dumps({'type': 'ready', 'cursor': None}).encode()])
+
+    entries, truncated = entries_since(cursor)
+    if truncated:
+        # Too far behind: cheaper for the client to reload the first page over REST
+        return send(client, state, connection_id, [json.dumps({'type': 'reset'}).encode()])
+    payloads = delta_messages(entries) or [json.dumps({'type': 'ready', 'cursor': cursor}).encode()]
+    return send(client, state, connection_id, payloads)
+
+def lambda_handler(event, context):
+    # 1. DynamoDB Streams batch (either log table)
+    if 'Records' in event:
+        try:
+            return fan_out(event['Records'])
+        except Exception as e:
+            logger.error(f"Fan-out Error: {str(e)}")
+            raise  # Let the event source mapping retry the batch
+
+    # 2. WebSocket route
+    ctx = event.get('requestContext', {})
+    route, connection_id = ctx.get('routeKey'), ctx.get('connectionId')
+    try:
+        if route == '$connect':
+            connect(connection_id)
+        elif route == '$disconnect':
+            disconnect(connection_id)
+        elif route == 'resume':
+            body = json.loads(event.get('body') or '{}')
+            resume(connection_id, f"https://{ctx['domainName']}/{ctx['stage']}", body.get('cursor'))
+        else:
+            return {"statusCode": 400, "body": json.dumps({"success": False, "message": f"Unknown route {route}"})}
+        return {"statusCode": 200, "body": json.dumps({"success": True})}
+    except Exception as e:
+        logger.error(f"Stream Route Error ({route}): {str(e)}")
+        return {"statusCode": 500, "body": json.dumps({"success": False, "message": str(e)})}
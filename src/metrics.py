@@ -0,0 +1,141 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+import aws_clients
+
+# Per-invocation instrumentation for the scanner: timing spans (pillars and
+# other stages), counters (resources evaluated, findings), plus the per-service
+# API counters and per-operation latency kept by aws_clients.
+# `emit` prints CloudWatch Embedded Metric Format documents: Lambda ships stdout
+# to CloudWatch Logs, which turns them into metrics without any PutMetricData call.
+# `timings` is the compact copy stored in the log entry (Meta.timings); it reads
+# a per-account Run and ApiStats, so accounts audited concurrently stay apart.
+
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'CloudAuditZero')
+# Each distinct stage/service/operation becomes a custom metric; "false" keeps only Meta.timings
+EMF_ENABLED = os.environ.get('EMF_ENABLED', 'true').lower() == 'true'
+SLOWEST_OPERATIONS = 5  # API operations kept in Meta.timings
+
+class Run:
+    """Stage spans and elapsed time of one scope: the invocation, or one account's run."""
+    def __init__(self):
+        self.spans = {}  # name -> [count, total_ms, max_ms]
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def reset(self):
+        with self.lock:
+            self.spans.clear()
+            self.started = time.perf_counter()
+
+    def add(self, name, elapsed):
+        with self.lock:
+            s = self.spans.setdefault(name, [0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += elapsed
+            s[2] = max(s[2], elapsed)
+
+    def snapshot(self):
+        with self.lock:
+            return {name: list(s) for name, s in self.spans.items()}, (time.perf_counter() - self.started) * 1000
+
+_invocation = Run()
+_counters = {}   # name -> value
+_lock = threading.Lock()
+
+def reset():
+    _invocation.reset()
+    with _lock:
+        _counters.clear()
+
+@contextmanager
+def span(name, run=None):
+    """
+    Times a block into the invocation totals and, when given, an account's Run.
+    Spans with the same name (e.g. one per region) are aggregated.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = (time.perf_counter() - started) * 1000
+        _invocation.add(name, elapsed)
+        if run is not None:
+            run.add(name, elapsed)
+
+def count(name, value=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+def timings(run=None, api=None):
+    """
+    Compact summary for Meta.timings: milliseconds per stage plus the slowest API
+    operations, for `run` and `api` (an aws_clients.ApiStats) or the whole invocation.
+    """
+    spans, total = (run or _invocation).snapshot()
+    spans = {name: round(s[1]) for name, s in spans.items()}
+    total = round(total)
+    ops = sorted((api.operation_timings() if api else aws_clients.api_timings()).items(),
+                 key=lambda kv: kv[1][1], reverse=True)
+    return {
+        'total_ms': total,
+        'stages_ms': spans,
+        # "service.Operation": [calls, total_ms, max_ms]
+        'slowest_api': {op: [t[0], round(t[1]), round(t[2])] for op, t in ops[:SLOWEST_OPERATIONS]}
+    }
+
+def _document(dimensions, metrics, timestamp):
+    """One EMF document: `metrics` is {name: (value, unit)} for a single dimension set."""
+    return {
+        '_aws': {
+            'Timestamp': timestamp,
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in metrics.items()]
+            }]
+        },
+        **dimensions,
+        **{name: value for name, (value, _) in metrics.items()}
+    }
+
+def documents(mode):
+    """EMF documents for everything recorded since the last reset."""
+    now = int(time.time() * 1000)
+    stats = aws_clients.api_stats()
+    spans, total = _invocation.snapshot()
+    with _lock:
+        counters = dict(_counters)
+
+    docs = [_document({'Mode': mode}, {
+        'ScanDuration': (round(total, 1), 'Milliseconds'),
+        **{name: (value, 'Count') for name, value in counters.items()}
+    }, now)]
+    for name, (_, total_ms, max_ms) in spans.items():
+        docs.append(_document({'Stage': name}, {
+            'StageDuration': (round(total_ms, 1), 'Milliseconds'),
+            'StageMaxDuration': (round(max_ms, 1), 'Milliseconds')
+        }, now))
+    for service in sorted(set().union(*(c.keys() for c in stats.values()))):
+        docs.append(_document({'Service': service}, {
+            'ApiCalls': (stats['calls'].get(service, 0), 'Count'),
+            'ApiThrottles': (stats['throttles'].get(service, 0), 'Count'),
+            'ApiRetries': (stats['retries'].get(service, 0), 'Count'),
+            'ApiErrors': (stats['errors'].get(service, 0), 'Count')
+        }, now))
+    for op, (calls, total_ms, max_ms) in aws_clients.api_timings().items():
+        service, _, operation = op.partition('.')
+        docs.append(_document({'Service': service, 'Operation': operation}, {
+            'ApiLatency': (round(total_ms / calls, 1), 'Milliseconds'),
+            'ApiMaxLatency': (round(max_ms, 1), 'Milliseconds')
+        }, now))
+    return docs
+
+def emit(mode):
+    """Writes the EMF documents to stdout (one JSON line each, unprefixed, as EMF requires)."""
+    if not EMF_ENABLED:
+        return
+    for doc in documents(mode):
+        print(json.dumps(doc))
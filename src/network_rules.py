@@ -0,0 +1,108 @@
+import os
+import bisect
+import ipaddress
+from functools import lru_cache
+
+# Pillar 4 rule evaluation. Sensitive ports are merged into a sorted interval
+# index once per container, so checking a rule's port range is a binary search
+# (O(log P)) instead of a loop over every port, and CIDR classification is
+# memoised because the same few CIDRs repeat across thousands of rules.
+
+# Ports/ranges that must never be reachable from the internet (SENSITIVE_PORTS="22,3389,8000-8100")
+DEFAULT_SENSITIVE_PORTS = "22,3389,3306,5432,1433,1521,6379,11211,27017,9200,2375-2376,5601"
+# Public prefixes at least this wide count as "open" (e.g. a /8 is as bad as 0.0.0.0/0)
+PUBLIC_PREFIX_V4 = int(os.environ.get('PUBLIC_PREFIX_V4', '8'))
+PUBLIC_PREFIX_V6 = int(os.environ.get('PUBLIC_PREFIX_V6', '16'))
+
+PORT_PROTOCOLS = {'tcp', 'udp', '6', '17'}
+
+class PortIndex:
+    """Sorted, merged, non-overlapping port intervals with range-overlap queries."""
+    def __init__(self, spec):
+        intervals = []
+        for part in str(spec).split(','):
+            part = part.strip()
+            if not part:
+                continue
+            lo, _, hi = part.partition('-')
+            intervals.append((int(lo), int(hi or lo)))
+
+        merged = []
+        for lo, hi in sorted(intervals):
+            if merged and lo <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], hi)
+            else:
+                merged.append([lo, hi])
+        self.starts = [lo for lo, _ in merged]
+        self.ends = [hi for _, hi in merged]
+
+    def overlapping(self, lo, hi):
+        """Sensitive intervals intersecting [lo, hi], as "22" / "2375-2376" labels."""
+        labels = []
+        i = bisect.bisect_left(self.ends, lo)
+        while i < len(self.starts) and self.starts[i] <= hi:
+            s, e = self.starts[i], self.ends[i]
+            labels.append(str(s) if s == e else f"{s}-{e}")
+            i += 1
+        return labels
+
+    def all(self):
+        return self.overlapping(0, 65535)
+
+SENSITIVE_PORTS = PortIndex(os.environ.get('SENSITIVE_PORTS', DEFAULT_SENSITIVE_PORTS))
+# Changes whenever the rule set does, so cached SG verdicts are invalidated with it
+RULESET_ID = f"{','.join(SENSITIVE_PORTS.all())}|v4/{PUBLIC_PREFIX_V4}|v6/{PUBLIC_PREFIX_V6}"
+
+@lru_cache(maxsize=4096)
+def is_public_cidr(cidr):
+    """True for 0.0.0.0/0, ::/0 and wide public prefixes (see PUBLIC_PREFIX_V4/V6)."""
+    try:
+        net = ipaddress.ip_network(cidr, strict=False)
+    except ValueError:
+        return False
+    if net.prefixlen == 0:
+        return True
+    limit = PUBLIC_PREFIX_V4 if net.version == 4 else PUBLIC_PREFIX_V6
+    return net.prefixlen <= limit and net.is_global
+
+def exposed_ports(perm, index=SENSITIVE_PORTS):
+    """Sensitive port labels a single IpPermissions entry opens (ignoring its sources)."""
+    protocol = str(perm.get('IpProtocol'))
+    if protocol == '-1':
+        return index.all()
+    if protocol not in PORT_PROTOCOLS:
+        return []
+    from_port, to_port = perm.get('FromPort'), perm.get('ToPort')
+    if from_port is None or to_port is None:
+        return []
+    try:
+        from_port, to_port = int(from_port), int(to_port)
+    except ValueError:
+        return []
+    if from_port == -1:
+        from_port, to_port = 0, 65535
+    return index.overlapping(from_port, to_port)
+
+def find_exposures(sg, index=SENSITIVE_PORTS):
+    """
+    Returns (ports, offending_permissions) for one security group.
+    `offending_permissions` keep only the public CIDRs of each risky rule, so
+    they can be passed to a single revoke_security_group_ingress call without
+    touching the rule's private sources.
+    """
+    ports = set()
+    offending = []
+    for perm in sg.get('IpPermissions', []):
+        labels = exposed_ports(perm, index)
+        if not labels:
+            continue
+        v4 = [{'CidrIp': r['CidrIp']} for r in perm.get('IpRanges', []) if is_public_cidr(r.get('CidrIp', ''))]
+        v6 = [{'CidrIpv6': r['CidrIpv6']} for r in perm.get('Ipv6Ranges', []) if is_public_cidr(r.get('CidrIpv6', ''))]
+        if not v4 and not v6:
+            continue
+        ports.update(labels)
+        trimmed = {'IpProtocol': perm['IpProtocol'], 'IpRanges': v4, 'Ipv6Ranges': v6}
+        if 'FromPort' in perm: trimmed['FromPort'] = perm['FromPort']
+        if 'ToPort' in perm: trimmed['ToPort'] = perm['ToPort']
+        offending.append(trimmed)
+    return sorted(ports, key=lambda p: int(p.split('-')[0])), offending
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import zlib
+import logging
+
+# Remediation plan, written by every scan: one item per account in CloudAuditZeroState
+# (PK = PLAN_PK, SK = account id), expiring via the table's ExpiresAt TTL.
+#   Data  zlib-compressed JSON {"actions": [...], "posture": {...}}:
+#         actions = fixes the scan found, e.g. {"fix": "revoke_ingress", "region": "eu-west-1", "resource": "sg-1"}
+#         posture = the scan's finding lists, so an applied plan can report on the
+#                   pillars it does not touch without listing them again
+# A remediate_* request with a plan younger than PLAN_MAX_AGE applies it instead of
+# re-enumerating the account; each target is re-read right before it is fixed, so
+# changes made since the scan are still caught. No plan (or a stale one) = full pass.
+
+logger = logging.getLogger()
+
+STATE_TABLE_NAME = "CloudAuditZeroState"
+PLAN_PK = "PLAN"
+PLAN_MAX_AGE = int(os.environ.get('PLAN_MAX_AGE_SECONDS', '900'))
+MAX_DATA_BYTES = 350 * 1024  # Single item: bigger plans are skipped and remediation does a full pass
+
+ENCRYPT_BUCKET = 'encrypt_bucket'
+BLOCK_PUBLIC_ACCESS = 'block_public_access'
+REVOKE_INGRESS = 'revoke_ingress'
+
+# Which planned fixes each remediation mode applies
+FIXES_BY_MODE = {
+    'remediate_all': (ENCRYPT_BUCKET, BLOCK_PUBLIC_ACCESS, REVOKE_INGRESS),
+    'remediate_encryption': (ENCRYPT_BUCKET,),
+    'remediate_storage': (BLOCK_PUBLIC_ACCESS,),
+    'remediate_network': (REVOKE_INGRESS,)
+}
+
+def scope_key(region_scope):
+    """Region scope as stored with the plan; a plan only serves requests with the same scope."""
+    if isinstance(region_scope, list):
+        return ','.join(region_scope)
+    return region_scope or ''
+
+def actions_from_findings(findings):
+    """Planned fixes from a scan's structured findings (see findings.finding)."""
+    actions = []
+    for f in findings:
+        if f['action'] != 'DETECTED':
+            continue
+        if f['service'] == 's3' and f['finding'] == 'UNENCRYPTED':
+            actions.append({'fix': ENCRYPT_BUCKET, 'region': 'global', 'resource': f['resource']})
+        elif f['service'] == 's3' and f['finding'] == 'PUBLIC_ACCESS':
+            actions.append({'fix': BLOCK_PUBLIC_ACCESS, 'region': 'global', 'resource': f['resource']})
+        elif f['service'] == 'ec2' and f['finding'] == 'OPEN_PORTS':
+            actions.append({'fix': REVOKE_INGRESS, 'region': f['region'], 'resource': f['resource']})
+    return actions
+
+class Plan:
+    def __init__(self, account_id, scan_id, created_at, region_scope, actions, posture):
+        self.account_id = account_id
+        self.scan_id = scan_id
+        self.created_at = created_at
+        self.region_scope = region_scope
+        self.actions = actions
+        self.posture = posture
+
+    def age(self):
+        return int(time.time()) - self.created_at
+
+    def actions_for(self, mode):
+        fixes = FIXES_BY_MODE.get(mode, ())
+        return [a for a in self.actions if a['fix'] in fixes]
+
+    def save(self, table):
+        """Stores the plan (replacing the account's previous one). Returns False when it is too large."""
+        raw = zlib.compress(json.dumps({'actions': self.actions, 'posture': self.posture}, separators=(',', ':')).encode())
+        if len(raw) > MAX_DATA_BYTES:
+            logger.warning(f"Remediation plan for {self.account_id} is {len(raw)} bytes; not stored")
+            self.discard(table)
+            return False
+        table.put_item(Item={
+            'PK': PLAN_PK, 'SK': self.account_id, 'ScanId': self.scan_id, 'CreatedAt': self.created_at,
+            'RegionScope': self.region_scope, 'Actions': len(self.actions), 'Data': raw,
+            'ExpiresAt': self.created_at + PLAN_MAX_AGE
+        })
+        return True
+
+    def discard(self, table):
+        discard(table, self.account_id)
+
+    @classmethod
+    def load_fresh(cls, table, account_id, region_scope):
+        """The account's plan if it is younger than PLAN_MAX_AGE and covers `region_scope`, else None."""
+        item = table.get_item(Key={'PK': PLAN_PK, 'SK': account_id}, ConsistentRead=True).get('Item')
+        if not item:
+            return None
+        created_at = int(item['CreatedAt'])
+        if time.time() - created_at > PLAN_MAX_AGE:  # TTL deletion can lag by hours
+            return None
+        if item.get('RegionScope', '') != scope_key(region_scope):
+            logger.info(f"Plan {item['ScanId']} covers regions '{item.get('RegionScope', '')}'; not reused")
+            return None
+        data = json.loads(zlib.decompress(bytes(item['Data'])))
+        return cls(account_id, item['ScanId'], created_at, item.get('RegionScope', ''), data['actions'], data['posture'])
+
+def discard(table, account_id):
+    """Drops the account's plan, e.g. after a full remediation pass changed what it describes."""
+    try:
+        table.delete_item(Key={'PK': PLAN_PK, 'SK': account_id})
+    except Exception as e:
+        logger.error(f"Plan discard failed for {account_id}: {str(e)}")
@@ -1,266 +1,1337 @@
+import os
 import json
-import boto3
 import logging
+import threading
+import time
 import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from botocore.config import Config
+from botocore.credentials import RefreshableCredentials
+import aws_clients
+from snapshot import Snapshot, fingerprint, STATE_TABLE_NAME
+from network_rules import find_exposures, RULESET_ID
+from findings import finding, write_findings, FINDINGS_TABLE_NAME
+from plan import (Plan, actions_from_findings, scope_key, discard as discard_plan, FIXES_BY_MODE,
+                  ENCRYPT_BUCKET, BLOCK_PUBLIC_ACCESS, REVOKE_INGRESS)
+import shards
+import log_codec
+import idempotency
+import identity
+import lease
+import metrics
 
 # Setup logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-s3 = boto3.client('s3')
-iam = boto3.client('iam')
-ec2 = boto3.client('ec2')
-rds = boto3.client('rds')
-dynamodb = boto3.client('dynamodb')
-dynamodb_res = boto3.resource('dynamodb')
+# Max parallel workers for per-resource describe calls (S3 buckets, DynamoDB tables)
+SCAN_CONCURRENCY = max(1, int(os.environ.get('SCAN_CONCURRENCY', '16')))
+
+# AWS clients are built on first use by aws_clients (rate limited + retried)
+# Connection pools match the worker pool so threads never wait on a socket
+pool_config = Config(max_pool_connections=SCAN_CONCURRENCY)
+
+# Region scope for RDS/DynamoDB/EC2: "" = this Lambda's region, "all" = every enabled region,
+# or a comma-separated list. Overridable per request via {"regions": ...}.
+SCAN_REGIONS = os.environ.get('SCAN_REGIONS', '')
+REGION_CONCURRENCY = max(1, int(os.environ.get('REGION_CONCURRENCY', '20')))
+HOME_REGION = aws_clients.home_region()
+
+# Multi-account fan-out: role ARNs to assume in each target account (comma-separated).
+# Overridable per request via {"accounts": [...]}. Empty = scan this account only.
+TARGET_ROLE_ARNS = os.environ.get('TARGET_ROLE_ARNS', '')
+ACCOUNT_CONCURRENCY = max(1, int(os.environ.get('ACCOUNT_CONCURRENCY', '8')))
+ASSUME_ROLE_DURATION = 3600
+
+# Incremental scans reuse the fingerprint snapshot, but a full re-evaluation
+# still runs once the last one is older than this.
+FULL_SCAN_INTERVAL = int(os.environ.get('FULL_SCAN_INTERVAL_HOURS', '24')) * 3600
+
+# Scans read policy status + ACL of buckets left unblocked, to tell actually public
+# ones (CRITICAL) from merely unblocked ones (WARNING). "false" = two fewer calls per such bucket.
+S3_EXPOSURE_CHECKS = os.environ.get('S3_EXPOSURE_CHECKS', 'true').lower() == 'true'
+PUBLIC_GRANTEES = ('http://acs.amazonaws.com/groups/global/AllUsers',
+                   'http://acs.amazonaws.com/groups/global/AuthenticatedUsers')
 
 TABLE_NAME = "CloudAuditZeroLogs"
+LOG_FEED = "AUDIT"  # Partition value of the FeedTimestampIndex read by get_logs
 
-def lambda_handler(event, context):
-    logger.info("v2.0 - Network Logic Upgrade Started") # FORCE UPDATE MARKER
-    logger.info(f"Received event: {json.dumps(event)}")
-    
-    headers = {
-        "Content-Type": "application/json",
-        "Access-Control-Allow-Origin": "*",
-        "Access-Control-Allow-Methods": "POST, OPTIONS",
-        "Access-Control-Allow-Headers": "Content-Type"
-    }
+# Materialized "current posture" per account (state table, read by get_status)
+POSTURE_PK = "POSTURE"
+POSTURE_FINDINGS_MAX = 10  # Sample of findings kept per category; counts are always exact
+
+# ====================================================
+# CLIENT POOLS: One per account, one client per (service, region)
+# ====================================================
+class ClientPool:
+    """
+    Lazily-built boto3 clients for one account, reused across warm invocations.
+    Client creation holds the session's lock (aws_clients.session_lock): boto3
+    sessions are not thread-safe, and the home pool shares the cached clients' session.
+    `stats` and `run` hold the API usage and stage spans of the account's current
+    run (Meta.api / Meta.timings), apart from accounts audited concurrently.
+    """
+    def __init__(self, session, account_id=None):
+        self.session = session
+        self.account_id = account_id
+        self.stats = aws_clients.ApiStats()
+        self.run = metrics.Run()
+        self._clients = {}
+
+    def begin_run(self):
+        self.stats.reset()
+        self.run.reset()
+
+    def client(self, service, region=None):
+        key = (service, region or HOME_REGION)
+        if key not in self._clients:
+            with aws_clients.session_lock(self.session):
+                if key not in self._clients:
+                    config = pool_config if service in ('s3', 'dynamodb') else None
+                    self._clients[key] = aws_clients.client(service, session=self.session, region=key[1], config=config,
+                                                             stats=self.stats)
+        return self._clients[key]
+
+# This account uses the container's shared session; clients appear as pillars need them
+home_pool = ClientPool(aws_clients.shared_session())
+
+# role_arn -> ClientPool backed by auto-refreshing STS credentials
+_account_pools = {}
+_account_lock = threading.Lock()
+
+def account_pool(role_arn):
+    """
+    Returns the cached client pool for a target account. Credentials come from
+    sts:AssumeRole and are refreshed by botocore before they expire, so the pool
+    (and its clients) survive across warm invocations.
+    """
+    pool = _account_pools.get(role_arn)
+    if pool is not None:
+        return pool
+
+    sts = home_pool.client('sts')
+
+    def refresh():
+        creds = sts.assume_role(
+            RoleArn=role_arn, RoleSessionName='CloudAuditZero', DurationSeconds=ASSUME_ROLE_DURATION
+        )['Credentials']
+        return {
+            'access_key': creds['AccessKeyId'],
+            'secret_key': creds['SecretAccessKey'],
+            'token': creds['SessionToken'],
+            'expiry_time': creds['Expiration'].isoformat()
+        }
+
+    # AssumeRole runs outside the lock so accounts are assumed in parallel
+    session = aws_clients.credentials_session(RefreshableCredentials.create_from_metadata(
+        metadata=refresh(), refresh_using=refresh, method='sts-assume-role'
+    ), HOME_REGION)
+    with _account_lock:
+        return _account_pools.setdefault(role_arn, ClientPool(session, account_id=role_arn.split(':')[4]))
+
+def table(name):
+    """DynamoDB table in this account (log + state tables), via the shared cached resource."""
+    return aws_clients.get_resource('dynamodb').Table(name)
+
+def resolve_regions(pool, scope):
+    """Turns a region scope ("", "all", "a,b" or a list) into a list of region names."""
+    if isinstance(scope, list):
+        return scope or [HOME_REGION]
+    if scope == 'all':
+        # DescribeRegions only returns regions enabled for this account by default
+        return sorted(r['RegionName'] for r in pool.client('ec2').describe_regions()['Regions'])
+    return [r.strip() for r in scope.split(',') if r.strip()] or [HOME_REGION]
+
+# ====================================================
+# INVENTORY: Paginated generators (one page in memory at a time)
+# ====================================================
+def iter_buckets(client):
+    # ListBuckets only gained pagination in newer botocore releases
+    if client.can_paginate('list_buckets'):
+        for page in client.get_paginator('list_buckets').paginate(PaginationConfig={'PageSize': 1000}):
+            yield from page.get('Buckets', [])
+    else:
+        yield from client.list_buckets().get('Buckets', [])
+
+def iter_db_instances(client):
+    for page in client.get_paginator('describe_db_instances').paginate():
+        yield from page.get('DBInstances', [])
+
+def iter_table_names(client):
+    for page in client.get_paginator('list_tables').paginate():
+        yield from page.get('TableNames', [])
 
+def iter_security_groups(client):
+    for page in client.get_paginator('describe_security_groups').paginate(PaginationConfig={'PageSize': 1000}):
+        yield from page.get('SecurityGroups', [])
+
+def bounded_map(fn, items, workers):
+    """
+    Ordered, streaming version of ThreadPoolExecutor.map: pulls from `items` lazily
+    and keeps at most 2x`workers` tasks in flight, so a generator is never drained up front.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def account_public_access_block(pool):
+    """
+    Tier 0 of Pillar 2: the account-level S3 Public Access Block (S3 Control), read
+    once per run. Returns its flags ({} when none is set), or None when unknown.
+    """
+    if not pool.account_id:
+        return None  # Local runs without a Lambda context: per-bucket checks only
     try:
-        # --- 1. PARSE INPUT & MODE ---
-        body = {}
-        if 'body' in event:
-            if isinstance(event['body'], str):
-                body = json.loads(event['body'])
+        conf = pool.client('s3control').get_public_access_block(AccountId=pool.account_id)['PublicAccessBlockConfiguration']
+        return {flag: bool(conf.get(flag)) for flag in idempotency.LOCKED_FLAGS}
+    except Exception as e:
+        if "NoSuchPublicAccessBlockConfiguration" in str(e):
+            return {}
+        logger.error(f"Account Public Access Block check failed: {str(e)}")
+        return None
+
+def fully_blocked(flags):
+    return bool(flags) and all(flags.get(flag) for flag in idempotency.LOCKED_FLAGS)
+
+def bucket_exposure(s3, b_name, effective):
+    """
+    Tier 2, for scans of buckets without an effective block: 'PUBLIC' when the
+    bucket policy or ACL grants public access right now, else 'UNBLOCKED'.
+    Flags that are on already neutralise the matching source, so it is not read.
+    """
+    try:
+        if not effective['RestrictPublicBuckets']:
+            try:
+                if s3.get_bucket_policy_status(Bucket=b_name)['PolicyStatus']['IsPublic']:
+                    return 'PUBLIC'
+            except Exception as e:
+                if "NoSuchBucketPolicy" not in str(e):
+                    raise
+        if not effective['IgnorePublicAcls']:
+            grants = s3.get_bucket_acl(Bucket=b_name).get('Grants', [])
+            if any(g.get('Grantee', {}).get('URI') in PUBLIC_GRANTEES for g in grants):
+                return 'PUBLIC'
+        return 'UNBLOCKED'
+    except Exception as e:
+        logger.error(f"Exposure check failed for {b_name}: {str(e)}")
+        return 'UNKNOWN'
+
+def evaluate_bucket(s3, b_name, mode, encryption=True, public_access=True, account_block=None):
+    """
+    Single-pass S3 evaluation: fetches a bucket's encryption (Pillar 1) and
+    public access (Pillar 2) state once and applies the fixes allowed by `mode`.
+    `encryption`/`public_access` = False skips that pillar (applied plans re-read only what they fix).
+    Pillar 2 is tiered: nothing is read when `account_block` (the account-level flags)
+    blocks everything; otherwise the bucket's own block is combined with it flag by
+    flag, and scans check what an unblocked bucket actually exposes (bucket_exposure).
+    Runs on a worker thread, so it only returns findings and never touches shared lists.
+    Throttling is retried by aws_clients; any error left over marks the bucket as
+    not evaluated (`error`, the failed pillars in `error_pillars`) instead of silently passing it.
+    """
+    res = {'name': b_name, 'unencrypted': False, 'encryption_fixed': False, 'public_risk': False,
+           'error': False, 'error_pillars': []}
+
+    # --- Pillar 1: Encryption ---
+    try:
+        if encryption:
+            s3.get_bucket_encryption(Bucket=b_name)
+    except Exception as e:
+        if "ServerSideEncryptionConfigurationNotFoundError" in str(e):
+            if mode in ['remediate_all', 'remediate_encryption']:
+                try:
+                    logger.warning(f"Enabling Encryption on {b_name}...")
+                    s3.put_bucket_encryption(
+                        Bucket=b_name,
+                        ServerSideEncryptionConfiguration={'Rules': [{'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}}]}
+                    )
+                    res['encryption_fixed'] = True
+                except Exception as fix_e:
+                    logger.error(f"Failed to encrypt bucket {b_name}: {str(fix_e)}")
+                    res['unencrypted'] = True
             else:
-                body = event['body']
-        
-        mode = body.get('action', 'scan') 
-        logger.info(f"Engine Mode: {mode.upper()}")
+                res['unencrypted'] = True
+        else:
+            logger.error(f"Encryption check failed for {b_name}: {str(e)}")
+            res['error'] = True
+            res['error_pillars'].append('encryption')
 
-        # ====================================================
-        # PILLAR 1: DATA ENCRYPTION (S3 + DATABASES)
-        # ====================================================
-        
-        buckets = s3.list_buckets().get('Buckets', [])
-        bucket_names = [b['Name'] for b in buckets]
-        bucket_count = len(buckets)
-        
-        unencrypted_buckets = []
-        fixed_buckets = []
-        
-        for b_name in bucket_names:
+    # --- Pillar 2: Public Access ---
+    is_public = False
+    account_block = account_block or {}
+    if public_access and not fully_blocked(account_block):
+        try:
             try:
-                s3.get_bucket_encryption(Bucket=b_name)
+                conf = s3.get_public_access_block(Bucket=b_name)['PublicAccessBlockConfiguration']
             except Exception as e:
-                if "ServerSideEncryptionConfigurationNotFoundError" in str(e):
-                    if mode in ['remediate_all', 'remediate_encryption']:
-                        logger.warning(f"Enabling Encryption on {b_name}...")
-                        s3.put_bucket_encryption(
-                            Bucket=b_name,
-                            ServerSideEncryptionConfiguration={'Rules': [{'ApplyServerSideEncryptionByDefault': {'SSEAlgorithm': 'AES256'}}]}
-                        )
-                        fixed_buckets.append(b_name)
-                    else:
-                        unencrypted_buckets.append(b_name)
-
-        # Database Checks (RDS/DynamoDB) - Scan Only
-        unencrypted_rds = []
+                if "NoSuchPublicAccessBlockConfiguration" not in str(e):
+                    raise
+                conf = {}
+            effective = {flag: bool(conf.get(flag)) or account_block.get(flag, False) for flag in idempotency.LOCKED_FLAGS}
+            is_public = not fully_blocked(effective)
+            if is_public and mode == 'scan' and S3_EXPOSURE_CHECKS:
+                res['exposure'] = bucket_exposure(s3, b_name, effective)
+        except Exception as e:
+            logger.error(f"Public access check failed for {b_name}: {str(e)}")
+            res['error'] = True
+            res['error_pillars'].append('storage')
+
+    if is_public:
+        if mode in ['remediate_all', 'remediate_storage']:
+            try:
+                s3.put_public_access_block(
+                    Bucket=b_name,
+                    PublicAccessBlockConfiguration={
+                        'BlockPublicAcls': True, 'IgnorePublicAcls': True,
+                        'BlockPublicPolicy': True, 'RestrictPublicBuckets': True
+                    }
+                )
+                res['public_risk'] = True
+            except Exception as e:
+                logger.error(f"Failed to lock bucket {b_name}: {str(e)}")
+                res['lock_failed'] = True
+        elif mode == 'scan':
+            res['public_risk'] = True
+
+    return res
+
+def bucket_findings(res, mode):
+    """Structured findings for one evaluate_bucket result."""
+    out = []
+    if res['unencrypted']:
+        action = 'FAILED' if mode in ['remediate_all', 'remediate_encryption'] else 'DETECTED'
+        out.append(finding('s3', 'global', res['name'], 'encryption', 'UNENCRYPTED', 'WARNING', action))
+    if res['encryption_fixed']:
+        out.append(finding('s3', 'global', res['name'], 'encryption', 'UNENCRYPTED', 'WARNING', 'REMEDIATED'))
+    if res['public_risk']:
+        # Unblocked but granting nothing public (see bucket_exposure) is a WARNING
+        severity = 'WARNING' if res.get('exposure') == 'UNBLOCKED' else 'CRITICAL'
+        out.append(finding('s3', 'global', res['name'], 'storage', 'PUBLIC_ACCESS', severity,
+                           'REMEDIATED' if 'remediate' in mode else 'DETECTED', res.get('exposure')))
+    for pillar in res['error_pillars']:  # One per pillar that could not be read
+        out.append(finding('s3', 'global', res['name'], pillar, 'NOT_EVALUATED', 'ERROR', 'NONE'))
+    return out
+
+def add_bucket_result(res, mode, unencrypted_buckets, fixed_buckets, public_risk_buckets, scan_errors, findings):
+    """Files one evaluate_bucket result under the run's lists and findings."""
+    if res['unencrypted']: unencrypted_buckets.append(res['name'])
+    if res['encryption_fixed']: fixed_buckets.append(res['name'])
+    if res['public_risk']: public_risk_buckets.append(res['name'])
+    if res.get('error'): scan_errors.append(res['name'])
+    findings.extend(bucket_findings(res, mode))
+
+def evaluate_table(dynamodb, t_name):
+    try:
+        desc = dynamodb.describe_table(TableName=t_name)['Table']
+    except Exception as e:
+        # One failing table must not abort the rest of the region's DynamoDB pillar
+        logger.error(f"DescribeTable failed for {t_name}: {str(e)}")
+        return {'name': t_name, 'unencrypted': False, 'error': True}
+    unencrypted = 'SSEDescription' in desc and desc['SSEDescription']['Status'] == 'DISABLED'
+    return {'name': t_name, 'unencrypted': unencrypted, 'error': False}
+
+def add_table_result(res, region, tag, unencrypted_dynamo, scan_errors, findings):
+    """Files one evaluate_table result under the run's lists and findings."""
+    if res['unencrypted']:
+        unencrypted_dynamo.append(res['name'] + tag)
+        findings.append(finding('dynamodb', region, res['name'], 'encryption', 'UNENCRYPTED', 'WARNING', 'DETECTED'))
+    if res.get('error'):
+        scan_errors.append(res['name'] + tag)
+        findings.append(finding('dynamodb', region, res['name'], 'encryption', 'NOT_EVALUATED', 'ERROR', 'NONE'))
+
+def evaluate_security_group(ec2, sg, mode):
+    """
+    Pillar 4 for one SG: flags rules exposing sensitive ports (SENSITIVE_PORTS) to
+    public CIDRs, or revokes all of them in one call when remediating.
+    """
+    identifier = f"{sg['GroupId']} ({sg.get('GroupName','?')})"
+    res = {'id': identifier, 'open': False, 'remediated': False, 'ports': []}
+
+    ports, offending = find_exposures(sg)
+    if not offending:
+        return res
+    res['ports'] = ports
+
+    if mode in ['remediate_all', 'remediate_network']:
         try:
-            dbs = rds.describe_db_instances()['DBInstances']
-            for db in dbs:
-                if not db['StorageEncrypted']:
-                    unencrypted_rds.append(db['DBInstanceIdentifier'])
+            logger.warning(f"REVOKING {len(offending)} public rule(s) on {identifier} (ports {', '.join(ports)})")
+            ec2.revoke_security_group_ingress(GroupId=sg['GroupId'], IpPermissions=offending)
+            res['remediated'] = True
         except Exception as e:
-            logger.error(f"RDS Scan Error: {str(e)}")
+            logger.error(f"Failed to revoke rules on {identifier}: {str(e)}")
+            res['open'] = True
+    else:
+        res['open'] = True
+    return res
 
-        unencrypted_dynamo = []
+# ====================================================
+# INCREMENTAL: Snapshot-aware result streams
+# ====================================================
+# With `snap` set, unchanged resources that were clean last time come from the
+# snapshot; only new, changed, flagged or event-targeted resources hit the
+# expensive describe calls. Without it every resource is evaluated.
+
+def iter_bucket_results(s3, mode, snap=None, targets=(), account_block=None):
+    # Account-level flags are part of every bucket's fingerprint: turning them off re-evaluates all
+    account_flags = sorted(flag for flag, on in (account_block or {}).items() if on)
+
+    def evaluate(bucket):
+        name = bucket['Name']
+        if snap is None:
+            return evaluate_bucket(s3, name, mode, account_block=account_block)
+        fp = fingerprint([name, bucket.get('CreationDate'), *account_flags])
+        cached = None if name in targets else snap.cached('s3', 'global', name, fp)
+        if cached is not None:
+            return cached
+        res = evaluate_bucket(s3, name, mode, account_block=account_block)
+        res['finding'] = res['unencrypted'] or res['public_risk'] or res['error']
+        snap.record('s3', 'global', name, fp, res)
+        return res
+    yield from bounded_map(evaluate, iter_buckets(s3), SCAN_CONCURRENCY)
+
+def iter_table_results(dynamodb, region, snap=None, targets=()):
+    def evaluate(t_name):
+        if snap is None:
+            return evaluate_table(dynamodb, t_name)
+        # ListTables only returns names, so a table is "unchanged" while it keeps its name
+        cached = None if t_name in targets else snap.cached('dynamodb', region, t_name, t_name)
+        if cached is not None:
+            return cached
+        res = evaluate_table(dynamodb, t_name)
+        res['finding'] = res['unencrypted'] or res['error']
+        snap.record('dynamodb', region, t_name, t_name, res)
+        return res
+    yield from bounded_map(evaluate, iter_table_names(dynamodb), SCAN_CONCURRENCY)
+
+def iter_security_group_results(ec2, region, mode, snap=None, targets=()):
+    for sg in iter_security_groups(ec2):
         try:
-            tables = dynamodb.list_tables()['TableNames']
-            for t_name in tables:
-                desc = dynamodb.describe_table(TableName=t_name)['Table']
-                if 'SSEDescription' in desc and desc['SSEDescription']['Status'] == 'DISABLED':
-                    unencrypted_dynamo.append(t_name)
+            if snap is None:
+                yield evaluate_security_group(ec2, sg, mode)
+                continue
+            # DescribeSecurityGroups already carries the rules: fingerprint them (plus the rule set) directly
+            fp = fingerprint([sg.get('IpPermissions', []), RULESET_ID])
+            cached = None if sg['GroupId'] in targets else snap.cached('ec2', region, sg['GroupId'], fp)
+            if cached is not None:
+                yield cached
+                continue
+            res = evaluate_security_group(ec2, sg, mode)
+            res['finding'] = res['open']
+            snap.record('ec2', region, sg['GroupId'], fp, res)
+            yield res
+        except Exception as inner_e:
+            logger.error(f"Error processing SG {sg.get('GroupId')}: {str(inner_e)}")
+
+def scan_region(pool, region, mode, tag='', snap=None, targets=None, tables=True):
+    """
+    Regional pillars (RDS + DynamoDB encryption, EC2 network) for one region.
+    `tag` is appended to resource identifiers so merged multi-region findings stay unambiguous.
+    `tables=False` leaves DynamoDB to the caller (sharded scans split it by table name).
+    """
+    clients = {svc: pool.client(svc, region) for svc in ('rds', 'dynamodb', 'ec2')}
+    targets = targets or {}
+
+    findings = []  # Structured copy of everything below, stored per resource (findings.py)
+
+    # Database Checks (RDS/DynamoDB) - Scan Only
+    unencrypted_rds = []
+    try:
+        with metrics.span('rds', pool.run):
+            for db in iter_db_instances(clients['rds']):
+                metrics.count('DbInstancesEvaluated')
+                if not db['StorageEncrypted']:
+                    unencrypted_rds.append(db['DBInstanceIdentifier'] + tag)
+                    findings.append(finding('rds', region, db['DBInstanceIdentifier'], 'encryption', 'UNENCRYPTED', 'CRITICAL', 'DETECTED'))
+    except Exception as e:
+        logger.error(f"RDS Scan Error ({region}): {str(e)}")
+
+    unencrypted_dynamo = []
+    scan_errors = []
+    listed = []  # Snapshot kinds listed in full here: only their deleted resources may be pruned
+    try:
+        with metrics.span('dynamodb', pool.run):
+            for res in iter_table_results(clients['dynamodb'], region, snap, targets.get('dynamodb', ())) if tables else ():
+                metrics.count('TablesEvaluated')
+                add_table_result(res, region, tag, unencrypted_dynamo, scan_errors, findings)
+        if tables:
+            listed.append('dynamodb')
+    except Exception as e:
+        logger.error(f"DynamoDB Scan Error ({region}): {str(e)}")
+
+    open_sgs = []
+    remediated_sgs = []
+    network_error = None
+
+    try:
+        with metrics.span('ec2', pool.run):
+            for res in iter_security_group_results(clients['ec2'], region, mode, snap, targets.get('ec2', ())):
+                metrics.count('SecurityGroupsEvaluated')
+                if res['open']: open_sgs.append(res['id'] + tag)
+                if res['remediated']: remediated_sgs.append(res['id'] + tag)
+                if res['open'] or res['remediated']:
+                    # In remediation modes an SG that is still open means the revoke failed
+                    action = 'REMEDIATED' if res['remediated'] else ('FAILED' if mode in ['remediate_all', 'remediate_network'] else 'DETECTED')
+                    findings.append(finding('ec2', region, res['id'].split(' ')[0], 'network', 'OPEN_PORTS', 'CRITICAL', action, ','.join(res.get('ports', []))))
+        listed.append('ec2')
+    except Exception as e:
+        logger.error(f"Network Scan Error ({region}): {str(e)}")
+        network_error = str(e)
+
+    return {
+        'unencrypted_rds': unencrypted_rds,
+        'unencrypted_dynamo': unencrypted_dynamo,
+        'open_sgs': open_sgs,
+        'remediated_sgs': remediated_sgs,
+        'scan_errors': scan_errors,
+        'findings': findings,
+        'network_error': network_error,
+        'listed': listed
+    }
+
+def event_targets(detail):
+    """
+    Resources named in a CloudTrail event (EventBridge `detail`) that must be re-checked.
+    Every bucket-level event of the incremental_scan rule (ACL, policy, Public Access Block,
+    encryption) names its bucket in `bucketName`: the S3 fingerprint does not see configuration.
+    """
+    params = detail.get('requestParameters') or {}
+    return {
+        's3': {params['bucketName']} if params.get('bucketName') else set(),
+        'dynamodb': {params['tableName']} if params.get('tableName') else set(),
+        'ec2': {params['groupId']} if params.get('groupId') else set()
+    }
+
+def remediate_bucket(pool, bucket_name, guard_owner=None):
+    """
+    Targeted fix for one bucket the validator found public (one Step Functions Map item).
+    A single PutPublicAccessBlock: the workflow already knows the bucket is exposed.
+    `guard_owner` is the validator's claim token, released if the fix fails.
+    """
+    try:
+        pool.client('s3').put_public_access_block(
+            Bucket=bucket_name,
+            PublicAccessBlockConfiguration={
+                'BlockPublicAcls': True, 'IgnorePublicAcls': True,
+                'BlockPublicPolicy': True, 'RestrictPublicBuckets': True
+            }
+        )
+        logger.warning(f"Locked bucket {bucket_name} (workflow)")
+        idempotency.mark_remediated(table(STATE_TABLE_NAME), [bucket_name])  # Drop the CloudTrail echo
+        return {'bucket_name': bucket_name, 'remediated': True, 'status': 'Success'}
+    except Exception as e:
+        logger.error(f"Failed to lock bucket {bucket_name}: {str(e)}")
+        if guard_owner:
+            idempotency.release(table(STATE_TABLE_NAME), bucket_name, guard_owner)
+        return {'bucket_name': bucket_name, 'remediated': False, 'status': 'Failed', 'error': str(e)}
+
+# ====================================================
+# PLAN: Apply a fresh scan's fixes without rescanning (see plan.py)
+# ====================================================
+def save_plan(pool, scan_id, region_scope, findings, run):
+    """Stores the scan's remediation plan; failures only cost the next remediation a full pass."""
+    account_plan = Plan(pool.account_id or 'self', scan_id, int(time.time()), scope_key(region_scope),
+                        actions_from_findings(findings), run)
+    try:
+        account_plan.save(table(STATE_TABLE_NAME))
+    except Exception as e:
+        logger.error(f"Plan Write Error: {str(e)}")
+
+def apply_target(pool, mode, target, fixes, account_block=None):
+    """
+    Re-reads one planned resource and applies its planned `fixes` if it is still non-compliant.
+    `target` is ('s3', 'global', bucket) or ('ec2', region, group_id).
+    Returns {fix: status} with REMEDIATED, ALREADY_COMPLIANT, FAILED or GONE.
+    """
+    service, region, resource = target
+    if service == 's3':
+        res = evaluate_bucket(pool.client('s3'), resource, mode, encryption=ENCRYPT_BUCKET in fixes,
+                              public_access=BLOCK_PUBLIC_ACCESS in fixes, account_block=account_block)
+        outcome = {
+            ENCRYPT_BUCKET: 'REMEDIATED' if res['encryption_fixed'] else ('FAILED' if res['unencrypted'] else 'ALREADY_COMPLIANT'),
+            BLOCK_PUBLIC_ACCESS: 'REMEDIATED' if res['public_risk'] else ('FAILED' if res.get('lock_failed') else 'ALREADY_COMPLIANT')
+        }
+        # A read error on either pillar leaves the bucket unverified
+        return {fix: 'FAILED' if res['error'] else outcome[fix] for fix in fixes}
+
+    ec2 = pool.client('ec2', region)
+    try:
+        sgs = ec2.describe_security_groups(GroupIds=[resource])['SecurityGroups']
+    except Exception as e:
+        if 'InvalidGroup.NotFound' in str(e):
+            return {REVOKE_INGRESS: 'GONE'}
+        logger.error(f"Could not re-read {resource} ({region}): {str(e)}")
+        return {REVOKE_INGRESS: 'FAILED'}
+    if not sgs:
+        return {REVOKE_INGRESS: 'GONE'}
+    res = evaluate_security_group(ec2, sgs[0], mode)
+    return {REVOKE_INGRESS: 'REMEDIATED' if res['remediated'] else ('FAILED' if res['open'] else 'ALREADY_COMPLIANT')}
+
+def apply_plan(pool, mode, account_plan):
+    """
+    Remediation from a fresh plan: only the planned resources are re-read and fixed,
+    concurrently; pillars the mode does not fix are reported from the scan's posture.
+    The plan is then rewritten with what is left, so a second mode can still use it.
+    """
+    actions = account_plan.actions_for(mode)
+    logger.info(f"Applying plan from scan {account_plan.scan_id} ({account_plan.age()}s old): {len(actions)} action(s)")
+    targets = {}  # (service, region, resource) -> planned fixes; both S3 fixes share one bucket re-read
+    for a in actions:
+        targets.setdefault(('s3' if a['region'] == 'global' else 'ec2', a['region'], a['resource']), []).append(a['fix'])
+
+    status = {}  # (fix, resource) -> (region, status)
+    account_block = account_public_access_block(pool) if any(BLOCK_PUBLIC_ACCESS in f for f in targets.values()) else None
+    with metrics.span('plan_apply', pool.run):
+        outcomes = bounded_map(lambda t: apply_target(pool, mode, t, targets[t], account_block), targets, SCAN_CONCURRENCY)
+        for target, outcome in zip(targets, outcomes):
+            for fix, result in outcome.items():
+                status[(fix, target[2])] = (target[1], result)
+    metrics.count('PlanActionsApplied', len(actions))
+
+    def result(fix, resource):
+        return status.get((fix, resource), (None, None))[1]
+
+    def resolved(fix, resource):
+        return result(fix, resource) in ('REMEDIATED', 'ALREADY_COMPLIANT', 'GONE')
+
+    def remediated(fix, resource):
+        return result(fix, resource) == 'REMEDIATED'
+
+    # Post-fix state: the scan's lists minus everything this run resolved
+    posture = account_plan.posture
+    locked = [resource for (fix, resource) in status if fix == BLOCK_PUBLIC_ACCESS and remediated(fix, resource)]
+    fixed_sgs = [s for s in posture['open_sgs'] if remediated(REVOKE_INGRESS, s.split(' ')[0])]
+    regions = {region: dict(r) for region, r in posture['regions'].items()}
+    for a in actions:
+        if a['fix'] == REVOKE_INGRESS and resolved(REVOKE_INGRESS, a['resource']) and a['region'] in regions:
+            regions[a['region']]['open_sgs'] -= 1
+            regions[a['region']]['remediated_sgs'] += int(remediated(REVOKE_INGRESS, a['resource']))
+    failed = sorted({resource for (fix, resource) in status if result(fix, resource) == 'FAILED'})
+    run = {
+        **posture,
+        'unencrypted_buckets': [b for b in posture['unencrypted_buckets'] if not resolved(ENCRYPT_BUCKET, b)],
+        'fixed_buckets': [resource for (fix, resource) in status if fix == ENCRYPT_BUCKET and remediated(fix, resource)],
+        'public_risk_buckets': locked,
+        'still_public': [b for b in posture['public_risk_buckets'] if not resolved(BLOCK_PUBLIC_ACCESS, b)],
+        'open_sgs': [s for s in posture['open_sgs'] if not resolved(REVOKE_INGRESS, s.split(' ')[0])],
+        'remediated_sgs': fixed_sgs,
+        'regions': regions
+    }
+
+    if locked:
+        idempotency.mark_remediated(table(STATE_TABLE_NAME), locked)  # Drop the CloudTrail echoes
+
+    # Per-resource outcomes go to CloudAuditZeroFindings like any other run
+    findings = []
+    pillars = {ENCRYPT_BUCKET: ('s3', 'encryption', 'UNENCRYPTED', 'WARNING'),
+               BLOCK_PUBLIC_ACCESS: ('s3', 'storage', 'PUBLIC_ACCESS', 'CRITICAL'),
+               REVOKE_INGRESS: ('ec2', 'network', 'OPEN_PORTS', 'CRITICAL')}
+    counts = {}
+    for (fix, resource), (region, outcome) in status.items():
+        counts[outcome.lower()] = counts.get(outcome.lower(), 0) + 1
+        if outcome in ('REMEDIATED', 'FAILED'):
+            service, pillar, kind, severity = pillars[fix]
+            findings.append(finding(service, region, resource, pillar, kind, severity, outcome))
+
+    log_entry = record_run(pool, mode, run, findings, {'plan': {
+        'scan_id': account_plan.scan_id, 'age_s': account_plan.age(), 'actions': len(actions),
+        'failed_resources': failed[:POSTURE_FINDINGS_MAX], **counts
+    }})
+
+    # Keep what is still open (other modes' fixes, failures) for the plan's remaining lifetime
+    account_plan.actions = [a for a in account_plan.actions if not resolved(a['fix'], a['resource'])]
+    account_plan.posture = {**run, 'fixed_buckets': [], 'public_risk_buckets': run['still_public'], 'remediated_sgs': []}
+    account_plan.posture.pop('still_public')
+    try:
+        account_plan.save(table(STATE_TABLE_NAME))
+    except Exception as e:
+        logger.error(f"Plan Write Error: {str(e)}")
+        account_plan.discard(table(STATE_TABLE_NAME))
+    return log_entry
+
+def audit_account(pool, mode, region_scope, incremental=False, targets=None, full_pass=False):
+    """
+    Runs every pillar against one account's client pool and writes its log entry
+    (tagged with AccountId) to the central CloudAuditZeroLogs table.
+    `incremental` scans consult the account's fingerprint snapshot (see snapshot.py).
+    Remediations apply the last scan's plan when it is fresh (see plan.py), unless `full_pass`.
+    """
+    targets = targets or {}
+    if mode in FIXES_BY_MODE and not targets and not full_pass:
+        try:
+            account_plan = Plan.load_fresh(table(STATE_TABLE_NAME), pool.account_id or 'self', region_scope)
         except Exception as e:
-            logger.error(f"DynamoDB Scan Error: {str(e)}")
+            logger.error(f"Plan Read Error: {str(e)}")
+            account_plan = None
+        if account_plan is not None:
+            return apply_plan(pool, mode, account_plan)
+        logger.info("No fresh remediation plan: full pass")
 
+    snap = None
+    if incremental and mode == 'scan':
+        with metrics.span('snapshot', pool.run):
+            snap = Snapshot.load(table(STATE_TABLE_NAME), pool.account_id or 'self')
+        snap.reuse = not snap.full_scan_due(FULL_SCAN_INTERVAL)
+        logger.info(f"Incremental scan ({'delta' if snap.reuse else 'periodic full re-evaluation'})")
+
+    # --- REGION FAN-OUT ---
+    # Regional pillars run in the background while the global S3 stage runs below,
+    # so total latency tracks the slowest region rather than the sum.
+    regions = resolve_regions(pool, region_scope)
+    multi_region = len(regions) > 1
+    logger.info(f"Regions: {', '.join(regions)}")
+    with ThreadPoolExecutor(max_workers=min(len(regions), REGION_CONCURRENCY)) as region_pool:
+        region_futures = {
+            region: region_pool.submit(scan_region, pool, region, mode, f" [{region}]" if multi_region else '', snap, targets)
+            for region in regions
+        }
 
         # ====================================================
-        # PILLAR 2: STORAGE SECURITY (Public Access)
+        # PILLAR 1 & 2: S3 ENCRYPTION + PUBLIC ACCESS (Global)
         # ====================================================
+    
+        bucket_count = 0
+        unencrypted_buckets = []
+        fixed_buckets = []
         public_risk_buckets = [] 
-        
-        for b_name in bucket_names:
-            is_public = False
-            try:
-                pab = s3.get_public_access_block(Bucket=b_name)
-                conf = pab['PublicAccessBlockConfiguration']
-                if not (conf['BlockPublicAcls'] and conf['IgnorePublicAcls'] and conf['BlockPublicPolicy'] and conf['RestrictPublicBuckets']):
-                    is_public = True
-            except Exception as e:
-                if "NoSuchPublicAccessBlockConfiguration" in str(e):
-                    is_public = True
-            
-            if is_public:
-                if mode in ['remediate_all', 'remediate_storage']:
-                    try:
-                        s3.put_public_access_block(
-                            Bucket=b_name,
-                            PublicAccessBlockConfiguration={
-                                'BlockPublicAcls': True, 'IgnorePublicAcls': True,
-                                'BlockPublicPolicy': True, 'RestrictPublicBuckets': True
-                            }
-                        )
-                        public_risk_buckets.append(b_name)
-                    except Exception as e:
-                        logger.error(f"Failed to lock bucket {b_name}: {str(e)}")
-                elif mode == 'scan':
-                    public_risk_buckets.append(b_name)
+        scan_errors = []
+
+        # Pillars 1 & 2 share one per-bucket stage: each bucket is fetched once
+        # on a bounded worker pool while the inventory is still being paged in.
+        findings = []
+        with metrics.span('s3', pool.run):
+            account_block = account_public_access_block(pool)
+            if fully_blocked(account_block):
+                logger.info("Account-level Public Access Block is on: per-bucket public access checks skipped")
+            for res in iter_bucket_results(pool.client('s3'), mode, snap, targets.get('s3', ()), account_block):
+                bucket_count += 1
+                add_bucket_result(res, mode, unencrypted_buckets, fixed_buckets, public_risk_buckets, scan_errors, findings)
+
+        metrics.count('BucketsEvaluated', bucket_count)
+
+        if public_risk_buckets and mode in ['remediate_all', 'remediate_storage']:
+            # Just locked: the workflow drops the resulting PutBucketPublicAccessBlock events
+            idempotency.mark_remediated(table(STATE_TABLE_NAME), public_risk_buckets)
 
         # ====================================================
         # PILLAR 3: IDENTITY (IAM)
         # ====================================================
-        iam_summary = iam.get_account_summary()
-        root_mfa_status = iam_summary.get('SummaryMap', {}).get('AccountMFAEnabled', 0)
-        is_root_secure = (root_mfa_status == 1)
+        # Every user in one pass over the credential report (see identity.py)
+        with metrics.span('iam', pool.run):
+            iam_result = identity.audit(pool.client('iam'), pool.account_id or 'self')
+        is_root_secure = iam_result['root_mfa_secure']
+        findings.extend(iam_result['findings'])
+        if iam_result.get('error'):
+            scan_errors.append('IAM credential report')
+        metrics.count('IamUsersEvaluated', iam_result['users'] or 0)
 
         # ====================================================
-        # PILLAR 4: NETWORK (EC2 Security Groups)
+        # REGIONAL PILLARS: Wait for RDS/DynamoDB/Network results
         # ====================================================
+        unencrypted_rds = []
+        unencrypted_dynamo = []
         open_sgs = []
         remediated_sgs = []
-        network_error = None
+        network_errors = []
+        region_breakdown = {}
+        listed_scopes = ['s3#global']
 
-        
-        try:
-            sgs = ec2.describe_security_groups()['SecurityGroups']
-            for sg in sgs:
-                try:
-                    for perm in sg.get('IpPermissions', []):
-                        # Inspect every rule
-                        protocol = perm.get('IpProtocol')
-                        from_port = perm.get('FromPort')
-                        to_port = perm.get('ToPort')
-                        
-                        is_risk_rule = False
-
-                        # 1. Check for "All Traffic" (Protocol -1)
-                        if str(protocol) == '-1':
-                            is_risk_rule = True
-                        
-                        # 2. Check for Specific Ports covering 22
-                        elif from_port is not None and to_port is not None:
-                            try:
-                                if int(from_port) <= 22 <= int(to_port):
-                                    is_risk_rule = True
-                            except ValueError:
-                                pass # Skip non-integer ports
-                        
-                        if is_risk_rule:
-                            # Check IPv4 (0.0.0.0/0)
-                            for ip in perm.get('IpRanges', []):
-                                if ip.get('CidrIp') == '0.0.0.0/0':
-                                    identifier = f"{sg['GroupId']} ({sg.get('GroupName','?')})"
-                                    if mode in ['remediate_all', 'remediate_network']:
-                                        logger.warning(f"REVOKING IPv4 Rule on {identifier}")
-                                        ec2.revoke_security_group_ingress(GroupId=sg['GroupId'], IpPermissions=[perm])
-                                        if identifier not in remediated_sgs: 
-                                            remediated_sgs.append(identifier)
-                                    else:
-                                        if identifier not in open_sgs:
-                                            open_sgs.append(identifier)
-
-                            # Check IPv6 (::/0) - NEW CHECK
-                            for ipv6 in perm.get('Ipv6Ranges', []):
-                                if ipv6.get('CidrIpv6') == '::/0':
-                                    identifier = f"{sg['GroupId']} ({sg.get('GroupName','?')})"
-                                    if mode in ['remediate_all', 'remediate_network']:
-                                        logger.warning(f"REVOKING IPv6 Rule on {identifier}")
-                                        ec2.revoke_security_group_ingress(GroupId=sg['GroupId'], IpPermissions=[perm])
-                                        if identifier not in remediated_sgs: 
-                                            remediated_sgs.append(identifier)
-                                    else:
-                                        if identifier not in open_sgs:
-                                            open_sgs.append(identifier)
-                except Exception as inner_e:
-                    logger.error(f"Error processing SG {sg.get('GroupId')}: {str(inner_e)}")
-        except Exception as e:
-            logger.error(f"Network Scan Error: {str(e)}")
-            network_error = str(e)
+        for region, future in region_futures.items():
+            try:
+                r = future.result()
+            except Exception as e:
+                logger.error(f"Region Scan Error ({region}): {str(e)}")
+                r = {'unencrypted_rds': [], 'unencrypted_dynamo': [], 'open_sgs': [], 'remediated_sgs': [], 'scan_errors': [], 'findings': [], 'network_error': str(e), 'listed': []}
+            unencrypted_rds.extend(r['unencrypted_rds'])
+            unencrypted_dynamo.extend(r['unencrypted_dynamo'])
+            open_sgs.extend(r['open_sgs'])
+            remediated_sgs.extend(r['remediated_sgs'])
+            scan_errors.extend(r['scan_errors'])
+            findings.extend(r['findings'])
+            listed_scopes.extend(f"{kind}#{region}" for kind in r['listed'])
+            if r['network_error']:
+                network_errors.append(f"{region}: {r['network_error']}" if multi_region else r['network_error'])
+            region_breakdown[region] = {
+                'unencrypted_rds': len(r['unencrypted_rds']),
+                'unencrypted_dynamo': len(r['unencrypted_dynamo']),
+                'open_sgs': len(r['open_sgs']),
+                'remediated_sgs': len(r['remediated_sgs']),
+                'error': bool(r['network_error'])
+            }
+    network_error = "; ".join(network_errors) or None
 
-        # ====================================================
-        # REPORTING
-        # ====================================================
-        def format_list(items): return ", ".join(items[:3]) + (f" (+{len(items)-3})" if len(items)>3 else "")
-
-        details = []
-        status_flag = 'SUCCESS'
-
-        # 1. Encryption
-        if unencrypted_buckets: details.append(f"WARNING: Unencrypted S3: {format_list(unencrypted_buckets)}.")
-        if unencrypted_rds: details.append(f"CRITICAL: Unencrypted RDS: {format_list(unencrypted_rds)}.")
-        if unencrypted_dynamo: details.append(f"WARNING: Unencrypted DynamoDB: {format_list(unencrypted_dynamo)}.")
-        if fixed_buckets: details.append(f"FIXED: Encrypted {len(fixed_buckets)} Buckets.")
-
-        # 2. Network
-        if open_sgs: details.append(f"CRITICAL: Open Access (SSH/All) on {format_list(open_sgs)}.")
-        if remediated_sgs: details.append(f"FIXED: Secured {len(remediated_sgs)} SGs.")
-        if network_error: details.append(f"ERROR: Network Scan Failed ({network_error}).")
-        if not open_sgs and not remediated_sgs and not network_error: details.append("Network Secure.")
-
-        # 3. Identity
-        if not is_root_secure: details.append("CRITICAL: Root MFA Missing.")
-
-        # 4. Storage
-        if public_risk_buckets:
-            if 'remediate' in mode:
-                details.append(f"FIXED: Locked {len(public_risk_buckets)} Public Buckets.")
-            else:
-                details.append(f"CRITICAL: Found {len(public_risk_buckets)} Public Buckets.")
+    if snap is not None:
+        # Only prune deleted resources from scopes that were listed without errors
+        with metrics.span('snapshot', pool.run):
+            snap.save(listed_scopes=listed_scopes, full_scan=not snap.reuse)
 
-        # Overall Status
-        risks_exist = (unencrypted_buckets or unencrypted_rds or unencrypted_dynamo or open_sgs or not is_root_secure or (mode == 'scan' and public_risk_buckets))
-        
-        if risks_exist and 'scan' in mode:
-            status_flag = 'WARNING'
-        
-        # Build Message
-        if not details:
-            final_msg = "All Systems Verified Secure." # Explicit Success Message
+    run = {
+        'total_buckets': bucket_count,
+        'unencrypted_buckets': unencrypted_buckets,
+        'fixed_buckets': fixed_buckets,
+        'public_risk_buckets': public_risk_buckets,
+        'unencrypted_rds': unencrypted_rds,
+        'unencrypted_dynamo': unencrypted_dynamo,
+        'open_sgs': open_sgs,
+        'remediated_sgs': remediated_sgs,
+        'network_error': network_error,
+        'root_mfa_secure': is_root_secure,
+        **identity_fields(iam_result),
+        'scan_errors': scan_errors,
+        'regions': region_breakdown
+    }
+    incremental_meta = {'full_scan': not snap.reuse, **snap.stats} if snap else None
+    log_entry = record_run(pool, mode, run, findings, {
+        'incremental': incremental_meta,
+        's3_account_block': fully_blocked(account_block) if account_block is not None else None
+    })
+
+    # Every scan leaves a remediation plan behind; a full remediation pass makes the stored one stale
+    if mode == 'scan':
+        save_plan(pool, log_entry['LogId'], region_scope, findings, run)
+    elif 'remediate' in mode:
+        discard_plan(table(STATE_TABLE_NAME), pool.account_id or 'self')
+    return log_entry
+
+# ====================================================
+# SINGLE-FLIGHT: One run per identical request, remediations serialized (see lease.py)
+# ====================================================
+def load_entry(log_id, timestamp):
+    """A stored log entry as record_run returned it (numbers stay Decimal: responses use log_codec.DecimalEncoder)."""
+    item = table(TABLE_NAME).get_item(Key={'LogId': log_id, 'Timestamp': timestamp}).get('Item')
+    return log_codec.expand(item) if item else None
+
+def single_flight(pool, mode, region_scope, incremental=False, targets=None, full_pass=False, context=None):
+    """
+    audit_account behind the account's lease. A request identical to one already
+    running waits for it and returns its log entry (Meta.coalesced_with = the run's
+    LogId); a conflicting remediation waits for the lease, then runs.
+    Event-targeted scans take the incremental scan's lease, so one run at a time saves
+    the account's snapshot, but never attach: a run already under way may have listed
+    the resource before its event's change.
+    """
+    state = table(STATE_TABLE_NAME)
+    request = lease.request_key(mode, scope_key(region_scope), incremental, full_pass)
+    name = lease.lease_name(pool.account_id or 'self', mode, request)
+    if targets:
+        request += "|targeted"
+    owner = str(uuid.uuid4())
+    pool.begin_run()
+    wait_s = lease.WAIT_SECONDS
+    if context is not None:
+        wait_s = min(wait_s, context.get_remaining_time_in_millis() / 1000 / 2)  # Keep time to run after waiting
+    deadline = time.time() + wait_s
+
+    while True:
+        holder = lease.acquire(state, name, owner, request)
+        if holder is None:
+            break
+        logger.info(f"Lease {name} held by {holder.get('Owner')} ({holder.get('Request')}): waiting")
+        with metrics.span('lease_wait', pool.run):
+            done = lease.wait(state, name, holder.get('Owner'), deadline)
+        if (not targets and holder.get('Request') == request and done and done.get('Owner') == holder.get('Owner')
+                and done.get('State') == lease.DONE):
+            entry = load_entry(done['LogId'], done['Timestamp'])
+            if entry is not None:
+                metrics.count('RequestsCoalesced')
+                return {**entry, 'Meta': {**(entry.get('Meta') or {}), 'coalesced_with': entry['LogId']}}
+        # Conflicting run finished, or the holder failed/expired: try to take the lease ourselves
+
+    try:
+        log_entry = audit_account(pool, mode, region_scope, incremental, targets, full_pass)
+    except Exception:
+        lease.release(state, name, owner)
+        raise
+    lease.finish(state, name, owner, log_entry['LogId'], log_entry['Timestamp'])
+    return log_entry
+
+# ====================================================
+# SHARDED SCANS: Plan -> shards in parallel (checkpointed) -> reduce (see shards.py)
+# ====================================================
+# Driven by the CloudAuditZero-ShardedScan state machine (step_function.tf), or by
+# tests/sharded_local.py, with {"shard_op": "plan" | "run" | "reduce", ...} events.
+# S3 buckets and DynamoDB tables are split into name ranges of SHARD_SIZE; RDS + EC2
+# are one shard per region and IAM is one shard, so no invocation holds the whole
+# account. The reduce step produces the same log entry, posture and plan as a full pass.
+
+def run_pool(meta):
+    return account_pool(meta['RoleArn']) if meta.get('RoleArn') else home_pool
+
+def plan_shards(pool, run_id, mode, region_scope, role_arn=None):
+    """Lists the inventory once and writes the run's shards. Re-planning an existing run resumes it."""
+    state = table(STATE_TABLE_NAME)
+    meta = shards.load_meta(state, run_id)
+    if meta is None:
+        regions = resolve_regions(pool, region_scope)
+        multi_region = len(regions) > 1
+        with metrics.span('shard_plan', pool.run):
+            bucket_names = sorted(b['Name'] for b in iter_buckets(pool.client('s3')))
+            with ThreadPoolExecutor(max_workers=min(len(regions), REGION_CONCURRENCY)) as executor:
+                table_names = dict(zip(regions, executor.map(lambda r: sorted(iter_table_names(pool.client('dynamodb', r))), regions)))
+        specs = [{'id': shards.shard_id('iam', 'global'), 'service': 'iam', 'region': 'global'}]
+        specs += shards.ranges('s3', 'global', bucket_names)
+        for region in regions:
+            tag = f" [{region}]" if multi_region else ''
+            specs.append({'id': shards.shard_id('region', region), 'service': 'region', 'region': region, 'tag': tag})
+            specs += shards.ranges('dynamodb', region, table_names[region], tag)
+        shards.create(state, run_id, pool.account_id or 'self', mode, scope_key(region_scope), specs, role_arn)
+        shard_ids = [spec['id'] for spec in specs]
+        logger.info(f"Sharded run {run_id}: {len(shard_ids)} shards ({len(bucket_names)} buckets, {len(regions)} regions)")
+    else:
+        shard_ids = meta['Shards']
+        logger.info(f"Sharded run {run_id} already planned ({meta['State']}): resuming {len(shard_ids)} shards")
+    return {'run_id': run_id, 'shards': [{'run_id': run_id, 'shard': sid} for sid in shard_ids]}
+
+def run_shard(run_id, shard_id, context=None):
+    """
+    Evaluates one shard from its last checkpoint. Returns {"complete": False} when it
+    stopped early (Lambda time running out); the state machine then invokes it again.
+    """
+    state = table(STATE_TABLE_NAME)
+    meta = shards.load_meta(state, run_id)
+    shard = shards.load_shard(state, run_id, shard_id)
+    if meta is None or shard is None:
+        raise ValueError(f"Unknown shard {shard_id} of run {run_id}")
+    done = {'shard_op': 'run', 'run_id': run_id, 'shard': shard_id, 'complete': True}
+    if shard['State'] == shards.DONE:
+        return done
+
+    pool, mode = run_pool(meta), meta['Mode']
+    service, region, tag = shard['Service'], shard['Region'], shard.get('Tag', '')
+
+    if service == 'iam':
+        iam_result = identity.audit(pool.client('iam'), pool.account_id or 'self')
+        result = {'root_mfa_secure': iam_result['root_mfa_secure'], 'findings': iam_result['findings'],
+                  'scan_errors': ['IAM credential report'] if iam_result.get('error') else [], **identity_fields(iam_result)}
+        shards.checkpoint(state, run_id, shard_id, 1, result, done=True)
+        return done
+
+    if service == 'region':
+        with metrics.span('shard_region', pool.run):
+            result = scan_region(pool, region, mode, tag, tables=False)
+        shards.checkpoint(state, run_id, shard_id, 1, {**result, 'region': region}, done=True)
+        return done
+
+    # Name-range shards: resume at Cursor, checkpoint every CHECKPOINT_EVERY resources
+    names, cursor = shard['Names'], shard['Cursor']
+    result = shard['Result'] or {'total_buckets': 0, 'unencrypted_buckets': [], 'fixed_buckets': [], 'public_risk_buckets': [],
+                                 'unencrypted_dynamo': [], 'scan_errors': [], 'findings': [], 'region': region}
+    if service == 's3':
+        s3 = pool.client('s3')
+        account_block = account_public_access_block(pool)
+        evaluate = lambda name: evaluate_bucket(s3, name, mode, account_block=account_block)
+    else:
+        dynamodb = pool.client('dynamodb', region)
+        evaluate = lambda name: evaluate_table(dynamodb, name)
+
+    # One chunk per checkpoint, so stopping early never discards evaluated resources
+    with metrics.span(f"shard_{service}", pool.run):
+        while cursor < len(names):
+            chunk = names[cursor:cursor + shards.CHECKPOINT_EVERY]
+            for res in bounded_map(evaluate, chunk, SCAN_CONCURRENCY):
+                if service == 's3':
+                    result['total_buckets'] += 1
+                    add_bucket_result(res, mode, result['unencrypted_buckets'], result['fixed_buckets'],
+                                      result['public_risk_buckets'], result['scan_errors'], result['findings'])
+                else:
+                    add_table_result(res, region, tag, result['unencrypted_dynamo'], result['scan_errors'], result['findings'])
+            cursor += len(chunk)
+            metrics.count('BucketsEvaluated' if service == 's3' else 'TablesEvaluated', len(chunk))
+            if not shards.checkpoint(state, run_id, shard_id, cursor, result, done=cursor >= len(names)):
+                return {**done, 'complete': False}  # Another attempt is ahead: re-read its checkpoint
+            remaining = context.get_remaining_time_in_millis() if hasattr(context, 'get_remaining_time_in_millis') else None
+            if cursor < len(names) and remaining is not None and remaining < shards.TIME_MARGIN_MS:
+                logger.warning(f"Shard {shard_id}: stopping at {cursor}/{len(names)}, {remaining} ms left")
+                return {**done, 'complete': False}
+    return done
+
+def reduce_shards(run_id):
+    """Merges every shard's result into one run and records it like a full pass."""
+    state = table(STATE_TABLE_NAME)
+    meta = shards.load_meta(state, run_id)
+    if meta is None:
+        raise ValueError(f"Unknown run {run_id}")
+    if meta['State'] == shards.DONE:
+        return {'run_id': run_id, 'log_id': meta.get('LogId'), 'status': 'ALREADY_REDUCED'}
+
+    parts = list(shards.load_results(state, run_id))
+    pending = [p['id'] for p in parts if p['State'] != shards.DONE]
+    if pending:
+        raise RuntimeError(f"Run {run_id}: {len(pending)} shard(s) not finished ({', '.join(pending[:5])})")
+
+    run = {'total_buckets': 0, 'unencrypted_buckets': [], 'fixed_buckets': [], 'public_risk_buckets': [],
+           'unencrypted_rds': [], 'unencrypted_dynamo': [], 'open_sgs': [], 'remediated_sgs': [],
+           'network_error': None, 'root_mfa_secure': True, 'scan_errors': [], 'regions': {},
+           'users_without_mfa': [], 'stale_keys': [], 'unused_passwords': [], 'identity': None}
+    findings, network_errors = [], []
+    multi_region = len({p['Result'].get('region') for p in parts if p['Result'].get('region', 'global') != 'global'}) > 1
+    for part in sorted(parts, key=lambda p: p['id']):
+        r = part['Result']
+        findings.extend(r.get('findings', []))
+        run['total_buckets'] += r.get('total_buckets', 0)
+        run['root_mfa_secure'] = run['root_mfa_secure'] and r.get('root_mfa_secure', True)
+        run['identity'] = r.get('identity') or run['identity']
+        for key in ('unencrypted_buckets', 'fixed_buckets', 'public_risk_buckets', 'unencrypted_rds',
+                    'unencrypted_dynamo', 'open_sgs', 'remediated_sgs', 'scan_errors', *IDENTITY_LISTS):
+            run[key].extend(r.get(key, []))
+        region = r.get('region', 'global')
+        if region == 'global':
+            continue
+        breakdown = run['regions'].setdefault(region, {'unencrypted_rds': 0, 'unencrypted_dynamo': 0, 'open_sgs': 0, 'remediated_sgs': 0, 'error': False})
+        for key in ('unencrypted_rds', 'unencrypted_dynamo', 'open_sgs', 'remediated_sgs'):
+            breakdown[key] += len(r.get(key, []))
+        if r.get('network_error'):
+            breakdown['error'] = True
+            network_errors.append(f"{region}: {r['network_error']}" if multi_region else r['network_error'])
+    run['network_error'] = "; ".join(network_errors) or None
+
+    pool, mode = run_pool(meta), meta['Mode']
+    pool.begin_run()
+    with metrics.span('shard_reduce', pool.run):
+        log_entry = record_run(pool, mode, run, findings, {'sharded': {'run_id': run_id, 'shards': len(parts)}})
+    if mode == 'scan':
+        save_plan(pool, log_entry['LogId'], meta.get('RegionScope', ''), findings, run)
+    elif 'remediate' in mode:
+        discard_plan(state, pool.account_id or 'self')
+    shards.finish(state, run_id, log_entry['LogId'])
+    return {'run_id': run_id, 'log_id': log_entry['LogId'], 'status': log_entry['Status'], 'details': log_entry['Details']}
+
+def shard_handler(event, context):
+    """Routes the state machine's {"shard_op": ...} tasks."""
+    op = event['shard_op']
+    if op == 'plan':
+        # {"shard_op": "plan", "input": {"action", "regions", "account", "run_id"}, "execution": <name>}
+        request = event.get('input') or {}
+        role_arn = request.get('account')
+        pool = account_pool(role_arn) if role_arn else home_pool
+        run_id = request.get('run_id') or event.get('execution')
+        return plan_shards(pool, run_id, request.get('action', 'scan'), request.get('regions', SCAN_REGIONS), role_arn)
+    if op == 'run':
+        return run_shard(event['run_id'], event['shard'], context)
+    if op == 'reduce':
+        return reduce_shards(event['run_id'])
+    raise ValueError(f"Unknown shard_op {op}")
+
+# ====================================================
+# REPORTING: Findings, log entry and posture for one account run
+# ====================================================
+IDENTITY_LISTS = ('users_without_mfa', 'stale_keys', 'unused_passwords')
+
+def identity_fields(iam_result):
+    """Pillar 3 result as carried in `run`: per-user lists plus a summary for Meta.iam."""
+    return {
+        **{key: iam_result[key] for key in IDENTITY_LISTS},
+        'identity': {
+            'users': iam_result['users'], 'root_access_keys': iam_result['root_access_keys'],
+            'report_generated_at': iam_result.get('report_generated_at'), 'report_cached': iam_result.get('cached', False),
+            'error': iam_result.get('error')
+        }
+    }
+
+def record_run(pool, mode, run, findings, extra_meta=None):
+    """
+    Writes one account run (full pass or applied plan): per-resource findings, the
+    CloudAuditZeroLogs entry and the posture item. `run` holds the result lists built
+    by audit_account; `still_public` (applied plans only) lists buckets left open.
+    Returns the log entry.
+    """
+    bucket_count = run['total_buckets']
+    unencrypted_buckets = run['unencrypted_buckets']
+    fixed_buckets = run['fixed_buckets']
+    public_risk_buckets = run['public_risk_buckets']
+    still_public = run.get('still_public', [])
+    unencrypted_rds = run['unencrypted_rds']
+    unencrypted_dynamo = run['unencrypted_dynamo']
+    open_sgs = run['open_sgs']
+    remediated_sgs = run['remediated_sgs']
+    network_error = run['network_error']
+    is_root_secure = run['root_mfa_secure']
+    iam_summary = run.get('identity') or {}
+    users_without_mfa = run.get('users_without_mfa', [])
+    stale_keys = run.get('stale_keys', [])
+    unused_passwords = run.get('unused_passwords', [])
+    scan_errors = run['scan_errors']
+    region_breakdown = run['regions']
+
+    def format_list(items): return ", ".join(items[:3]) + (f" (+{len(items)-3})" if len(items)>3 else "")
+
+    details = []
+    status_flag = 'SUCCESS'
+
+    # 1. Encryption
+    if unencrypted_buckets: details.append(f"WARNING: Unencrypted S3: {format_list(unencrypted_buckets)}.")
+    if unencrypted_rds: details.append(f"CRITICAL: Unencrypted RDS: {format_list(unencrypted_rds)}.")
+    if unencrypted_dynamo: details.append(f"WARNING: Unencrypted DynamoDB: {format_list(unencrypted_dynamo)}.")
+    if fixed_buckets: details.append(f"FIXED: Encrypted {len(fixed_buckets)} Buckets.")
+
+    # 2. Network
+    if open_sgs: details.append(f"CRITICAL: Sensitive Ports Open to Internet on {format_list(open_sgs)}.")
+    if remediated_sgs: details.append(f"FIXED: Secured {len(remediated_sgs)} SGs.")
+    if network_error: details.append(f"ERROR: Network Scan Failed ({network_error}).")
+    if not open_sgs and not remediated_sgs and not network_error: details.append("Network Secure.")
+
+    # 3. Identity
+    if not is_root_secure: details.append("CRITICAL: Root MFA Missing.")
+    if iam_summary.get('root_access_keys'): details.append("CRITICAL: Root Access Keys Active.")
+    if users_without_mfa: details.append(f"WARNING: Console Users Without MFA: {format_list(users_without_mfa)}.")
+    if stale_keys: details.append(f"WARNING: Stale Access Keys: {format_list(stale_keys)}.")
+    if unused_passwords: details.append(f"WARNING: Unused Passwords: {format_list(unused_passwords)}.")
+
+    # Resources that still failed after retries were not evaluated: say so rather than report them clean
+    if scan_errors: details.append(f"ERROR: Could Not Evaluate {format_list(scan_errors)}.")
+
+    # 4. Storage
+    if public_risk_buckets:
+        if 'remediate' in mode:
+            details.append(f"FIXED: Locked {len(public_risk_buckets)} Public Buckets.")
         else:
-            final_msg = " ".join(details)
-
-        if mode == 'scan': final_msg = "[SCAN] " + final_msg
-        else: final_msg = f"[REMEDIATION-{mode.upper().replace('REMEDIATE_', '')}] " + final_msg
-
-        # DynamoDB Write
-        table = dynamodb_res.Table(TABLE_NAME)
-        log_entry = {
-            'LogId': str(uuid.uuid4()),
-            'Timestamp': datetime.utcnow().isoformat(),
-            'Event': 'Security Scan' if mode == 'scan' else 'Remediation',
-            'Status': status_flag,
-            'Details': final_msg,
-            'Type': 'SCAN' if mode == 'scan' else 'REMEDIATION',
-            'Product': 'Cloud Audit Zero',
-            'Meta': {
-                'mode': mode,
-                'total_buckets': bucket_count,
-                'open_buckets': public_risk_buckets if mode == 'scan' else [],
-                'unencrypted_rds': len(unencrypted_rds),
-                'unencrypted_dynamo': len(unencrypted_dynamo),
-                'open_sgs': open_sgs,
-                'remediated_sgs': len(remediated_sgs),
-                'root_mfa_secure': is_root_secure
-            }
+            details.append(f"CRITICAL: Found {len(public_risk_buckets)} Public Buckets.")
+    if still_public: details.append(f"CRITICAL: {len(still_public)} Public Buckets Still Open.")
+
+    # Overall Status
+    risks_exist = (unencrypted_buckets or unencrypted_rds or unencrypted_dynamo or open_sgs or not is_root_secure or (mode == 'scan' and public_risk_buckets) or scan_errors
+                   or still_public or iam_summary.get('root_access_keys') or users_without_mfa or stale_keys or unused_passwords)
+
+    # An applied plan reports the whole post-fix posture (no follow-up scan): flag what is left
+    applied_plan = 'plan' in (extra_meta or {})
+    if risks_exist and ('scan' in mode or applied_plan):
+        status_flag = 'WARNING'
+    
+    # Build Message
+    if not details:
+        final_msg = "All Systems Verified Secure." # Explicit Success Message
+    else:
+        final_msg = " ".join(details)
+
+    if mode == 'scan': final_msg = "[SCAN] " + final_msg
+    else: final_msg = f"[REMEDIATION-{mode.upper().replace('REMEDIATE_', '')}] " + final_msg
+    if pool is not home_pool: final_msg = f"[{pool.account_id}] " + final_msg
+
+    # Per-resource findings first (one item each), then the summary log entry
+    log_id = str(uuid.uuid4())
+    timestamp = datetime.utcnow().isoformat()
+    with metrics.span('findings_write', pool.run):
+        findings_written, findings_failed = write_findings(
+            table(FINDINGS_TABLE_NAME), findings, log_id, timestamp, pool.account_id or 'unknown'
+        )
+
+    # DynamoDB Write
+    log_entry = {
+        'LogId': log_id,
+        'Timestamp': timestamp,
+        'Feed': LOG_FEED,
+        'AccountId': pool.account_id or 'unknown',
+        'Event': 'Security Scan' if mode == 'scan' else 'Remediation',
+        'Status': status_flag,
+        'Details': final_msg,
+        'Type': 'SCAN' if mode == 'scan' else 'REMEDIATION',
+        'Product': 'Cloud Audit Zero',
+        'Meta': {
+            'mode': mode,
+            'account_id': pool.account_id,
+            'total_buckets': bucket_count,
+            'open_buckets': public_risk_buckets if mode == 'scan' else still_public,
+            'unencrypted_rds': len(unencrypted_rds),
+            'unencrypted_dynamo': len(unencrypted_dynamo),
+            'open_sgs': open_sgs,
+            'remediated_sgs': len(remediated_sgs),
+            'root_mfa_secure': is_root_secure,
+            'iam': {**iam_summary, **{key: len(run.get(key, [])) for key in IDENTITY_LISTS}},  # Per-user detail in CloudAuditZeroFindings
+            'regions': region_breakdown,
+            'scan_errors': len(scan_errors),
+            'findings': {'written': findings_written, 'failed': findings_failed},  # Full detail in CloudAuditZeroFindings
+            'api': pool.stats.stats(),  # Calls/throttles/retries per service in this account's run
+            'timings': metrics.timings(pool.run, pool.stats),  # Milliseconds per stage + slowest API operations (also emitted as EMF)
+            **(extra_meta or {})
         }
-        table.put_item(Item=log_entry)
+    }
+    # Large Meta lists are compressed (or spilled to S3) so the item stays under 400 KB
+    with metrics.span('log_write', pool.run):
+        table(TABLE_NAME).put_item(Item=log_codec.encode(log_entry))
+
+    # Only scans, storage fixes and plans (which carry the scan's lists) know which buckets are public;
+    # None keeps the last known value in the posture
+    storage_evaluated = mode in ('scan', 'remediate_all', 'remediate_storage') or applied_plan
+    update_posture(log_entry, {
+        'total_buckets': bucket_count,
+        'public_buckets': (public_risk_buckets if mode == 'scan' else still_public) if storage_evaluated else None,
+        'unencrypted_buckets': unencrypted_buckets,
+        'unencrypted_rds': unencrypted_rds,
+        'unencrypted_dynamo': unencrypted_dynamo,
+        'open_sgs': open_sgs,
+        'remediated_sgs': remediated_sgs,
+        'users_without_mfa': users_without_mfa,
+        'stale_keys': stale_keys,
+        'unused_passwords': unused_passwords,
+        'scan_errors': scan_errors
+    }, is_root_secure)
+
+    return log_entry
+
+# ====================================================
+# POSTURE: One item per account, overwritten on every run
+# ====================================================
+POSTURE_RISKS = ('public_buckets', 'unencrypted_buckets', 'unencrypted_rds', 'unencrypted_dynamo', 'open_sgs',
+                 'users_without_mfa', 'stale_keys', 'unused_passwords', 'scan_errors')
+
+def update_posture(log_entry, findings, root_mfa_secure):
+    """
+    Atomically replaces the account's posture item (one UpdateItem). The condition
+    keeps a slower, older run from overwriting a newer one. Pillars the run did not
+    evaluate (None in `findings`) keep the previous posture's values, and the status
+    follows the resulting counts rather than the run's own entry.
+    """
+    ts = log_entry['Timestamp']
+    mode = log_entry['Meta']['mode']
+    counts = {k: (len(v) if isinstance(v, list) else v) for k, v in findings.items() if v is not None}
+    samples = {k: v[:POSTURE_FINDINGS_MAX] for k, v in findings.items() if isinstance(v, list) and v}
+    last_run = 'LastScanAt' if mode == 'scan' else 'LastRemediationAt'
+    try:
+        kept = [k for k, v in findings.items() if v is None]
+        if kept:
+            previous = table(STATE_TABLE_NAME).get_item(
+                Key={'PK': POSTURE_PK, 'SK': log_entry['AccountId']}, ConsistentRead=True
+            ).get('Item') or {}
+            for k in kept:
+                if k in previous.get('Counts', {}): counts[k] = previous['Counts'][k]
+                if k in previous.get('Findings', {}): samples[k] = previous['Findings'][k]
+        at_risk = (any(counts.get(k) for k in POSTURE_RISKS) or not root_mfa_secure
+                   or (log_entry['Meta'].get('iam') or {}).get('root_access_keys'))
+        status = 'WARNING' if at_risk else 'SUCCESS'
+
+        table(STATE_TABLE_NAME).update_item(
+            Key={'PK': POSTURE_PK, 'SK': log_entry['AccountId']},
+            UpdateExpression=(
+                "SET #status = :status, Details = :details, #mode = :mode, LastLogId = :log_id, "
+                f"Counts = :counts, Findings = :findings, RootMfaSecure = :mfa, UpdatedAt = :ts, {last_run} = :ts "
+                "ADD Runs :one"
+            ),
+            ConditionExpression="attribute_not_exists(UpdatedAt) OR UpdatedAt <= :ts",
+            ExpressionAttributeNames={'#status': 'Status', '#mode': 'Mode'},
+            ExpressionAttributeValues={
+                ':status': status, ':details': log_entry['Details'], ':mode': mode,
+                ':log_id': log_entry['LogId'], ':counts': counts, ':findings': samples,
+                ':mfa': root_mfa_secure, ':ts': ts, ':one': 1
+            }
+        )
+    except Exception as e:
+        if 'ConditionalCheckFailed' in str(e):
+            logger.info(f"Posture for {log_entry['AccountId']} already newer than {ts}; skipped")
+        else:
+            logger.error(f"Posture Update Error: {str(e)}")
+
+def record_account_error(role_arn, mode, message):
+    """Writes an ERROR entry for a target account that could not be audited (e.g. AssumeRole denied)."""
+    account_id = role_arn.split(':')[4] if role_arn.count(':') >= 5 else 'unknown'
+    log_entry = {
+        'LogId': str(uuid.uuid4()),
+        'Timestamp': datetime.utcnow().isoformat(),
+        'Feed': LOG_FEED,
+        'AccountId': account_id,
+        'Event': 'Security Scan' if mode == 'scan' else 'Remediation',
+        'Status': 'ERROR',
+        'Details': f"[{account_id}] ERROR: Account Audit Failed ({message}).",
+        'Type': 'SCAN' if mode == 'scan' else 'REMEDIATION',
+        'Product': 'Cloud Audit Zero',
+        'Meta': {'mode': mode, 'account_id': account_id}
+    }
+    table(TABLE_NAME).put_item(Item=log_entry)
+    return log_entry
+
+def bind_home_account(context):
+    """Tags this account's pool with its id, taken from the invoked function's ARN."""
+    function_arn = getattr(context, 'invoked_function_arn', None)
+    if function_arn and home_pool.account_id is None:
+        # arn:aws:lambda:<region>:<account-id>:function:<name>
+        home_pool.account_id = function_arn.split(':')[4]
+
+def lambda_handler(event, context):
+    logger.info("v2.0 - Network Logic Upgrade Started") # FORCE UPDATE MARKER
+    logger.info(f"Received event: {json.dumps(event)}")
+    aws_clients.reset_stats()
+    metrics.reset()
+    
+    headers = {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Methods": "POST, OPTIONS",
+        "Access-Control-Allow-Headers": "Content-Type"
+    }
+
+    # Sharded scan task from the CloudAuditZero-ShardedScan state machine
+    if event.get('shard_op'):
+        bind_home_account(context)
+        result = shard_handler(event, context)
+        metrics.emit(f"shard_{event['shard_op']}")
+        return result
+
+    # Workflow Map item from the validator: {"bucket_name": ..., "is_public": ..., "guard_owner": ...}
+    if event.get('bucket_name'):
+        if not event.get('is_public', True):
+            return {'bucket_name': event['bucket_name'], 'remediated': False, 'status': 'Success'}
+        return remediate_bucket(home_pool, event['bucket_name'], event.get('guard_owner'))
+
+    try:
+        # --- 1. PARSE INPUT & MODE ---
+        body = {}
+        if 'body' in event:
+            if isinstance(event['body'], str):
+                body = json.loads(event['body'])
+            else:
+                body = event['body']
+        
+        # CloudTrail event delivered by EventBridge: incremental scan focused on the touched resources
+        targets = None
+        if 'detail' in event:
+            if idempotency.is_lock_event(event):
+                # Our own (or any) full lock cannot expose a bucket: nothing to re-check
+                return {"statusCode": 200, "headers": headers, "body": json.dumps({"success": True, "skipped": "lock_event"})}
+            body = {'action': 'scan', 'incremental': True}
+            targets = event_targets(event['detail'])
+
+        mode = body.get('action', 'scan') 
+        incremental = bool(body.get('incremental', False))
+        full_pass = bool(body.get('full_pass', False))  # Remediate without the last scan's plan
+        logger.info(f"Engine Mode: {mode.upper()}{' (INCREMENTAL)' if incremental else ''}")
+
+        # --- 2. ACCOUNT FAN-OUT ---
+        region_scope = body.get('regions', SCAN_REGIONS)
+        role_arns = body.get('accounts', [r.strip() for r in TARGET_ROLE_ARNS.split(',') if r.strip()])
+
+        if not role_arns:
+            bind_home_account(context)
+            try:
+                log_entry = single_flight(home_pool, mode, region_scope, incremental, targets, full_pass, context)
+            except lease.Busy as e:
+                if targets:
+                    raise  # EventBridge invokes asynchronously: failing lets Lambda retry the event later
+                return {"statusCode": 409, "headers": headers, "body": json.dumps({"success": False, "message": str(e)})}
+            metrics.emit(mode)
+            return {"statusCode": 200, "headers": headers, "body": json.dumps({"success": True, "data": log_entry}, cls=log_codec.DecimalEncoder)}
+
+        # Every account is audited concurrently on its own session/client pool
+        logger.info(f"Auditing {len(role_arns)} accounts")
+        with ThreadPoolExecutor(max_workers=min(len(role_arns), ACCOUNT_CONCURRENCY)) as executor:
+            futures = [executor.submit(lambda arn: single_flight(account_pool(arn), mode, region_scope, incremental, full_pass=full_pass, context=context), arn) for arn in role_arns]
+        entries = []
+        for arn, future in zip(role_arns, futures):
+            try:
+                entries.append(future.result())
+            except Exception as e:
+                logger.error(f"Account Audit Error ({arn}): {str(e)}")
+                entries.append(record_account_error(arn, mode, str(e)))
+        metrics.count('AccountsAudited', len(role_arns))
+        metrics.emit(mode)
 
-        return {"statusCode": 200, "headers": headers, "body": json.dumps({"success": True, "data": log_entry})}
+        return {"statusCode": 200, "headers": headers, "body": json.dumps({"success": True, "data": entries}, cls=log_codec.DecimalEncoder)}
 
+    except lease.Busy:
+        raise
     except Exception as e:
         logger.error(f"Critical Error: {str(e)}")
         return {"statusCode": 500, "headers": headers, "body": json.dumps({"success": False, "message": str(e)})}
\ No newline at end of file
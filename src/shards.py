@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import zlib
+import logging
+
+# Sharded scans: one run = one partition in CloudAuditZeroState (PK = "SCANRUN#<run id>"),
+# expiring via the table's ExpiresAt TTL.
+#   SK "#META"        account, mode, region scope, shard ids, State (RUNNING / DONE)
+#   SK "SHARD#<id>"   one unit of work: service, region and resource range
+#                     (First/Last, plus the names in Names), Cursor = resources done,
+#                     Result = zlib JSON, partial until State = DONE
+# Workers checkpoint every CHECKPOINT_EVERY resources and before their Lambda runs
+# out of time, so a retried, re-driven or re-invoked shard resumes at Cursor.
+
+logger = logging.getLogger()
+
+STATE_TABLE_NAME = "CloudAuditZeroState"
+RUN_PREFIX = "SCANRUN#"
+META_SK = "#META"
+SHARD_PREFIX = "SHARD#"
+RUNNING = "RUNNING"
+PENDING = "PENDING"
+DONE = "DONE"
+
+SHARD_SIZE = max(1, int(os.environ.get('SHARD_SIZE', '500')))                  # Buckets/tables per shard
+CHECKPOINT_EVERY = max(1, int(os.environ.get('SHARD_CHECKPOINT_EVERY', '200')))  # Resources between checkpoints
+TIME_MARGIN_MS = int(os.environ.get('SHARD_TIME_MARGIN_SECONDS', '15')) * 1000  # Stop this long before the timeout
+RUN_TTL = int(os.environ.get('SHARD_RUN_TTL_HOURS', '24')) * 3600
+
+def pack(value):
+    return zlib.compress(json.dumps(value, separators=(',', ':')).encode())
+
+def unpack(data):
+    return json.loads(zlib.decompress(bytes(data))) if data is not None else None
+
+def shard_id(service, region, index=0):
+    return f"{service}#{region}#{index:04d}"
+
+def ranges(service, region, names, tag=''):
+    """Splits a sorted inventory into SHARD_SIZE slices: one shard spec each."""
+    return [
+        {'id': shard_id(service, region, i // SHARD_SIZE), 'service': service, 'region': region, 'tag': tag,
+         'names': names[i:i + SHARD_SIZE]}
+        for i in range(0, len(names), SHARD_SIZE)
+    ]
+
+def create(table, run_id, account, mode, region_scope, shards, role_arn=None):
+    """Writes the run's META item and one PENDING item per shard."""
+    expires_at = int(time.time()) + RUN_TTL
+    pk = f"{RUN_PREFIX}{run_id}"
+    with table.batch_writer() as batch:
+        for s in shards:
+            item = {
+                'PK': pk, 'SK': f"{SHARD_PREFIX}{s['id']}", 'Service': s['service'], 'Region': s['region'],
+                'Tag': s.get('tag', ''), 'State': PENDING, 'Cursor': 0, 'ExpiresAt': expires_at
+            }
+            if s.get('names'):
+                item.update({'First': s['names'][0], 'Last': s['names'][-1], 'Names': pack(s['names'])})
+            batch.put_item(Item=item)
+    # META last: its presence means every shard item exists
+    meta = {
+        'PK': pk, 'SK': META_SK, 'Account': account, 'Mode': mode, 'RegionScope': region_scope,
+        'Shards': [s['id'] for s in shards], 'State': RUNNING, 'CreatedAt': int(time.time()), 'ExpiresAt': expires_at
+    }
+    if role_arn:
+        meta['RoleArn'] = role_arn  # Target account: workers assume the same role
+    table.put_item(Item=meta)
+
+def load_meta(table, run_id):
+    return table.get_item(Key={'PK': f"{RUN_PREFIX}{run_id}", 'SK': META_SK}, ConsistentRead=True).get('Item')
+
+def load_shard(table, run_id, sid):
+    """One shard with Names/Result decoded, or None."""
+    item = table.get_item(Key={'PK': f"{RUN_PREFIX}{run_id}", 'SK': f"{SHARD_PREFIX}{sid}"}, ConsistentRead=True).get('Item')
+    if not item:
+        return None
+    return {**item, 'Names': unpack(item.get('Names')) or [], 'Result': unpack(item.get('Result')),
+            'Cursor': int(item.get('Cursor', 0))}
+
+def checkpoint(table, run_id, sid, cursor, result, done=False):
+    """
+    Persists a shard's progress. The condition keeps a slower duplicate worker
+    (e.g. a timed-out attempt still finishing) from moving the cursor backwards.
+    Returns False if a newer checkpoint already exists.
+    """
+    try:
+        table.update_item(
+            Key={'PK': f"{RUN_PREFIX}{run_id}", 'SK': f"{SHARD_PREFIX}{sid}"},
+            UpdateExpression="SET #state = :state, #cursor = :cursor, #result = :result, UpdatedAt = :now ADD Checkpoints :one",
+            ConditionExpression="#cursor <= :cursor AND #state <> :done",
+            ExpressionAttributeNames={'#state': 'State', '#cursor': 'Cursor', '#result': 'Result'},
+            ExpressionAttributeValues={
+                ':state': DONE if done else PENDING, ':cursor': cursor, ':result': pack(result),
+                ':now': int(time.time()), ':one': 1, ':done': DONE
+            }
+        )
+        return True
+    except Exception as e:
+        if 'ConditionalCheckFailed' in str(e):
+            logger.info(f"Shard {sid} already checkpointed past {cursor}")
+            return False
+        raise
+
+def load_results(table, run_id):
+    """All shard items of a run (Result decoded, Names dropped)."""
+    kwargs = {
+        'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :shard)',
+        'ExpressionAttributeValues': {':pk': f"{RUN_PREFIX}{run_id}", ':shard': SHARD_PREFIX},
+        'ProjectionExpression': 'SK, #state, #result',
+        'ExpressionAttributeNames': {'#state': 'State', '#result': 'Result'},
+        'ConsistentRead': True
+    }
+    while True:
+        page = table.query(**kwargs)
+        for item in page.get('Items', []):
+            yield {'id': item['SK'][len(SHARD_PREFIX):], 'State': item.get('State'), 'Result': unpack(item.get('Result'))}
+        if 'LastEvaluatedKey' not in page:
+            break
+        kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+def finish(table, run_id, log_id):
+    table.update_item(
+        Key={'PK': f"{RUN_PREFIX}{run_id}", 'SK': META_SK},
+        UpdateExpression="SET #state = :done, LogId = :log_id",
+        ExpressionAttributeNames={'#state': 'State'},
+        ExpressionAttributeValues={':done': DONE, ':log_id': log_id}
+    )
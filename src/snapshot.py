@@ -0,0 +1,119 @@
+import json
+import time
+import zlib
+import hashlib
+import threading
+
+# Fingerprint snapshot for incremental scans, stored in CloudAuditZeroState.
+# One account = one partition; each (kind, region) scope is a zlib-compressed
+# JSON map {resource_id: [fingerprint, result, evaluated_at]} split into
+# <= CHUNK_BYTES items, so 10k resources cost a handful of reads/writes.
+STATE_TABLE_NAME = "CloudAuditZeroState"
+CHUNK_BYTES = 350 * 1024  # Stay well under DynamoDB's 400 KB item limit
+META_SK = "#META"
+
+def fingerprint(value):
+    """Short, stable hash of any JSON-serialisable config blob."""
+    raw = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+class Snapshot:
+    """
+    Per-account resource snapshot. Loaded once per scan, consulted from worker
+    threads, and written back (changed scopes only) when the scan finishes.
+    """
+    def __init__(self, table, account_id, scopes=None, last_full_scan=0):
+        self.table = table
+        self.pk = f"SNAPSHOT#{account_id}"
+        self.scopes = scopes or {}           # "kind#region" -> {resource_id: [fp, result, ts]}
+        self.chunk_counts = {}               # "kind#region" -> chunks currently stored
+        self.last_full_scan = last_full_scan
+        self.reuse = True                    # False = record only (periodic full scan)
+        self.stats = {'evaluated': 0, 'reused': 0}
+        self._dirty = set()
+        self._seen = {}                      # Scopes listed in full this run -> ids seen
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, table, account_id):
+        snap = cls(table, account_id)
+        kwargs = {'KeyConditionExpression': 'PK = :pk', 'ExpressionAttributeValues': {':pk': snap.pk}}
+        chunks = {}
+        while True:
+            page = table.query(**kwargs)
+            for item in page.get('Items', []):
+                if item['SK'] == META_SK:
+                    snap.last_full_scan = int(item.get('LastFullScan', 0))
+                    continue
+                scope, _, idx = item['SK'].rpartition('#')
+                chunks.setdefault(scope, []).append((int(idx), bytes(item['Data'])))
+            if 'LastEvaluatedKey' not in page:
+                break
+            kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+        for scope, parts in chunks.items():
+            raw = b"".join(data for _, data in sorted(parts))
+            snap.scopes[scope] = json.loads(zlib.decompress(raw))
+            snap.chunk_counts[scope] = len(parts)
+        return snap
+
+    def full_scan_due(self, interval_seconds):
+        return time.time() - self.last_full_scan >= interval_seconds
+
+    def cached(self, kind, region, resource_id, fp):
+        """
+        Returns the stored result when the resource is unchanged and was clean
+        last time. Resources with open findings are always re-evaluated so
+        fixes made outside the scanner are picked up.
+        """
+        scope = f"{kind}#{region}"
+        with self._lock:
+            self._seen.setdefault(scope, set()).add(resource_id)
+            entry = self.scopes.get(scope, {}).get(resource_id)
+            if self.reuse and entry and entry[0] == fp and not entry[1].get('finding'):
+                self.stats['reused'] += 1
+                return entry[1]
+        return None
+
+    def record(self, kind, region, resource_id, fp, result):
+        scope = f"{kind}#{region}"
+        with self._lock:
+            self.stats['evaluated'] += 1
+            self._seen.setdefault(scope, set()).add(resource_id)
+            entries = self.scopes.setdefault(scope, {})
+            old = entries.get(resource_id)
+            if not old or old[0] != fp or old[1] != result:
+                self._dirty.add(scope)
+            entries[resource_id] = [fp, result, int(time.time())]
+
+    def results(self, kind, region, exclude=()):
+        """Stored results for a scope (used when a scope is not re-listed, e.g. event-driven runs)."""
+        for resource_id, entry in self.scopes.get(f"{kind}#{region}", {}).items():
+            if resource_id not in exclude:
+                yield entry[1]
+
+    def save(self, listed_scopes=(), full_scan=False):
+        """
+        Writes back changed scopes. For scopes that were listed in full this run,
+        resources that were not seen (deleted) are dropped first.
+        """
+        for scope in listed_scopes:
+            seen = self._seen.get(scope, set())
+            entries = self.scopes.get(scope, {})
+            for resource_id in [r for r in entries if r not in seen]:
+                del entries[resource_id]
+                self._dirty.add(scope)
+
+        with self.table.batch_writer() as batch:
+            for scope in self._dirty:
+                raw = zlib.compress(json.dumps(self.scopes.get(scope, {}), separators=(',', ':')).encode())
+                parts = [raw[i:i + CHUNK_BYTES] for i in range(0, len(raw), CHUNK_BYTES)] or [b""]
+                for idx, data in enumerate(parts):
+                    batch.put_item(Item={'PK': self.pk, 'SK': f"{scope}#{idx}", 'Data': data})
+                for idx in range(len(parts), self.chunk_counts.get(scope, 0)):
+                    batch.delete_item(Key={'PK': self.pk, 'SK': f"{scope}#{idx}"})
+                self.chunk_counts[scope] = len(parts)
+
+        if full_scan:
+            self.last_full_scan = int(time.time())
+        self.table.put_item(Item={'PK': self.pk, 'SK': META_SK, 'LastFullScan': self.last_full_scan})
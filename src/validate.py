@@ -1,48 +1,66 @@
-import boto3
+import os
 import json
+import uuid
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
+import aws_clients
+import idempotency
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-def lambda_handler(event, context):
-    """
-    Validator: Checks if a bucket is truly non-compliant.
-    Input: {"bucket_name": "example-bucket"} from Step Functions.
-    Output: {"is_public": True/False, "bucket_name": "..."}
-    """
-    # 1. Get the bucket name from the event input
-    # Handle both Step Functions input and direct EventBridge invocation
+# Buckets checked in parallel when the workflow hands over a batch
+VALIDATE_CONCURRENCY = max(1, int(os.environ.get('VALIDATE_CONCURRENCY', '16')))
+
+def event_bucket(event):
+    """Bucket name from a CloudTrail event (EventBridge) or a {"bucket_name": ...} input."""
     if "detail" in event:
-        bucket_name = event.get("detail", {}).get("requestParameters", {}).get("bucketName")
-    else:
-        bucket_name = event.get("bucket_name")
-    
-    # Fallback if parsing fails
-    if not bucket_name:
-         # Try looking deeper if it is wrapped in a "detail" object inside input
-         bucket_name = event.get("input", {}).get("detail", {}).get("requestParameters", {}).get("bucketName")
+        return event.get("detail", {}).get("requestParameters", {}).get("bucketName")
+    if event.get("bucket_name"):
+        return event["bucket_name"]
+    # Try looking deeper if it is wrapped in a "detail" object inside input
+    return event.get("input", {}).get("detail", {}).get("requestParameters", {}).get("bucketName")
 
-    if not bucket_name:
-        logger.error("Could not find bucket_name in event")
-        return {"is_public": False, "error": "No bucket name found"}
+def batch_buckets(records):
+    """
+    Unique buckets, in arrival order, from a batch delivered by the EventBridge Pipe:
+    SQS messages whose `body` is the original EventBridge event (or plain events/names).
+    Returns {bucket_name: lock_only}, where lock_only means every event for the bucket
+    only locked it (see idempotency.is_lock_event).
+    """
+    buckets = {}
+    for record in records:
+        if isinstance(record, str):
+            buckets[record] = False
+            continue
+        event = record.get("body", record)
+        if isinstance(event, str):
+            try:
+                event = json.loads(event)
+            except ValueError:
+                logger.error(f"Skipping unreadable message {record.get('messageId')}")
+                continue
+        name = event_bucket(event)
+        if name:
+            buckets[name] = buckets.get(name, True) and idempotency.is_lock_event(event)
+    return buckets
 
-    s3 = boto3.client("s3")
-    
+def check_bucket(s3, bucket_name):
+    """Checks if a bucket is truly non-compliant. Returns {"is_public", "bucket_name"[, "error"]}."""
     logger.info(f"Validating configuration for: {bucket_name}")
-    
+
     try:
-        # 2. Check Public Access Block
+        # Check Public Access Block
         pab = s3.get_public_access_block(Bucket=bucket_name)
         conf = pab.get('PublicAccessBlockConfiguration', {})
-        
-        # 3. Validation Logic: If ANY setting is false, we consider it "Exposed"
-        if not (conf.get('BlockPublicAcls') and conf.get('IgnorePublicAcls') and 
+
+        # Validation Logic: If ANY setting is false, we consider it "Exposed"
+        if not (conf.get('BlockPublicAcls') and conf.get('IgnorePublicAcls') and
                 conf.get('BlockPublicPolicy') and conf.get('RestrictPublicBuckets')):
             logger.warning(f"Bucket {bucket_name} has weakened Public Access Blocks.")
             return {"is_public": True, "bucket_name": bucket_name}
-            
+
         logger.info(f"Bucket {bucket_name} is secure.")
         return {"is_public": False, "bucket_name": bucket_name}
 
@@ -52,10 +70,76 @@ def lambda_handler(event, context):
             logger.warning(f"Bucket {bucket_name} has NO Public Access Block configuration.")
             return {"is_public": True, "bucket_name": bucket_name}
         else:
-            # If it's some other error (like AccessDenied), log it
+            # If it's some other error (like AccessDenied, or the bucket is already gone), log it
             logger.error(f"AWS Error: {e}")
             return {"is_public": False, "bucket_name": bucket_name, "error": str(e)}
-        
+
     except Exception as e:
         logger.error(f"General error: {str(e)}")
-        return {"is_public": False, "bucket_name": bucket_name, "error": str(e)}
\ No newline at end of file
+        return {"is_public": False, "bucket_name": bucket_name, "error": str(e)}
+
+def guarded_check(s3, state, bucket_name, lock_only=False):
+    """
+    check_bucket behind the remediation guard: duplicates of an in-flight bucket and
+    echoes of our own fixes return {"suppressed": reason} without any S3 call.
+    Other results carry "guard_owner", the claim token the remediator releases with.
+    """
+    owner = str(uuid.uuid4())
+    try:
+        reason = idempotency.claim(state, bucket_name, owner, lock_only)
+    except Exception as e:
+        # Guard unavailable: validating twice is cheaper than missing an exposure
+        logger.error(f"Guard check failed for {bucket_name}: {str(e)}")
+        reason = None
+    if reason:
+        logger.info(f"Skipping {bucket_name} ({reason})")
+        return {"is_public": False, "bucket_name": bucket_name, "suppressed": reason}
+
+    result = check_bucket(s3, bucket_name)
+    if not result["is_public"]:
+        idempotency.release(state, bucket_name, owner)  # Nothing to fix: later events are checked again
+    return {**result, "guard_owner": owner}
+
+def lambda_handler(event, context):
+    """
+    Validator: Checks if buckets are truly non-compliant.
+    Batch input (workflow): {"records": [...]} (SQS messages from the EventBridge Pipe)
+    or {"buckets": ["a", "b"]}.
+    Batch output: {"checked": n, "suppressed": n, "buckets": [{"is_public", "bucket_name", "guard_owner"}, ...],
+                   "public": [...only public]}
+    Buckets already owned by another execution, or just fixed by us, come back with
+    "suppressed" set and cost no S3 call (see idempotency.py).
+    Single input: {"bucket_name": "example-bucket"} or a CloudTrail event.
+    Single output: {"is_public": True/False, "bucket_name": "..."}
+    """
+    s3 = aws_clients.get_client("s3")  # Built once per container, reused while warm
+    state = aws_clients.get_resource("dynamodb").Table(idempotency.STATE_TABLE_NAME)
+
+    # 1. Batch: de-duplicate (one bucket is often touched by several calls) and check concurrently
+    if isinstance(event, list) or "records" in event or "buckets" in event:
+        if isinstance(event, list):
+            buckets = batch_buckets(event)
+        elif "records" in event:
+            buckets = batch_buckets(event["records"] or [])
+        else:
+            buckets = dict.fromkeys(event["buckets"] or [], False)
+        logger.info(f"Validating {len(buckets)} unique buckets")
+
+        results = []
+        if buckets:
+            with ThreadPoolExecutor(max_workers=min(len(buckets), VALIDATE_CONCURRENCY)) as executor:
+                results = list(executor.map(lambda b: guarded_check(s3, state, *b), buckets.items()))
+        suppressed = [r for r in results if r.get("suppressed")]
+        return {
+            "checked": len(results) - len(suppressed),
+            "suppressed": len(suppressed),
+            "buckets": results,
+            "public": [r for r in results if r["is_public"]]
+        }
+
+    # 2. Single bucket: Step Functions input or direct EventBridge invocation
+    bucket_name = event_bucket(event)
+    if not bucket_name:
+        logger.error("Could not find bucket_name in event")
+        return {"is_public": False, "error": "No bucket name found"}
+    return guarded_check(s3, state, bucket_name, idempotency.is_lock_event(event))
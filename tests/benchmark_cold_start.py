@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import subprocess
+
+# --- CONFIGURATION ---
+RUNS = 3  # Fresh interpreters per handler (the fastest run is reported)
+HANDLERS = {
+    "remediate": {"body": {"action": "scan"}},
+    "validate": {"bucket_name": "cold-start-bench"},
+    "get_logs": {"queryStringParameters": {}},
+}
+# ---------------------
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# Runs inside a fresh interpreter: times the handler import, then a first (cold) and
+# second (warm) invocation. Every HTTP request is answered locally by a stand-in,
+# so the timings cover Python imports, client construction and model loading only.
+CHILD = r"""
+import os, sys, json, time
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+sys.path.insert(0, sys.argv[1])
+name, event = sys.argv[2], json.loads(sys.argv[3])
+
+start = time.perf_counter()
+module = __import__(name)
+imported = time.perf_counter()
+
+import aws_clients
+from botocore.awsrequest import AWSResponse
+
+class Body:
+    def __init__(self, data): self.data = data
+    def stream(self, **kwargs): yield self.data
+
+def stand_in(request, event_name, **kwargs):
+    # JSON protocols (DynamoDB) get "{}", XML protocols an empty <Op>Result document
+    op = event_name.rsplit(".", 1)[-1]
+    data = b"{}" if "dynamodb" in request.url else f"<{op}Response><{op}Result/></{op}Response>".encode()
+    return AWSResponse(request.url, 200, {}, Body(data))
+
+aws_clients.shared_session().events.register("before-send", stand_in)
+
+t0 = time.perf_counter()
+response = module.lambda_handler(event, None)
+assert not isinstance(response, dict) or response.get("statusCode", 200) == 200, response
+t1 = time.perf_counter()
+module.lambda_handler(event, None)
+t2 = time.perf_counter()
+print(json.dumps({"import": imported - start, "first": t1 - t0, "warm": t2 - t1}))
+"""
+
+
+def measure(name, event):
+    runs = []
+    for _ in range(RUNS):
+        out = subprocess.run(
+            [sys.executable, "-c", CHILD, SRC_DIR, name, json.dumps(event)],
+            capture_output=True, text=True, check=True
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return min(runs, key=lambda r: r["import"] + r["first"])
+
+
+if __name__ == "__main__":
+    print(f"🧊 Cold start benchmark (best of {RUNS} fresh interpreters, local stand-in for AWS)\n")
+    print(f"{'HANDLER':<12}{'IMPORT':<12}{'1ST CALL':<12}{'COLD TOTAL':<13}WARM CALL")
+    print("-" * 58)
+    for name, event in HANDLERS.items():
+        r = measure(name, event)
+        print(f"{name:<12}{r['import'] * 1000:<12.0f}{r['first'] * 1000:<12.0f}"
+              f"{(r['import'] + r['first']) * 1000:<13.0f}{r['warm'] * 1000:.0f}  (ms)")
@@ -0,0 +1,130 @@
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from botocore.exceptions import ClientError
+
+# --- CONFIGURATION ---
+API_LATENCY = 0.02                   # Simulated round-trip per S3 call (seconds)
+BUCKET_COUNTS = [100, 250, 500]      # Account sizes to benchmark
+CONCURRENCY_LEVELS = [1, 16, 32]     # 1 = the old serial behaviour
+# ---------------------
+
+# The remediator resolves its home region at import time; give it a region and dummy creds.
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("EMF_ENABLED", "false")  # Keep embedded-metric lines out of the report
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import remediate  # noqa: E402
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "Benchmark")
+
+
+class FakeS3:
+    """In-process S3 stand-in: every call sleeps API_LATENCY to mimic a network round-trip."""
+
+    def __init__(self, bucket_count):
+        self.buckets = [f"bench-bucket-{i:05d}" for i in range(bucket_count)]
+
+    def can_paginate(self, operation):
+        return False
+
+    def list_buckets(self):
+        time.sleep(API_LATENCY)
+        return {"Buckets": [{"Name": b} for b in self.buckets]}
+
+    def get_bucket_encryption(self, Bucket):
+        time.sleep(API_LATENCY)
+        # Every 3rd bucket is unencrypted
+        if int(Bucket[-5:]) % 3 == 0:
+            raise client_error("ServerSideEncryptionConfigurationNotFoundError")
+        return {"ServerSideEncryptionConfiguration": {}}
+
+    def get_public_access_block(self, Bucket):
+        time.sleep(API_LATENCY)
+        # Every 5th bucket has no Public Access Block
+        if int(Bucket[-5:]) % 5 == 0:
+            raise client_error("NoSuchPublicAccessBlockConfiguration")
+        flags = {k: True for k in ["BlockPublicAcls", "IgnorePublicAcls", "BlockPublicPolicy", "RestrictPublicBuckets"]}
+        return {"PublicAccessBlockConfiguration": flags}
+
+    # Exposure checks for the buckets left without a Public Access Block
+    def get_bucket_policy_status(self, Bucket):
+        time.sleep(API_LATENCY)
+        return {"PolicyStatus": {"IsPublic": False}}
+
+    def get_bucket_acl(self, Bucket):
+        time.sleep(API_LATENCY)
+        return {"Grants": []}
+
+
+class FakeAccount:
+    """Empty stand-ins for the non-S3 pillars so only the S3 stage is measured."""
+
+    def get_paginator(self, operation): return self
+    def paginate(self, **kwargs): return iter([{}])
+    def get_account_summary(self): return {"SummaryMap": {"AccountMFAEnabled": 1}}
+    def generate_credential_report(self): return {"State": "COMPLETE"}
+    def get_credential_report(self):
+        return {"Content": b"user,mfa_active\n<root_account>,true\n", "GeneratedTime": datetime.now(timezone.utc)}
+    def get_public_access_block(self, AccountId):  # S3 Control: no account-level block
+        raise client_error("NoSuchPublicAccessBlockConfiguration")
+    def Table(self, name): return self
+    # Platform tables accept and ignore conditions (one scan at a time: leases never collide)
+    def put_item(self, Item, **kwargs): return {}
+    def get_item(self, Key, **kwargs): return {}
+    def update_item(self, **kwargs): return {}
+    def delete_item(self, Key, **kwargs): return {}
+    def batch_write_item(self, RequestItems): return {}
+
+    name = "benchmark"
+
+    @property
+    def meta(self):
+        return type("Meta", (), {"client": self})()
+
+
+class FakePool:
+    """Stands in for remediate.ClientPool: S3 calls go to FakeS3, everything else to FakeAccount."""
+
+    def __init__(self, s3):
+        self.s3 = s3
+        self.other = FakeAccount()
+        self.account_id = "123456789012"
+        self.stats, self.run = remediate.aws_clients.ApiStats(), remediate.metrics.Run()
+
+    def begin_run(self):
+        self.stats.reset()
+        self.run.reset()
+
+    def client(self, service, region=None):
+        return self.s3 if service == "s3" else self.other
+
+
+def run_scan(bucket_count, concurrency):
+    remediate.home_pool = FakePool(FakeS3(bucket_count))
+    remediate.SCAN_CONCURRENCY = concurrency
+    start = time.perf_counter()
+    response = remediate.lambda_handler({"body": {"action": "scan"}}, None)
+    elapsed = time.perf_counter() - start
+    if response["statusCode"] != 200:
+        print(f"❌ Scan failed: {response['body']}")
+        sys.exit(1)
+    return elapsed
+
+
+if __name__ == "__main__":
+    remediate.table = lambda name: FakeAccount()
+
+    print(f"⏱️  S3 scan benchmark ({API_LATENCY * 1000:.0f} ms simulated latency per call)\n")
+    print(f"{'BUCKETS':<10}" + "".join(f"{f'WORKERS={c}':<15}" for c in CONCURRENCY_LEVELS) + "SPEEDUP")
+    print("-" * (10 + 15 * len(CONCURRENCY_LEVELS) + 8))
+
+    for count in BUCKET_COUNTS:
+        timings = [run_scan(count, c) for c in CONCURRENCY_LEVELS]
+        row = f"{count:<10}" + "".join(f"{f'{t:.2f}s':<15}" for t in timings)
+        print(row + f"{timings[0] / timings[-1]:.1f}x")
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import time
+import logging
+import tracemalloc
+
+# --- CONFIGURATION ---
+BUCKETS = 10_000
+SG_RULES = 50_000          # 10 rules per security group -> 5,000 groups
+TABLES = 1_000
+LOG_ITEMS = 100_000
+IAM_USERS = 5_000          # Rows in the credential report
+API_LATENCY = 0.0          # Seconds added to every call (0 = measure our own overhead only)
+VALIDATE_BATCH = 100       # Events per workflow execution (EventBridge Pipe batch size)
+LOG_PAGES = 50             # Pages walked by the get_logs pagination scenario
+EXPORT_SEGMENTS = 8        # Parallel Scan segments for the export scenario
+# ---------------------
+# Usage: python3 tests/benchmark_scale.py [--quick] [--json]
+#   --quick  1/10th of the sizes above, for a fast local check
+#   --json   one JSON line per scenario (for tracking regressions between commits)
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "benchmark")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "benchmark")
+os.environ.setdefault("EMF_ENABLED", "false")  # Keep embedded-metric lines out of the report
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import remediate  # noqa: E402
+import validate  # noqa: E402
+import get_logs  # noqa: E402
+import export_logs  # noqa: E402
+import identity  # noqa: E402
+from fake_aws import FakeAccount  # noqa: E402
+
+identity.POLL_INTERVAL = 0.01  # The fake report is ready on the first poll; don't time a 1 s sleep
+
+
+def measure(account, name, fn):
+    """Runs one scenario; returns wall time, peak traced memory and API calls per service."""
+    account.reset_calls()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"scenario": name, "wall_s": round(elapsed, 3), "peak_mb": round(peak / 2**20, 1),
+            "calls": account.calls_by_service()}
+
+
+def ok(response):
+    if response["statusCode"] != 200:
+        raise SystemExit(f"❌ Handler failed: {response['body']}")
+    return json.loads(response["body"])
+
+
+def scenarios(account):
+    def scan(body):
+        return lambda: ok(remediate.lambda_handler({"body": body}, None))
+
+    def validate_all():
+        names = account.services["s3"].buckets
+        for i in range(0, len(names), VALIDATE_BATCH):
+            records = [{"messageId": n, "body": json.dumps({"detail": {"eventName": "PutBucketAcl",
+                        "requestParameters": {"bucketName": n}}})} for n in names[i:i + VALIDATE_BATCH]]
+            validate.lambda_handler(records, None)
+
+    def scan_account_block():
+        # Account-level Public Access Block on: no per-bucket public access reads
+        s3control = account.services["s3control"]
+        s3control.block = {flag: True for flag in ("BlockPublicAcls", "IgnorePublicAcls", "BlockPublicPolicy", "RestrictPublicBuckets")}
+        try:
+            ok(remediate.lambda_handler({"body": {"action": "scan"}}, None))
+        finally:
+            s3control.block = None
+
+    def iam_report(generate):
+        # Whole-account IAM pillar from one credential report, whatever the user count
+        def run():
+            identity._cache.clear()
+            if generate:
+                account.services["iam"].report = None
+            result = identity.audit(account.client("iam"), account.account_id)
+            if result.get("error") or result["users"] != account.services["iam"].users:
+                raise SystemExit(f"❌ IAM pillar failed: {result.get('error')}")
+        return run
+
+    def logs_first_page():
+        get_logs._cache.clear()
+        ok(get_logs.lambda_handler({"queryStringParameters": {}}, None))
+
+    def logs_paginate():
+        get_logs._cache.clear()
+        cursor = None
+        for _ in range(LOG_PAGES):
+            params = {"limit": str(get_logs.MAX_LIMIT), **({"cursor": cursor} if cursor else {})}
+            cursor = ok(get_logs.lambda_handler({"queryStringParameters": params}, None))["next_cursor"]
+            if not cursor:
+                break
+
+    def logs_detail():
+        ok(get_logs.lambda_handler({"queryStringParameters": {"id": "log-0000042"}}, None))
+
+    def logs_export():
+        export_logs.EXPORT_BUCKET = "bench-exports"
+        result = export_logs.lambda_handler({"segments": EXPORT_SEGMENTS, "rcu": 1_000_000}, None)
+        if not result["success"] or result["items"] != len(account.tables[get_logs.TABLE_NAME].items):
+            raise SystemExit(f"❌ Export failed: {result}")
+
+    return [
+        ("remediate scan", scan({"action": "scan"})),
+        ("remediate scan (account block on)", scan_account_block),
+        ("remediate scan incremental (cold)", scan({"action": "scan", "incremental": True})),
+        ("remediate scan incremental (warm)", scan({"action": "scan", "incremental": True})),
+        ("iam credential report (generate)", iam_report(generate=True)),
+        ("iam credential report (existing)", iam_report(generate=False)),
+        ("validate batches", validate_all),
+        ("get_logs first page", logs_first_page),
+        (f"get_logs {LOG_PAGES} pages", logs_paginate),
+        ("get_logs detail", logs_detail),
+        (f"export_logs gzip ({EXPORT_SEGMENTS} segments)", logs_export),
+        # Last: these change the account. The first applies the plan left by the scans above
+        ("remediate remediate_all (plan)", scan({"action": "remediate_all"})),
+        ("remediate remediate_all (full pass)", scan({"action": "remediate_all", "full_pass": True})),
+    ]
+
+
+if __name__ == "__main__":
+    scale = 10 if "--quick" in sys.argv else 1
+    as_json = "--json" in sys.argv
+    logging.getLogger().setLevel(logging.CRITICAL)  # Handlers log per resource; keep the report readable
+
+    if not as_json:
+        print(f"🏗️  Seeding synthetic account: {BUCKETS // scale} buckets, {SG_RULES // scale} SG rules, "
+              f"{TABLES // scale} tables, {LOG_ITEMS // scale} log items, {IAM_USERS // scale} IAM users ...")
+    account = FakeAccount(buckets=BUCKETS // scale, sg_rules=SG_RULES // scale, tables=TABLES // scale,
+                          log_items=LOG_ITEMS // scale, iam_users=IAM_USERS // scale, latency=API_LATENCY).install()
+    remediate.home_pool = account
+
+    if not as_json:
+        print(f"\n{'SCENARIO':<36}{'WALL':>9}{'PEAK MEM':>11}   API CALLS")
+        print("-" * 100)
+    for name, fn in scenarios(account):
+        result = measure(account, name, fn)
+        if as_json:
+            print(json.dumps(result))
+        else:
+            calls = " ".join(f"{svc}={n}" for svc, n in result["calls"].items())
+            print(f"{name:<36}{result['wall_s']:>8.2f}s{result['peak_mb']:>8.1f} MB   {calls}")
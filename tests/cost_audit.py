@@ -1,193 +1,331 @@
-import boto3
+import os
 import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+import boto3
+from botocore.config import Config
+
+# Cost-compliance audit: checks that every Cloud-Audit-Zero resource stays within
+# AWS Free Tier configurations, and that nothing expensive runs anywhere in the account.
+# Checks run concurrently (one task per check and region), every list call is
+# paginated, so the runtime tracks the slowest check rather than the sum.
+#
+#   python3 tests/cost_audit.py                                   # all enabled regions, text report
+#   python3 tests/cost_audit.py --regions us-east-1,eu-west-1 --format junit --output cost-audit.xml
+#   python3 tests/cost_audit.py --format json --strict            # CI gate: warnings fail too
+#
+# Exit codes: 0 = passed, 1 = cost risks found (FAIL, or WARN with --strict),
+#             2 = the audit is incomplete (a check could not run: ERROR)
 
 # --- CONFIGURATION ---
-# PROJECT_TAG = "Cloud-Audit-Zero"  # Used for finding resources if tagged (optional)
-REGION = "us-east-1"
+HOME_REGION = os.environ.get("AWS_DEFAULT_REGION", "us-east-1")  # Global APIs (S3, region discovery)
+PROJECT_PREFIXES = ("cloud-audit-zero", "CloudAuditZero")
+EXPECTED_TABLES = ["CloudAuditZeroLogs", "CloudAuditZeroState", "CloudAuditZeroFindings",
+                   "cloud-audit-zero-logs", "cloud-audit-zero-tf-lock"]
+EXPECTED_FUNCTIONS = ["cloud-audit-zero-remediator", "cloud-audit-zero-validator", "cloud-audit-zero-get-logs",
+                      "cloud-audit-zero-get-status", "cloud-audit-zero-log-stream", "cloud-audit-zero-export-logs"]
+EXPECTED_WORKFLOW = "CloudAuditZero-Workflow"
+LOG_GROUP_PREFIX = "/aws/lambda/cloud-audit-zero"
+MEMORY_LIMIT_MB = 128
+MEMORY_EXCEPTIONS = {"cloud-audit-zero-export-logs": 512}  # Sized deliberately (see infrastructure/lambda.tf)
+FREE_CAPACITY_UNITS = 25   # Provisioned RCU/WCU in the Free Tier (account-wide)
+FREE_DASHBOARDS = 3        # Account-wide, all regions together
+WORKERS = 32
 # ---------------------
 
-session = boto3.Session(region_name=REGION)
-
-def print_status(resource, status, message):
-    icon = "✅" if status else "⚠️"
-    print(f"{icon} [{resource}]: {message}")
-    return 1 if not status else 0
-
-def check_dynamodb():
-    """Verifies DynamoDB tables are within Free Tier limits (25 RCU/WCU)."""
-    ddb = session.client('dynamodb')
-    tables = ['cloud-audit-zero-logs', 'cloud-audit-zero-tf-lock']
-    issues = 0
-    
-    print(f"\n--- Checking DynamoDB ---")
-    for table_name in tables:
-        try:
-            resp = ddb.describe_table(TableName=table_name)
-            billing = resp['Table'].get('BillingModeSummary', {}).get('BillingMode', 'PROVISIONED')
-            prov = resp['Table'].get('ProvisionedThroughput', {})
-            rcu = prov.get('ReadCapacityUnits', 0)
-            wcu = prov.get('WriteCapacityUnits', 0)
-
-            # Check: Provisioned Mode + RCU/WCU <= 25
-            if (billing == 'PROVISIONED' or 'ProvisionedThroughput' in resp['Table']) and rcu <= 25 and wcu <= 25:
-                print_status("DynamoDB", True, f"{table_name} is PROVISIONED (R:{rcu}/W:{wcu}) - Free Tier OK.")
-            elif billing == 'PAY_PER_REQUEST':
-                 print_status("DynamoDB", True, f"{table_name} is ON-DEMAND. (Safe for low volume, but strictly implies per-request billing).")
-            else:
-                issues += print_status("DynamoDB", False, f"{table_name} is {billing} with R:{rcu}/W:{wcu}. Check limits!")
-        except ddb.exceptions.ResourceNotFoundException:
-            # It's okay if tf-lock doesn't exist yet if you haven't run terraform init, but warn just in case
-            print_status("DynamoDB", False, f"Table {table_name} not found.")
-            issues += 1
-    return issues
-
-def check_lambda():
-    """Verifies Lambda configuration (Memory & Concurrency)."""
-    lam = session.client('lambda')
-    functions = ['cloud-audit-zero-remediator', 'cloud-audit-zero-validator']
-    issues = 0
-    
-    print(f"\n--- Checking Lambda ---")
-    for func_name in functions:
-        try:
-            # 1. Check Configuration (Memory)
-            conf = lam.get_function_configuration(FunctionName=func_name)
-            memory = conf['MemorySize']
-            if memory <= 128:
-                print_status("Lambda Config", True, f"{func_name} Memory: {memory}MB - Free Tier Optimized.")
-            else:
-                issues += print_status("Lambda Config", False, f"{func_name} Memory: {memory}MB. Consider lowering to 128MB.")
-
-            # 2. Check Provisioned Concurrency (Expensive!)
-            try:
-                lam.list_provisioned_concurrency_configs(FunctionName=func_name)
-                print_status("Lambda Cost", True, f"{func_name} has NO Provisioned Concurrency.")
-            except Exception:
-                pass
-                
-        except lam.exceptions.ResourceNotFoundException:
-            print_status("Lambda", False, f"Function {func_name} not found.")
-            issues += 1
-    return issues
-
-def check_step_functions():
-    """Verifies State Machine Type."""
-    sfn = session.client('stepfunctions')
-    issues = 0
-    print(f"\n--- Checking Step Functions ---")
-    
-    machines = sfn.list_state_machines()
-    found = False
-    for sm in machines['stateMachines']:
-        if "CloudAuditZero-Workflow" in sm['name']:
-            found = True
-            sm_type = sm['type']
-            if sm_type == 'STANDARD':
-                print_status("Step Functions", True, f"{sm['name']} is STANDARD type (4,000 free transitions/mo).")
-            else:
-                issues += print_status("Step Functions", False, f"{sm['name']} is {sm_type}. Check pricing.")
-    
-    if not found:
-        issues += print_status("Step Functions", False, "Workflow not found.")
-    return issues
-
-def check_cloudwatch_logs():
-    """Verifies Log Retention is not 'Never Expire'."""
-    logs = session.client('logs')
-    issues = 0
-    log_groups = ['/aws/lambda/cloud-audit-zero-remediator', '/aws/lambda/cloud-audit-zero-validator']
-    
-    print(f"\n--- Checking CloudWatch Logs ---")
-    for lg_name in log_groups:
-        try:
-            resp = logs.describe_log_groups(logGroupNamePrefix=lg_name)
-            if not resp['logGroups']:
-                print_status("Logs", False, f"Log Group {lg_name} not found yet (Run traffic first).")
-                continue
-                
-            lg = resp['logGroups'][0]
-            retention = lg.get('retentionInDays')
-            
-            if retention:
-                print_status("Logs", True, f"{lg_name} retention: {retention} days.")
-            else:
-                issues += print_status("Logs", False, f"{lg_name} has NO retention set (Infinite storage). Add 'retention_in_days' to Terraform!")
-        except Exception as e:
-            print(f"Error checking logs: {e}")
-    return issues
-
-def check_dashboards():
-    """Verifies CloudWatch Dashboard count (Free Tier limit = 3)."""
-    cw = session.client('cloudwatch')
-    issues = 0
-    print(f"\n--- Checking CloudWatch Dashboards ---")
-    
-    resp = cw.list_dashboards()
-    count = len(resp.get('DashboardEntries', []))
-    
-    if count <= 3:
-        print_status("Dashboards", True, f"Found {count} dashboards. (Free Tier limit: 3).")
-    else:
-        issues += print_status("Dashboards", False, f"Found {count} dashboards! You are over the Free Tier limit of 3.")
-        
-    return issues
+PASS, WARN, FAIL, ERROR = "PASS", "WARN", "FAIL", "ERROR"
+ICONS = {PASS: "✅", WARN: "⚠️", FAIL: "❌", ERROR: "💥"}
+BOTO_CONFIG = Config(retries={"max_attempts": 10, "mode": "adaptive"}, connect_timeout=5, read_timeout=20,
+                     max_pool_connections=WORKERS)
+
+_session = boto3.Session()
+_clients = {}
+_clients_lock = threading.Lock()  # boto3 sessions are not thread-safe; clients are
+
+def client(service, region):
+    with _clients_lock:
+        key = (service, region)
+        if key not in _clients:
+            _clients[key] = _session.client(service, region_name=region, config=BOTO_CONFIG)
+        return _clients[key]
+
+def paginate(service, region, operation, key, **kwargs):
+    """Yields every item under `key` across all pages of a list/describe call."""
+    for page in client(service, region).get_paginator(operation).paginate(**kwargs):
+        yield from page.get(key, [])
+
+def result(status, check, region, resource, message, **data):
+    return {"check": check, "region": region, "resource": resource, "status": status, "message": message, **data}
+
+def is_project(name):
+    return name.startswith(PROJECT_PREFIXES)
+
+# ====================================================
+# REGIONAL CHECKS (one task per region)
+# ====================================================
+def check_dynamodb(region):
+    """Project tables: on-demand, or provisioned within the Free Tier capacity."""
+    results = []
+    for name in paginate("dynamodb", region, "list_tables", "TableNames"):
+        if not is_project(name):
+            continue
+        table = client("dynamodb", region).describe_table(TableName=name)["Table"]
+        billing = table.get("BillingModeSummary", {}).get("BillingMode", "PROVISIONED")
+        prov = table.get("ProvisionedThroughput", {})
+        rcu, wcu = prov.get("ReadCapacityUnits", 0), prov.get("WriteCapacityUnits", 0)
+        data = {"billing": billing, "rcu": rcu, "wcu": wcu}
+        if billing == "PAY_PER_REQUEST":
+            results.append(result(PASS, "dynamodb", region, name, "ON-DEMAND (per-request billing, safe at low volume).", **data))
+        elif rcu <= FREE_CAPACITY_UNITS and wcu <= FREE_CAPACITY_UNITS:
+            results.append(result(PASS, "dynamodb", region, name, f"PROVISIONED (R:{rcu}/W:{wcu}) - Free Tier OK.", **data))
+        else:
+            results.append(result(FAIL, "dynamodb", region, name, f"PROVISIONED with R:{rcu}/W:{wcu}. Check limits!", **data))
+    return results
+
+def check_lambda(region):
+    """Project functions: memory at the Free Tier-friendly size, no Provisioned Concurrency."""
+    results = []
+    functions = [fn for fn in paginate("lambda", region, "list_functions", "Functions") if is_project(fn["FunctionName"])]
+    for fn in functions:
+        name = fn["FunctionName"]
+        memory, limit = fn["MemorySize"], MEMORY_EXCEPTIONS.get(name, MEMORY_LIMIT_MB)
+        if memory <= limit:
+            results.append(result(PASS, "lambda", region, name, f"Memory: {memory}MB - Free Tier Optimized.", memory_mb=memory))
+        else:
+            results.append(result(FAIL, "lambda", region, name, f"Memory: {memory}MB. Consider lowering to {limit}MB.", memory_mb=memory))
+
+    # One lookup per function: fan out so this check does not become the slowest
+    def provisioned(name):
+        return list(paginate("lambda", region, "list_provisioned_concurrency_configs",
+                             "ProvisionedConcurrencyConfigs", FunctionName=name))
+    names = [fn["FunctionName"] for fn in functions]
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(names)))) as executor:
+        for name, configs in zip(names, executor.map(provisioned, names)):
+            if configs:
+                units = sum(c.get("RequestedProvisionedConcurrentExecutions", 0) for c in configs)
+                results.append(result(FAIL, "lambda_concurrency", region, name,
+                                      f"{units} units of Provisioned Concurrency (billed around the clock).", units=units))
+    return results
+
+def check_step_functions(region):
+    """Project state machines: STANDARD type (4,000 free transitions/mo)."""
+    results = []
+    for sm in paginate("stepfunctions", region, "list_state_machines", "stateMachines"):
+        if not is_project(sm["name"]):
+            continue
+        if sm["type"] == "STANDARD":
+            results.append(result(PASS, "step_functions", region, sm["name"], "STANDARD type (4,000 free transitions/mo).", type=sm["type"]))
+        else:
+            results.append(result(FAIL, "step_functions", region, sm["name"], f"{sm['type']} type. Check pricing.", type=sm["type"]))
+    return results
+
+def check_cloudwatch_logs(region):
+    """Project log groups: a retention period rather than 'Never Expire'."""
+    results = []
+    for lg in paginate("logs", region, "describe_log_groups", "logGroups", logGroupNamePrefix=LOG_GROUP_PREFIX):
+        name, retention = lg["logGroupName"], lg.get("retentionInDays")
+        stored = lg.get("storedBytes", 0)
+        if retention:
+            results.append(result(PASS, "cloudwatch_logs", region, name, f"Retention: {retention} days.", retention_days=retention))
+        else:
+            results.append(result(FAIL, "cloudwatch_logs", region, name,
+                                  "NO retention set (Infinite storage). Add 'retention_in_days' to Terraform!", stored_bytes=stored))
+    return results
+
+def check_dashboards(region):
+    """CloudWatch dashboards in the region (the Free Tier limit is checked account-wide)."""
+    names = [d["DashboardName"] for d in paginate("cloudwatch", region, "list_dashboards", "DashboardEntries")]
+    if not names:
+        return []
+    return [result(PASS, "dashboards", region, ",".join(names), f"{len(names)} dashboards.", count=len(names))]
 
+def check_rogue_resources(region):
+    """Safety scan: no running EC2 instances or NAT Gateways (~$1/day each)."""
+    results = []
+    instances = [i["InstanceId"] for r in paginate("ec2", region, "describe_instances", "Reservations",
+                                                   Filters=[{"Name": "instance-state-name", "Values": ["running"]}])
+                 for i in r["Instances"]]
+    if instances:
+        results.append(result(WARN, "ec2", region, ",".join(instances[:20]),
+                              f"{len(instances)} running EC2 instances. Verify they are Free Tier eligible.", count=len(instances)))
+    nats = [n["NatGatewayId"] for n in paginate("ec2", region, "describe_nat_gateways", "NatGateways",
+                                                 Filter=[{"Name": "state", "Values": ["available"]}])]
+    if nats:
+        results.append(result(FAIL, "nat_gateway", region, ",".join(nats),
+                              f"{len(nats)} ACTIVE NAT GATEWAYS! Each costs ~$1/day. Delete immediately.", count=len(nats)))
+    return results
+
+# ====================================================
+# GLOBAL CHECKS (once per account)
+# ====================================================
 def check_s3_buckets():
-    """Checks S3 Buckets for obvious risks (though cost is storage-based)."""
-    s3 = session.client('s3')
-    issues = 0
-    print(f"\n--- Checking S3 Buckets ---")
-    
-    resp = s3.list_buckets()
-    buckets = resp.get('Buckets', [])
-    
-    project_buckets = [b for b in buckets if 'cloud-audit-zero' in b['Name']]
-    
-    if len(project_buckets) > 0:
-        for b in project_buckets:
-            print_status("S3", True, f"Found project bucket: {b['Name']}. Ensure total storage < 5GB.")
-    else:
-        issues += print_status("S3", False, "No project buckets found. Did Terraform deploy?")
-        
-    return issues
-
-def check_rogue_resources():
-    """Safety Scan: Ensures no expensive EC2/NAT Gateways are running."""
-    ec2 = session.client('ec2')
-    issues = 0
-    print(f"\n--- Safety Scan (Rogue Resources) ---")
-    
-    # Check Instances
-    instances = ec2.describe_instances(Filters=[{'Name': 'instance-state-name', 'Values': ['running']}])
-    count = sum(len(r['Instances']) for r in instances['Reservations'])
-    if count == 0:
-        print_status("EC2", True, "No running EC2 instances found.")
-    else:
-        print_status("EC2", False, f"Found {count} running EC2 instances. Verify they are Free Tier eligble.")
-        
-    # Check NAT Gateways (Very Expensive)
-    nats = ec2.describe_nat_gateways(Filter=[{'Name': 'state', 'Values': ['available']}])
-    if len(nats['NatGateways']) == 0:
-        print_status("NAT Gateway", True, "No active NAT Gateways found.")
-    else:
-        issues += print_status("NAT Gateway", False, "⚠️ ACTIVE NAT GATEWAY FOUND! This costs ~$1/day. Delete immediately.")
+    """Project buckets exist (storage itself should stay < 5GB)."""
+    buckets = [b["Name"] for b in paginate("s3", HOME_REGION, "list_buckets", "Buckets") if "cloud-audit-zero" in b["Name"]]
+    if not buckets:
+        return [result(FAIL, "s3", "global", "-", "No project buckets found. Did Terraform deploy?")]
+    return [result(PASS, "s3", "global", b, "Project bucket. Ensure total storage < 5GB.") for b in buckets]
+
+REGIONAL_CHECKS = [check_dynamodb, check_lambda, check_step_functions, check_cloudwatch_logs,
+                   check_dashboards, check_rogue_resources]
+GLOBAL_CHECKS = [check_s3_buckets]
+
+# ====================================================
+# ACCOUNT-WIDE RULES (over all regions' results)
+# ====================================================
+def account_rules(results):
+    """Rules that only make sense across regions: missing resources and account-wide limits."""
+    found = {(r["check"], r["resource"]) for r in results}
+    extra = []
+    for name in EXPECTED_TABLES:
+        if ("dynamodb", name) not in found:
+            extra.append(result(FAIL, "dynamodb", "all", name, "Table not found in any region."))
+    for name in EXPECTED_FUNCTIONS:
+        if ("lambda", name) not in found:
+            extra.append(result(WARN, "lambda", "all", name, "Function not found in any region."))
+    if not any(r["check"] == "step_functions" and r["resource"] == EXPECTED_WORKFLOW for r in results):
+        extra.append(result(FAIL, "step_functions", "all", EXPECTED_WORKFLOW, "Workflow not found in any region."))
+    for name in EXPECTED_FUNCTIONS:
+        if ("cloudwatch_logs", f"/aws/lambda/{name}") not in found:
+            extra.append(result(WARN, "cloudwatch_logs", "all", f"/aws/lambda/{name}", "Log group not found yet (Run traffic first)."))
+
+    dashboards = sum(r.get("count", 0) for r in results if r["check"] == "dashboards")
+    status = PASS if dashboards <= FREE_DASHBOARDS else FAIL
+    extra.append(result(status, "dashboards", "all", "-",
+                        f"{dashboards} dashboards account-wide (Free Tier limit: {FREE_DASHBOARDS}).", count=dashboards))
+    provisioned = [r for r in results if r["check"] == "dynamodb" and r.get("billing") == "PROVISIONED"]
+    rcu, wcu = sum(r["rcu"] for r in provisioned), sum(r["wcu"] for r in provisioned)
+    if rcu > FREE_CAPACITY_UNITS or wcu > FREE_CAPACITY_UNITS:
+        extra.append(result(FAIL, "dynamodb", "all", "-",
+                            f"Provisioned tables total R:{rcu}/W:{wcu}; the Free Tier covers {FREE_CAPACITY_UNITS} each account-wide."))
+    return extra
+
+# ====================================================
+# ENGINE
+# ====================================================
+def enabled_regions():
+    return sorted(r["RegionName"] for r in client("ec2", HOME_REGION).describe_regions()["Regions"])
+
+def run_check(fn, region):
+    """Runs one check; returns (results, timing). A check that raises becomes one ERROR result."""
+    name = fn.__name__[len("check_"):]
+    started = time.perf_counter()
+    try:
+        results = fn(region) if region else fn()
+    except Exception as e:
+        results = [result(ERROR, name, region or "global", "-", f"Check could not run: {str(e)}")]
+    elapsed = time.perf_counter() - started
+    return results, {"check": name, "region": region or "global", "seconds": round(elapsed, 3)}
 
-    return issues
+def audit(regions, workers=WORKERS):
+    """Runs every check in every region concurrently. Returns the report dict."""
+    started = time.perf_counter()
+    tasks = [(fn, region) for fn in REGIONAL_CHECKS for region in regions] + [(fn, None) for fn in GLOBAL_CHECKS]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        outcomes = list(executor.map(lambda task: run_check(*task), tasks))
+
+    results = [r for rs, _ in outcomes for r in rs]
+    results += account_rules([r for r in results if r["status"] != ERROR])
+    timings = sorted((t for _, t in outcomes), key=lambda t: t["seconds"], reverse=True)
+    counts = {s: sum(1 for r in results if r["status"] == s) for s in (PASS, WARN, FAIL, ERROR)}
+    return {
+        "regions": regions,
+        "summary": counts,
+        "seconds": round(time.perf_counter() - started, 3),
+        "slowest_check": timings[0] if timings else None,
+        "timings": timings,
+        "results": results
+    }
+
+def exit_code(report, strict=False):
+    counts = report["summary"]
+    if counts[ERROR]:
+        return 2
+    if counts[FAIL] or (strict and counts[WARN]):
+        return 1
+    return 0
+
+# ====================================================
+# REPORTS
+# ====================================================
+def render_text(report):
+    lines = [f"💰 Cloud-Audit-Zero Cost Compliance Audit ({len(report['regions'])} regions)"]
+    by_check = {}
+    for r in report["results"]:
+        by_check.setdefault(r["check"], []).append(r)
+    for check, results in by_check.items():
+        lines.append(f"\n--- {check} ---")
+        for r in sorted(results, key=lambda r: (r["region"], r["resource"])):
+            lines.append(f"{ICONS[r['status']]} [{r['region']}] {r['resource']}: {r['message']}")
+
+    counts, slowest = report["summary"], report["slowest_check"]
+    lines.append("\n" + "=" * 40)
+    if counts[ERROR]:
+        lines.append(f"💥 AUDIT INCOMPLETE: {counts[ERROR]} checks could not run.")
+    if counts[FAIL]:
+        lines.append(f"⚠️ AUDIT FINISHED WITH WARNINGS: Found {counts[FAIL]} potential cost risks.")
+    elif not counts[ERROR]:
+        lines.append("🎉 AUDIT PASSED: All resources are within Free Tier configurations.")
+    lines.append(f"{counts[PASS]} passed, {counts[WARN]} warnings, {counts[FAIL]} failed, {counts[ERROR]} errors "
+                 f"in {report['seconds']}s" + (f" (slowest: {slowest['check']} in {slowest['region']}, {slowest['seconds']}s)" if slowest else ""))
+    lines.append("=" * 40)
+    return "\n".join(lines) + "\n"
+
+def render_junit(report, strict=False):
+    """One <testsuite> per check, one <testcase> per result. WARN only fails with --strict."""
+    suites = ElementTree.Element("testsuites", name="cost-audit", time=str(report["seconds"]))
+    by_check = {}
+    for r in report["results"]:
+        by_check.setdefault(r["check"], []).append(r)
+    seconds = {}
+    for t in report["timings"]:
+        seconds[t["check"]] = seconds.get(t["check"], 0) + t["seconds"]
+    for check, results in by_check.items():
+        failures = sum(1 for r in results if r["status"] == FAIL or (strict and r["status"] == WARN))
+        errors = sum(1 for r in results if r["status"] == ERROR)
+        suite = ElementTree.SubElement(suites, "testsuite", name=check, tests=str(len(results)),
+                                       failures=str(failures), errors=str(errors), time=str(round(seconds.get(check, 0), 3)))
+        for r in results:
+            case = ElementTree.SubElement(suite, "testcase", classname=f"cost_audit.{check}", name=f"{r['region']}/{r['resource']}")
+            if r["status"] == ERROR:
+                ElementTree.SubElement(case, "error", message=r["message"])
+            elif r["status"] == FAIL or (strict and r["status"] == WARN):
+                ElementTree.SubElement(case, "failure", message=r["message"], type=r["status"])
+            else:
+                ElementTree.SubElement(case, "system-out").text = f"{r['status']}: {r['message']}"
+    return ElementTree.tostring(suites, encoding="unicode", xml_declaration=True) + "\n"
+
+def render(report, fmt, strict=False):
+    if fmt == "json":
+        return json.dumps(report, indent=2, default=str) + "\n"
+    if fmt == "junit":
+        return render_junit(report, strict)
+    return render_text(report)
 
 if __name__ == "__main__":
-    print("💰 Starting Cloud-Audit-Zero Cost Compliance Audit...")
-    total_issues = 0
-    total_issues += check_dynamodb()
-    total_issues += check_lambda()
-    total_issues += check_step_functions()
-    total_issues += check_cloudwatch_logs()
-    total_issues += check_dashboards()
-    total_issues += check_s3_buckets()
-    total_issues += check_rogue_resources()
-    
-    print("\n" + "="*40)
-    if total_issues == 0:
-        print("🎉 AUDIT PASSED: All resources are within Free Tier configurations.")
+    parser = argparse.ArgumentParser(description="Cloud-Audit-Zero cost-compliance audit")
+    parser.add_argument("--regions", help="Comma-separated regions (default: every enabled region)")
+    parser.add_argument("--format", choices=("text", "json", "junit"), default="text")
+    parser.add_argument("--output", help="Write the report here instead of stdout")
+    parser.add_argument("--strict", action="store_true", help="Treat warnings as failures")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    try:
+        regions = [r.strip() for r in args.regions.split(",")] if args.regions else enabled_regions()
+    except Exception as e:
+        print(f"💥 Could not list regions: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    report = audit(regions, workers=max(1, args.workers))
+    output = render(report, args.format, args.strict)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(render_text(report).splitlines()[-2], file=sys.stderr)  # One-line summary
     else:
-        print(f"⚠️ AUDIT FINISHED WITH WARNINGS: Found {total_issues} potential cost risks.")
-    print("="*40)
\ No newline at end of file
+        sys.stdout.write(output)
+    sys.exit(exit_code(report, args.strict))
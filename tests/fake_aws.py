@@ -0,0 +1,697 @@
+import io
+import re
+import time
+import zlib
+import bisect
+import threading
+from decimal import Decimal
+from datetime import datetime, timezone
+from collections import Counter
+from botocore.exceptions import ClientError
+
+# In-process AWS stand-in for offline benchmarks: one synthetic account (S3, S3 Control, EC2,
+# RDS, DynamoDB, IAM) plus the platform's own DynamoDB tables, all in memory.
+# Every call is counted per service (and optionally delayed by `latency` seconds),
+# so a benchmark can report API usage without credentials or an AWS bill.
+#
+#   account = FakeAccount(buckets=10_000, sg_rules=50_000, tables=1_000, log_items=100_000, iam_users=5_000)
+#   account.install()              # aws_clients.get_client/get_resource -> this account
+#   remediate.home_pool = account  # also acts as a remediate.ClientPool
+
+SENSITIVE = [22, 3389, 3306, 5432, 6379]
+LOCKED_PAB = {k: True for k in ["BlockPublicAcls", "IgnorePublicAcls", "BlockPublicPolicy", "RestrictPublicBuckets"]}
+
+# Platform tables: name -> (hash key, range key, {index: (hash key, range key)})
+PLATFORM_TABLES = {
+    "CloudAuditZeroLogs": ("LogId", "Timestamp", {"FeedTimestampIndex": ("Feed", "Timestamp")}),
+    "CloudAuditZeroState": ("PK", "SK", {}),
+    "CloudAuditZeroFindings": ("ResourceId", "ScanKey", {}),
+    "cloud-audit-zero-logs": ("RequestId", None, {}),
+}
+
+
+def client_error(code, operation, extra=None):
+    return ClientError({"Error": {"Code": code, "Message": code}, **(extra or {})}, operation)
+
+
+class Paginator:
+    """Drives a `_page_<operation>(token, page_size)` method; each page is one API call."""
+
+    def __init__(self, service, operation):
+        self.service, self.operation = service, operation
+
+    def paginate(self, PaginationConfig=None, **kwargs):
+        page_size = (PaginationConfig or {}).get("PageSize")
+        token = None
+        while True:
+            page, token = getattr(self.service, f"_page_{self.operation}")(token, page_size)
+            yield page
+            if token is None:
+                return
+
+
+class Service:
+    name = ""
+    paginated = ()
+
+    def __init__(self, account):
+        self.account = account
+
+    def _call(self, operation):
+        self.account.record(self.name, operation)
+
+    def can_paginate(self, operation):
+        return operation in self.paginated
+
+    def get_paginator(self, operation):
+        return Paginator(self, operation)
+
+
+# ====================================================
+# SCANNED SERVICES: The synthetic account's resources
+# ====================================================
+class FakeS3(Service):
+    name = "s3"
+    paginated = ("list_buckets",)
+
+    def __init__(self, account, count):
+        super().__init__(account)
+        # Every 3rd bucket is unencrypted, every 5th has no Public Access Block, every 7th a weakened one,
+        # every 10th a public bucket policy
+        self.buckets = [f"bench-bucket-{i:05d}" for i in range(count)]
+        self.public_policy = {b for i, b in enumerate(self.buckets) if i % 10 == 0}
+        self.encrypted = {b: i % 3 != 0 for i, b in enumerate(self.buckets)}
+        self.pab = {}
+        for i, b in enumerate(self.buckets):
+            if i % 5 == 0:
+                continue
+            self.pab[b] = {**LOCKED_PAB, "BlockPublicPolicy": i % 7 != 0}
+        self.objects = {}
+        self.uploads = {}
+
+    def _page_list_buckets(self, token, page_size):
+        self._call("ListBuckets")
+        start, size = int(token or 0), page_size or len(self.buckets) or 1
+        chunk = self.buckets[start:start + size]
+        page = {"Buckets": [{"Name": b, "CreationDate": "2026-01-01T00:00:00Z"} for b in chunk]}
+        nxt = start + size if start + size < len(self.buckets) else None
+        if nxt is not None:
+            page["ContinuationToken"] = str(nxt)
+        return page, nxt
+
+    def list_buckets(self):
+        return self._page_list_buckets(None, None)[0]
+
+    def get_bucket_encryption(self, Bucket):
+        self._call("GetBucketEncryption")
+        if not self.encrypted.get(Bucket):
+            raise client_error("ServerSideEncryptionConfigurationNotFoundError", "GetBucketEncryption")
+        return {"ServerSideEncryptionConfiguration": {"Rules": []}}
+
+    def put_bucket_encryption(self, Bucket, **kwargs):
+        self._call("PutBucketEncryption")
+        self.encrypted[Bucket] = True
+
+    def get_public_access_block(self, Bucket):
+        self._call("GetPublicAccessBlock")
+        if Bucket not in self.pab:
+            raise client_error("NoSuchPublicAccessBlockConfiguration", "GetPublicAccessBlock")
+        return {"PublicAccessBlockConfiguration": dict(self.pab[Bucket])}
+
+    def put_public_access_block(self, Bucket, PublicAccessBlockConfiguration):
+        self._call("PutPublicAccessBlock")
+        self.pab[Bucket] = dict(PublicAccessBlockConfiguration)
+
+    def get_bucket_policy_status(self, Bucket):
+        self._call("GetBucketPolicyStatus")
+        if Bucket not in self.public_policy:
+            raise client_error("NoSuchBucketPolicy", "GetBucketPolicyStatus")
+        return {"PolicyStatus": {"IsPublic": True}}
+
+    def get_bucket_acl(self, Bucket):
+        self._call("GetBucketAcl")
+        return {"Owner": {"ID": "owner"}, "Grants": [{"Grantee": {"Type": "CanonicalUser", "ID": "owner"}, "Permission": "FULL_CONTROL"}]}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._call("PutObject")
+        self.objects[(Bucket, Key)] = Body
+
+    def get_object(self, Bucket, Key):
+        self._call("GetObject")
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)])}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self._call("CreateMultipartUpload")
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self._call("UploadPart")
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f'"{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self._call("CompleteMultipartUpload")
+        parts = self.uploads.pop(UploadId)
+        self.objects[(Bucket, Key)] = b"".join(parts[p["PartNumber"]] for p in MultipartUpload["Parts"])
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self._call("AbortMultipartUpload")
+        self.uploads.pop(UploadId, None)
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn=3600):
+        return f"https://{Params['Bucket']}.s3.amazonaws.com/{Params['Key']}?Expires={ExpiresIn}"
+
+
+class FakeS3Control(Service):
+    """Account-level S3 settings; `block` = the account's Public Access Block (None = not set)."""
+    name = "s3control"
+
+    def __init__(self, account):
+        super().__init__(account)
+        self.block = None
+
+    def get_public_access_block(self, AccountId):
+        self._call("GetPublicAccessBlock")
+        if self.block is None:
+            raise client_error("NoSuchPublicAccessBlockConfiguration", "GetPublicAccessBlock")
+        return {"PublicAccessBlockConfiguration": dict(self.block)}
+
+    def put_public_access_block(self, AccountId, PublicAccessBlockConfiguration):
+        self._call("PutPublicAccessBlock")
+        self.block = dict(PublicAccessBlockConfiguration)
+
+
+class FakeEC2(Service):
+    name = "ec2"
+    paginated = ("describe_security_groups",)
+
+    def __init__(self, account, rules, rules_per_group):
+        super().__init__(account)
+        # 1 rule in 200 opens a sensitive port to the internet
+        self.groups = []
+        for g in range(max(1, rules // rules_per_group) if rules else 0):
+            perms = []
+            for r in range(rules_per_group):
+                n = g * rules_per_group + r
+                port = SENSITIVE[n % len(SENSITIVE)] if n % 200 == 0 else 8000 + n % 1000
+                cidr = "0.0.0.0/0" if n % 200 == 0 else f"10.{n % 256}.0.0/16"
+                perms.append({"IpProtocol": "tcp", "FromPort": port, "ToPort": port, "IpRanges": [{"CidrIp": cidr}]})
+            self.groups.append({"GroupId": f"sg-{g:08x}", "GroupName": f"bench-{g}", "IpPermissions": perms})
+
+    def describe_regions(self, **kwargs):
+        self._call("DescribeRegions")
+        return {"Regions": [{"RegionName": self.account.region}]}
+
+    def _page_describe_security_groups(self, token, page_size):
+        self._call("DescribeSecurityGroups")
+        start, size = int(token or 0), page_size or 1000
+        nxt = start + size if start + size < len(self.groups) else None
+        return {"SecurityGroups": self.groups[start:start + size]}, nxt
+
+    def describe_security_groups(self, GroupIds=(), **kwargs):
+        """Direct lookup by id (the paginated listing goes through _page_describe_security_groups)."""
+        self._call("DescribeSecurityGroups")
+        found = [g for g in self.groups if g["GroupId"] in GroupIds]
+        if len(found) < len(set(GroupIds)):
+            raise client_error("InvalidGroup.NotFound", "DescribeSecurityGroups")
+        return {"SecurityGroups": found}
+
+    def revoke_security_group_ingress(self, GroupId, IpPermissions):
+        self._call("RevokeSecurityGroupIngress")
+        group = next(g for g in self.groups if g["GroupId"] == GroupId)
+        # Like EC2: only the listed CIDRs are removed from the matching rule
+        for revoke in IpPermissions:
+            cidrs = {r["CidrIp"] for r in revoke.get("IpRanges", [])}
+            for perm in group["IpPermissions"]:
+                if (perm["IpProtocol"], perm.get("FromPort"), perm.get("ToPort")) == \
+                        (revoke["IpProtocol"], revoke.get("FromPort"), revoke.get("ToPort")):
+                    perm["IpRanges"] = [r for r in perm["IpRanges"] if r["CidrIp"] not in cidrs]
+        group["IpPermissions"] = [p for p in group["IpPermissions"] if p["IpRanges"]]
+
+
+class FakeRDS(Service):
+    name = "rds"
+    paginated = ("describe_db_instances",)
+
+    def __init__(self, account, count):
+        super().__init__(account)
+        self.instances = [{"DBInstanceIdentifier": f"bench-db-{i}", "StorageEncrypted": i % 4 != 0} for i in range(count)]
+
+    def _page_describe_db_instances(self, token, page_size):
+        self._call("DescribeDBInstances")
+        start, size = int(token or 0), page_size or 100
+        nxt = start + size if start + size < len(self.instances) else None
+        return {"DBInstances": self.instances[start:start + size]}, nxt
+
+
+class FakeIAM(Service):
+    """Credential report with `users` IAM users; it takes one GenerateCredentialReport poll to be ready."""
+    name = "iam"
+    REPORT_COLUMNS = ["user", "arn", "user_creation_time", "password_enabled", "password_last_used",
+                      "password_last_changed", "mfa_active", "access_key_1_active", "access_key_1_last_rotated",
+                      "access_key_1_last_used_date", "access_key_2_active", "access_key_2_last_rotated",
+                      "access_key_2_last_used_date"]
+
+    def __init__(self, account, users):
+        super().__init__(account)
+        self.users = users
+        self.report = None  # GeneratedTime once generated
+        self.generating = False
+
+    def get_account_summary(self):
+        self._call("GetAccountSummary")
+        return {"SummaryMap": {"AccountMFAEnabled": 1}}
+
+    def generate_credential_report(self):
+        self._call("GenerateCredentialReport")
+        if self.generating:
+            self.report, self.generating = datetime.now(timezone.utc), False
+        elif self.report is None:
+            self.generating = True
+            return {"State": "STARTED"}
+        return {"State": "COMPLETE"}
+
+    def get_credential_report(self):
+        self._call("GetCredentialReport")
+        if self.report is None:
+            raise client_error("ReportNotPresent", "GetCredentialReport")
+        return {"Content": self.report_csv(), "ReportFormat": "text/csv", "GeneratedTime": self.report}
+
+    def report_csv(self):
+        # Every 5th user has a console password without MFA (every 10th never used it),
+        # every 7th an access key unused for years (every 14th two such keys)
+        recent, old, now = "2026-01-01T00:00:00+00:00", "2020-01-01T00:00:00+00:00", datetime.now(timezone.utc).isoformat()
+        rows = [",".join(self.REPORT_COLUMNS),
+                f"<root_account>,arn:aws:iam::{self.account.account_id}:root,{old},not_supported,{recent},not_supported,true,false,N/A,N/A,false,N/A,N/A"]
+        for i in range(self.users):
+            user = f"user-{i:05d}"
+            console, key_used = i % 5 == 0, old if i % 7 == 0 else now
+            password_used = "N/A" if not console else "no_information" if i % 10 == 0 else now
+            rows.append(f"{user},arn:aws:iam::{self.account.account_id}:user/{user},{old},{str(console).lower()},"
+                        f"{password_used},{old if console else 'N/A'},false,true,{old},{key_used},"
+                        + (f"true,{old},{old}" if i % 14 == 0 else "false,N/A,N/A"))
+        return "\n".join(rows).encode()
+
+
+class FakeDynamoDB(Service):
+    """Scanned tables (ListTables/DescribeTable) and the low-level API of the platform tables."""
+    name = "dynamodb"
+    paginated = ("list_tables",)
+
+    def __init__(self, account, count):
+        super().__init__(account)
+        # Every 10th table has encryption disabled
+        self.scanned = [f"bench-table-{i:04d}" for i in range(count)]
+
+    def _page_list_tables(self, token, page_size):
+        self._call("ListTables")
+        start, size = int(token or 0), page_size or 100
+        nxt = start + size if start + size < len(self.scanned) else None
+        return {"TableNames": self.scanned[start:start + size]}, nxt
+
+    def describe_table(self, TableName):
+        self._call("DescribeTable")
+        status = "DISABLED" if int(TableName[-4:]) % 10 == 0 else "ENABLED"
+        return {"Table": {"TableName": TableName, "SSEDescription": {"Status": status}}}
+
+    def batch_write_item(self, RequestItems):
+        self._call("BatchWriteItem")
+        for name, requests in RequestItems.items():
+            table = self.account.tables[name]
+            keys = [table._pk(r.get("PutRequest", {}).get("Item") or r["DeleteRequest"]["Key"]) for r in requests]
+            if len(set(keys)) < len(keys):  # DynamoDB rejects the whole request
+                raise client_error("ValidationException", "BatchWriteItem")
+            for request in requests:
+                if "PutRequest" in request:
+                    table._put(request["PutRequest"]["Item"])
+                else:
+                    table._delete(request["DeleteRequest"]["Key"])
+        return {"UnprocessedItems": {}}
+
+
+# ====================================================
+# PLATFORM TABLES: In-memory DynamoDB resource Tables
+# ====================================================
+def key_condition(condition, values):
+    """(hash attribute, hash value, range predicate) from a boto3 Key condition or "PK = :pk"."""
+    if isinstance(condition, str):
+        hash_part, _, range_part = condition.partition(" AND ")
+        name, _, placeholder = hash_part.partition(" = ")
+        prefix = re.match(r"begins_with\(\s*\w+\s*,\s*(:\w+)\s*\)", range_part.strip())
+        in_range = (lambda v: v.startswith(values[prefix.group(1)])) if prefix else (lambda v: True)
+        return name.strip(), values[placeholder.strip()], in_range
+    expression = condition.get_expression()
+    if expression["operator"] == "AND":
+        hash_name, hash_value, _ = key_condition(expression["values"][0], values)
+        range_cond = expression["values"][1].get_expression()
+        operand = range_cond["values"][1]
+        ops = {">": lambda v: v > operand, ">=": lambda v: v >= operand,
+               "<": lambda v: v < operand, "<=": lambda v: v <= operand, "=": lambda v: v == operand}
+        return hash_name, hash_value, ops[range_cond["operator"]]
+    return expression["values"][0].name, expression["values"][1], lambda v: True
+
+
+def condition_holds(expression, item, names, values):
+    """Evaluates the simple ConditionExpressions the handlers use: comparisons and
+    attribute_(not_)exists joined by AND/OR (AND binds tighter, no parentheses)."""
+    def operand(token):
+        token = token.strip()
+        return values[token] if token.startswith(":") else item.get(names.get(token, token))
+
+    def term(text):
+        text = text.strip()
+        exists = re.match(r"attribute_(not_)?exists\((.+)\)$", text)
+        if exists:
+            present = names.get(exists.group(2).strip(), exists.group(2).strip()) in item
+            return not present if exists.group(1) else present
+        left, op, right = re.split(r"\s*(<>|<=|>=|=|<|>)\s*", text, maxsplit=1)
+        a, b = operand(left), operand(right)
+        if a is None or b is None:
+            return op == "<>" and a != b
+        return {"=": a == b, "<>": a != b, "<": a < b, "<=": a <= b, ">": a > b, ">=": a >= b}[op]
+
+    return any(all(term(t) for t in clause.split(" AND ")) for clause in expression.split(" OR "))
+
+
+def apply_update(item, expression, names, values):
+    """Applies the SET / ADD clauses of an UpdateExpression to `item` in place."""
+    for action, body in re.findall(r"(SET|ADD|REMOVE)\s+(.*?)(?=\s+(?:SET|ADD|REMOVE)\s|$)", expression):
+        for clause in body.split(","):
+            if action == "SET":
+                name, _, value = clause.partition("=")
+                item[names.get(name.strip(), name.strip())] = values[value.strip()]
+            elif action == "ADD":
+                name, value = clause.split()
+                name = names.get(name, name)
+                item[name] = item.get(name, 0) + values[value]
+            else:
+                item.pop(names.get(clause.strip(), clause.strip()), None)
+
+
+def stored(value):
+    """Numbers as DynamoDB hands them back (Decimal); floats are rejected like boto3 does."""
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    if isinstance(value, int):
+        return Decimal(value)
+    if isinstance(value, dict):
+        return {k: stored(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [stored(v) for v in value]
+    if isinstance(value, set):
+        return {stored(v) for v in value}
+    return value
+
+
+class BatchWriter:
+    def __init__(self, table):
+        self.table, self.pending = table, []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def flush(self):
+        while self.pending:
+            chunk, self.pending = self.pending[:25], self.pending[25:]
+            self.table.meta.client.batch_write_item(RequestItems={self.table.name: chunk})
+
+    def put_item(self, Item):
+        self.pending.append({"PutRequest": {"Item": Item}})
+        if len(self.pending) >= 25:
+            self.flush()
+
+    def delete_item(self, Key):
+        self.pending.append({"DeleteRequest": {"Key": Key}})
+        if len(self.pending) >= 25:
+            self.flush()
+
+
+class FakeTable:
+    """
+    Items plus one sorted partition list per (index, hash value), so Query costs
+    O(log n + page) like the real thing. put/update/delete_item evaluate their ConditionExpression.
+    """
+
+    def __init__(self, account, name, hash_key, range_key=None, indexes=None):
+        self.account, self.name = account, name
+        self.schemas = {None: (hash_key, range_key), **(indexes or {})}
+        self.items = {}
+        self.partitions = {index: {} for index in self.schemas}
+        self.scan_order = None  # {total segments: [sorted keys per segment]}, rebuilt after writes
+        self.lock = threading.RLock()  # update_item checks and writes under one hold
+
+    @property
+    def meta(self):
+        return type("Meta", (), {"client": self.account.services["dynamodb"]})()
+
+    def _pk(self, item):
+        hash_key, range_key = self.schemas[None]
+        return (item[hash_key], item.get(range_key) if range_key else None)
+
+    def _put(self, item):
+        item = stored(item)
+        with self.lock:
+            pk = self._pk(item)
+            if pk in self.items:
+                self._unindex(pk, self.items[pk])
+            self.items[pk] = item
+            self.scan_order = None
+            for index, (hash_key, range_key) in self.schemas.items():
+                if hash_key in item:
+                    bisect.insort(self.partitions[index].setdefault(item[hash_key], []), (item.get(range_key) or "", pk))
+
+    def _unindex(self, pk, item):
+        for index, (hash_key, range_key) in self.schemas.items():
+            if hash_key in item:
+                entries = self.partitions[index][item[hash_key]]
+                del entries[bisect.bisect_left(entries, (item.get(range_key) or "", pk))]
+
+    def _delete(self, key):
+        with self.lock:
+            pk = self._pk(key)
+            if pk in self.items:
+                self._unindex(pk, self.items.pop(pk))
+                self.scan_order = None
+
+    def seed(self, items):
+        """Bulk load without counting API calls."""
+        for item in items:
+            self._put(item)
+
+    def _check(self, key, condition, names, values, operation, return_old=None):
+        """Raises ConditionalCheckFailedException (with the old item for ALL_OLD) unless `condition` holds."""
+        current = self.items.get(self._pk(key))
+        if condition and not condition_holds(condition, dict(current or {}), names or {}, values or {}):
+            extra = {"Item": dict(current)} if return_old == "ALL_OLD" and current else None
+            raise client_error("ConditionalCheckFailedException", operation, extra)
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None, ReturnValuesOnConditionCheckFailure=None, **kwargs):
+        self.account.record("dynamodb", "PutItem")
+        with self.lock:
+            self._check(Item, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues,
+                        "PutItem", ReturnValuesOnConditionCheckFailure)
+            self._put(Item)
+        return {}
+
+    def get_item(self, Key, **kwargs):
+        self.account.record("dynamodb", "GetItem")
+        item = self.items.get(self._pk(Key))
+        return {"Item": item} if item else {}
+
+    def update_item(self, Key, UpdateExpression="", ConditionExpression=None,
+                    ExpressionAttributeNames=None, ExpressionAttributeValues=None, **kwargs):
+        self.account.record("dynamodb", "UpdateItem")
+        names, values = ExpressionAttributeNames or {}, ExpressionAttributeValues or {}
+        with self.lock:
+            item = dict(self.items.get(self._pk(Key)) or Key)
+            if ConditionExpression and not condition_holds(ConditionExpression, item, names, values):
+                raise client_error("ConditionalCheckFailedException", "UpdateItem")
+            apply_update(item, UpdateExpression, names, values)
+            self._put(item)
+        return {}
+
+    def delete_item(self, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, **kwargs):
+        self.account.record("dynamodb", "DeleteItem")
+        with self.lock:
+            self._check(Key, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues, "DeleteItem")
+            self._delete(Key)
+        return {}
+
+    def batch_writer(self, **kwargs):
+        return BatchWriter(self)
+
+    def query(self, KeyConditionExpression, IndexName=None, ScanIndexForward=True, Limit=None,
+              ExclusiveStartKey=None, ExpressionAttributeValues=None, ProjectionExpression=None,
+              ExpressionAttributeNames=None, **kwargs):
+        self.account.record("dynamodb", "Query")
+        hash_name, hash_value, in_range = key_condition(KeyConditionExpression, ExpressionAttributeValues or {})
+        index_hash, range_key = self.schemas[IndexName]
+        assert hash_name == index_hash, f"{hash_name} is not the hash key of {IndexName or self.name}"
+
+        with self.lock:
+            entries = self.partitions[IndexName].get(hash_value, [])
+            if ExclusiveStartKey:
+                marker = (ExclusiveStartKey.get(range_key) or "", self._pk(ExclusiveStartKey))
+                position = bisect.bisect_right(entries, marker) if ScanIndexForward else bisect.bisect_left(entries, marker)
+            else:
+                position = 0 if ScanIndexForward else len(entries)
+            page = []
+            while (Limit is None or len(page) < Limit) and 0 <= (position if ScanIndexForward else position - 1) < len(entries):
+                entry = entries[position] if ScanIndexForward else entries[position - 1]
+                position += 1 if ScanIndexForward else -1
+                if in_range(entry[0]):
+                    page.append(self.items[entry[1]])
+            more = position < len(entries) if ScanIndexForward else position > 0
+
+        response = {"Items": page, "Count": len(page)}
+        if more and page:
+            last = page[-1]
+            keys = {k for k in (*self.schemas[None], index_hash, range_key) if k}
+            response["LastEvaluatedKey"] = {k: last[k] for k in keys if k in last}
+        if ProjectionExpression:
+            names = ExpressionAttributeNames or {}
+            wanted = [names.get(a.strip(), a.strip()) for a in ProjectionExpression.split(",")]
+            response["Items"] = [{k: item[k] for k in wanted if k in item} for item in page]
+        return response
+
+
+    def _segment(self, segment, total):
+        with self.lock:
+            if self.scan_order is None:
+                self.scan_order = {}
+            if total not in self.scan_order:
+                keys = [[] for _ in range(total)]
+                for pk in sorted(self.items, key=repr):
+                    keys[zlib.crc32(repr(pk).encode()) % total].append(pk)
+                self.scan_order[total] = keys
+            return self.scan_order[total][segment]
+
+    def scan(self, Segment=0, TotalSegments=1, Limit=None, ExclusiveStartKey=None, FilterExpression=None,
+             ProjectionExpression=None, ExpressionAttributeNames=None, ReturnConsumedCapacity=None, **kwargs):
+        """
+        Parallel Scan over a stable hash split of the keys. Like DynamoDB, Limit and
+        ConsumedCapacity count items read, before FilterExpression (boto3 Attr conditions) drops any.
+        """
+        self.account.record("dynamodb", "Scan")
+        keys = self._segment(Segment, TotalSegments)
+        position = bisect.bisect_right(keys, repr(self._pk(ExclusiveStartKey)), key=repr) if ExclusiveStartKey else 0
+        read = [self.items[pk] for pk in keys[position:position + Limit if Limit else None] if pk in self.items]
+        more = position + len(read) < len(keys)
+        page = [item for item in read if FilterExpression is None or attribute_condition(FilterExpression, item)]
+
+        response = {"Items": page, "Count": len(page), "ScannedCount": len(read)}
+        if more and read:
+            response["LastEvaluatedKey"] = {k: read[-1][k] for k in self.schemas[None] if k}
+        if ReturnConsumedCapacity:
+            # Eventually consistent: 0.5 RCU per 4 KB read, summed over the page
+            size = sum(len(repr(item)) for item in read)
+            response["ConsumedCapacity"] = {"TableName": self.name, "CapacityUnits": max(1, -(-size // 4096)) / 2}
+        if ProjectionExpression:
+            names = ExpressionAttributeNames or {}
+            wanted = [names.get(a.strip(), a.strip()) for a in ProjectionExpression.split(",")]
+            response["Items"] = [{k: item[k] for k in wanted if k in item} for item in page]
+        return response
+
+
+def attribute_condition(condition, item):
+    """Evaluates a boto3 Attr condition (comparisons, between, And/Or) against an item."""
+    expression = condition.get_expression()
+    operator, values = expression["operator"], expression["values"]
+    if operator in ("AND", "OR"):
+        results = [attribute_condition(v, item) for v in values]
+        return all(results) if operator == "AND" else any(results)
+    if values[0].name not in item:
+        return False
+    value = item[values[0].name]
+    compare = {
+        "=": lambda: value == values[1], "<>": lambda: value != values[1],
+        "<": lambda: value < values[1], "<=": lambda: value <= values[1],
+        ">": lambda: value > values[1], ">=": lambda: value >= values[1],
+        "BETWEEN": lambda: values[1] <= value <= values[2],
+        "begins_with": lambda: str(value).startswith(values[1]),
+    }
+    return compare[operator]()
+
+
+class FakeResource:
+    def __init__(self, account):
+        self.account = account
+        self.meta = type("Meta", (), {"client": account.services["dynamodb"]})()
+
+    def Table(self, name):
+        return self.account.tables[name]
+
+
+# ====================================================
+# ACCOUNT
+# ====================================================
+class FakeAccount:
+    def __init__(self, buckets=0, sg_rules=0, rules_per_group=10, tables=0, db_instances=20,
+                 log_items=0, iam_users=0, account_id="123456789012", region="us-east-1", latency=0.0):
+        self.account_id, self.region, self.latency = account_id, region, latency
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self.services = {
+            "s3": FakeS3(self, buckets),
+            "s3control": FakeS3Control(self),
+            "ec2": FakeEC2(self, sg_rules, rules_per_group),
+            "rds": FakeRDS(self, db_instances),
+            "iam": FakeIAM(self, iam_users),
+            "dynamodb": FakeDynamoDB(self, tables),
+        }
+        self.tables = {name: FakeTable(self, name, h, r, idx) for name, (h, r, idx) in PLATFORM_TABLES.items()}
+        self.tables["CloudAuditZeroLogs"].seed(self.log_items(log_items))
+
+    def log_items(self, count):
+        for i in range(count):
+            yield {
+                "LogId": f"log-{i:07d}", "Timestamp": f"2026-01-01T00:00:00.{i:07d}", "Feed": "AUDIT",
+                "AccountId": self.account_id, "Event": "Security Scan", "Status": "SUCCESS" if i % 4 else "ERROR",
+                "Details": f"Scan {i}: 0 Critical Risks.", "Type": "SCAN", "Product": "Cloud Audit Zero",
+                "Meta": {"mode": "scan", "total_buckets": 100, "open_sgs": [], "scan_errors": 0}
+            }
+
+    def record(self, service, operation):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[(service, operation)] += 1
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def calls_by_service(self):
+        totals = Counter()
+        for (service, _), n in self.calls.items():
+            totals[service] += n
+        return dict(sorted(totals.items()))
+
+    # remediate.ClientPool interface
+    def client(self, service, region=None, **kwargs):
+        return self.services[service]
+
+    def resource(self, service, region=None, **kwargs):
+        return FakeResource(self)
+
+    def begin_run(self):
+        self.stats.reset()
+        self.run.reset()
+
+    def install(self):
+        """Routes aws_clients.get_client/get_resource (used by every handler) to this account."""
+        import aws_clients
+        import metrics
+        aws_clients.get_client = self.client
+        aws_clients.get_resource = self.resource
+        self.stats, self.run = aws_clients.ApiStats(), metrics.Run()  # Per-run Meta.api / Meta.timings
+        return self
@@ -0,0 +1,71 @@
+import os
+import sys
+import json
+import logging
+
+# Local check for the credential-report IAM pillar (src/identity.py) against the
+# synthetic account from fake_aws.py, whose report gives every 14th user two stale keys.
+#   1. Every finding of a scan is written, both stale keys of one user included
+#   2. The pillar costs the same IAM calls at any user count, none from the cache
+# Usage: python3 tests/identity_local.py
+
+# --- CONFIGURATION ---
+IAM_USERS = 30
+LARGE_IAM_USERS = 3_000
+# ---------------------
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+os.environ.setdefault("EMF_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import remediate  # noqa: E402
+import identity  # noqa: E402
+from findings import FINDINGS_TABLE_NAME  # noqa: E402
+from fake_aws import FakeAccount  # noqa: E402
+
+identity.POLL_INTERVAL = 0.01
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        sys.exit(1)
+
+
+def iam_calls(users):
+    identity._cache.clear()
+    account = FakeAccount(iam_users=users).install()
+    account.reset_calls()
+    identity.audit(account.client("iam"), account.account_id)
+    return sum(n for (svc, _), n in account.calls.items() if svc == "iam")
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.CRITICAL)
+    print(f"🪪 Identity pillar: {IAM_USERS} IAM users\n")
+
+    # 1. Two stale keys on one user: two findings items, nothing dropped
+    identity._cache.clear()
+    account = FakeAccount(iam_users=IAM_USERS).install()
+    remediate.home_pool = account
+    entry = json.loads(remediate.lambda_handler({"body": {"action": "scan"}}, None)["body"])["data"]
+    written = entry["Meta"]["findings"]
+    check(f"All findings written ({written['written']} written, {written['failed']} failed)", written["failed"] == 0)
+
+    items = account.tables[FINDINGS_TABLE_NAME].items.values()
+    stale = sorted(i["ResourceId"].split("/global/")[1] for i in items
+                   if i["Finding"] == "STALE_ACCESS_KEY" and "/user-00000/" in i["ResourceId"])
+    check(f"Both stale keys of user-00000 stored: {', '.join(stale)}", stale == ["user-00000/key1", "user-00000/key2"])
+
+    # 2. Constant IAM calls
+    small, large = iam_calls(IAM_USERS), iam_calls(LARGE_IAM_USERS)
+    check(f"IAM calls at {IAM_USERS} users: {small}, at {LARGE_IAM_USERS}: {large}", small == large)
+    account.reset_calls()
+    cached = identity.audit(account.client("iam"), account.account_id)
+    check("Fresh report served from the cache with no IAM calls",
+          cached["cached"] and not any(svc == "iam" for svc, _ in account.calls))
+
+    print("\n🎉 Identity OK.")
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+# Local executor for sharded scans: plays the CloudAuditZero-ShardedScan state machine
+# (plan -> Map over shards, re-invoking incomplete ones -> reduce) against the synthetic
+# account from fake_aws.py, then checks the result against a single-invocation scan,
+# a crash + resume from checkpoints, and workers that run out of Lambda time.
+# Usage: python3 tests/sharded_local.py
+
+# --- CONFIGURATION ---
+BUCKETS = 2_000
+SG_RULES = 5_000
+TABLES = 300
+WORKERS = 10               # Map MaxConcurrency
+ATTEMPTS = 3               # Task retries per shard invocation (Retry.MaxAttempts)
+# ---------------------
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+os.environ.setdefault("EMF_ENABLED", "false")
+os.environ.setdefault("SHARD_SIZE", "250")
+os.environ.setdefault("SHARD_CHECKPOINT_EVERY", "50")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import remediate  # noqa: E402
+import log_codec  # noqa: E402
+import shards  # noqa: E402
+from fake_aws import FakeAccount  # noqa: E402
+
+
+class FakeContext:
+    """Lambda context whose clock runs out after `budget_ms`, counted down per call."""
+
+    def __init__(self, budget_ms=None, step_ms=0):
+        self.remaining, self.step = budget_ms, step_ms
+
+    def get_remaining_time_in_millis(self):
+        if self.remaining is None:
+            return 900_000
+        self.remaining -= self.step
+        return self.remaining
+
+
+def execute(request, run_id, context_factory=FakeContext, attempts=ATTEMPTS):
+    """Runs one sharded scan the way the state machine does. Returns (reduce output, shard invocations)."""
+    planned = remediate.lambda_handler({"shard_op": "plan", "input": request, "execution": run_id}, None)
+    invocations = []
+
+    def drive(item):
+        task = {"shard_op": "run", **item}
+        while True:
+            for attempt in range(attempts):
+                try:
+                    task = remediate.lambda_handler(task, context_factory())
+                    invocations.append(item["shard"])
+                    break
+                except Exception:
+                    if attempt == attempts - 1:
+                        raise
+            if task["complete"]:
+                return task
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        list(executor.map(drive, planned["shards"]))
+    return remediate.lambda_handler({"shard_op": "reduce", "run_id": run_id}, None), invocations
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        sys.exit(1)
+
+
+def bucket_reads(account):
+    return account.calls[("s3", "GetBucketEncryption")] + account.calls[("s3", "GetPublicAccessBlock")]
+
+
+def latest_entry(account):
+    logs = account.resource("dynamodb").Table(remediate.TABLE_NAME)
+    return log_codec.expand(max(logs.items.values(), key=lambda item: item["Timestamp"]))
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.CRITICAL)
+    account = FakeAccount(buckets=BUCKETS, sg_rules=SG_RULES, tables=TABLES).install()
+    remediate.home_pool = account
+    state = account.resource("dynamodb").Table(shards.STATE_TABLE_NAME)
+    print(f"🧩 Sharded scan: {BUCKETS} buckets, {TABLES} tables, {SG_RULES} SG rules, shard size {shards.SHARD_SIZE}\n")
+
+    # 1. Same report as one big invocation
+    single = json.loads(remediate.lambda_handler({"body": {"action": "scan"}}, None)["body"])["data"]
+    account.reset_calls()
+    reduced, invocations = execute({"action": "scan"}, "run-1")
+    entry = latest_entry(account)
+    check(f"{len(set(invocations))} shards reduced into one entry ({reduced['status']})", entry["LogId"] == reduced["log_id"])
+    check("Sharded report matches the single-invocation scan", entry["Details"] == single["Details"])
+    check("Counts match", all(entry["Meta"][k] == single["Meta"][k] for k in ("total_buckets", "unencrypted_rds", "unencrypted_dynamo", "open_sgs")))
+    check("Every bucket read once", bucket_reads(account) == 2 * BUCKETS)
+    again = remediate.lambda_handler({"shard_op": "reduce", "run_id": "run-1"}, None)
+    check("Reducing twice is a no-op", again["status"] == "ALREADY_REDUCED" and again["log_id"] == reduced["log_id"])
+
+    # 2. A worker crashes mid-shard; the re-driven run resumes from the checkpoints
+    evaluate_bucket, calls = remediate.evaluate_bucket, {"n": 0}
+
+    def flaky(*args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 620:
+            raise RuntimeError("injected crash")
+        return evaluate_bucket(*args, **kwargs)
+
+    remediate.evaluate_bucket = flaky
+    try:
+        execute({"action": "scan"}, "run-2", attempts=1)
+        check("Injected crash fails the first execution", False)
+    except RuntimeError:
+        check("Injected crash fails the first execution", True)
+    remediate.evaluate_bucket = evaluate_bucket
+    resumed_from = {sid: shards.load_shard(state, "run-2", sid)["Cursor"] for sid in shards.load_meta(state, "run-2")["Shards"] if sid.startswith("s3#")}
+    account.reset_calls()
+    reduced, _ = execute({"action": "scan"}, "run-2")
+    reads = bucket_reads(account)
+    check(f"Resume skipped {sum(resumed_from.values())} checkpointed buckets ({reads} bucket reads vs {2 * BUCKETS})",
+          reads == 2 * (BUCKETS - sum(resumed_from.values())))
+    check("Resumed run reports the same findings", latest_entry(account)["Details"] == single["Details"])
+
+    # 3. Workers that run out of time stop at a checkpoint and are invoked again
+    account.reset_calls()
+    reduced, invocations = execute({"action": "scan"}, "run-3", context_factory=lambda: FakeContext(budget_ms=20_000, step_ms=10_000))
+    check(f"Time-limited workers needed {len(invocations)} invocations for {len(set(invocations))} shards",
+          len(invocations) > len(set(invocations)))
+    check("No bucket was evaluated twice", bucket_reads(account) == 2 * BUCKETS)
+    check("Time-limited run reports the same findings", latest_entry(account)["Details"] == single["Details"])
+
+    print(f"\n🎉 Sharded scans OK: {len(set(invocations))} shards per run.")
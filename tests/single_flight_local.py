@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Local check for single-flight leases (src/lease.py): concurrent requests against the
+# synthetic account from fake_aws.py, with a little API latency so runs overlap.
+#   1. Identical scans coalesce: one run, every caller gets its entry
+#   2. Conflicting remediations run one after the other
+#   3. A failed holder hands over to a waiter; a stuck one ends in 409
+#   4. A burst of CloudTrail events: targeted scans run one at a time, lock echoes are skipped
+# Usage: python3 tests/single_flight_local.py
+
+# --- CONFIGURATION ---
+BUCKETS = 300
+SG_RULES = 500
+TABLES = 30
+CALLERS = 6                # Concurrent identical requests
+API_LATENCY = 0.001        # Seconds per fake API call
+# ---------------------
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+os.environ.setdefault("EMF_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import remediate  # noqa: E402
+import lease  # noqa: E402
+from fake_aws import FakeAccount  # noqa: E402
+
+lease.POLL_INTERVAL = 0.05
+
+
+def call(body):
+    response = remediate.lambda_handler({"body": body}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def concurrently(bodies):
+    with ThreadPoolExecutor(max_workers=len(bodies)) as executor:
+        return list(executor.map(call, bodies))
+
+
+def check(label, condition):
+    print(f"{'✅' if condition else '❌'} {label}")
+    if not condition:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.CRITICAL)
+    account = FakeAccount(buckets=BUCKETS, sg_rules=SG_RULES, tables=TABLES, latency=API_LATENCY).install()
+    remediate.home_pool = account
+    print(f"🔒 Single-flight: {CALLERS} concurrent callers, {BUCKETS} buckets\n")
+
+    # Wrap audit_account to record which runs really happened, and when
+    audit_account, runs, runs_lock = remediate.audit_account, [], threading.Lock()
+
+    def recorded(pool, mode, *args, **kwargs):
+        started = time.perf_counter()
+        entry = audit_account(pool, mode, *args, **kwargs)
+        with runs_lock:
+            runs.append((mode, started, time.perf_counter()))
+        return entry
+
+    remediate.audit_account = recorded
+
+    # 1. Identical scans
+    account.reset_calls()
+    results = concurrently([{"action": "scan"}] * CALLERS)
+    log_ids = {body["data"]["LogId"] for _, body in results}
+    attached = sum(1 for _, body in results if body["data"]["Meta"].get("coalesced_with"))
+    check(f"{CALLERS} identical scans -> {len(runs)} run", len(runs) == 1 and all(code == 200 for code, _ in results))
+    check(f"Every caller got the same entry ({attached} attached)", len(log_ids) == 1 and attached == CALLERS - 1)
+    check("Buckets read once", account.calls[("s3", "GetBucketEncryption")] == BUCKETS)
+    runs.clear()
+    results = concurrently([{"action": "scan"}, {"action": "scan", "regions": "us-east-1,eu-west-1"}])
+    check("Scans with different scopes do not wait on each other", len(runs) == 2)
+
+    # 2. Conflicting remediations serialize; identical ones attach
+    runs.clear()
+    results = concurrently([{"action": "remediate_encryption", "full_pass": True},
+                            {"action": "remediate_storage", "full_pass": True},
+                            {"action": "remediate_storage", "full_pass": True}])
+    spans = sorted((start, end) for _, start, end in runs)
+    overlap = any(spans[i + 1][0] < spans[i][1] for i in range(len(spans) - 1))
+    check(f"3 remediations (2 identical) -> {len(runs)} runs", len(runs) == 2 and all(code == 200 for code, _ in results))
+    check("Remediation runs never overlapped", not overlap)
+
+    # 3a. The holder fails: the waiter takes over instead of returning nothing
+    runs.clear()
+    failures = {"left": 1}
+
+    def failing_once(pool, mode, *args, **kwargs):
+        if failures["left"]:
+            failures["left"] = 0
+            time.sleep(0.3)
+            raise RuntimeError("injected failure")
+        return recorded(pool, mode, *args, **kwargs)
+
+    remediate.audit_account = failing_once
+    results = concurrently([{"action": "scan", "incremental": True}] * 2)
+    check("Failed holder released its lease; the waiter ran the scan",
+          sorted(code for code, _ in results) == [200, 500] and len(runs) == 1)
+
+    # 3b. A holder that outlasts the wait budget: the waiter gives up with 409
+    def slow(pool, mode, *args, **kwargs):
+        time.sleep(1.5)
+        return recorded(pool, mode, *args, **kwargs)
+
+    remediate.audit_account, lease.WAIT_SECONDS = slow, 0.5
+    results = concurrently([{"action": "remediate_network", "full_pass": True}, {"action": "remediate_all", "full_pass": True}])
+    codes = sorted(code for code, _ in results)
+    check(f"Waiter past its budget -> {codes[-1]}: {results[[c for c, _ in results].index(409)][1]['message'] if 409 in codes else ''}",
+          codes == [200, 409])
+
+    # 4. Event-targeted scans share the incremental lease without attaching
+    remediate.audit_account, lease.WAIT_SECONDS = recorded, 30
+    runs.clear()
+    events = [{"detail": {"eventName": "PutBucketPolicy", "requestParameters": {"bucketName": f"bench-bucket-{i:05d}"}}}
+              for i in range(3)]
+    with ThreadPoolExecutor(max_workers=len(events)) as executor:
+        results = list(executor.map(lambda e: remediate.lambda_handler(e, None)["statusCode"], events))
+    spans = sorted((start, end) for _, start, end in runs)
+    overlap = any(spans[i + 1][0] < spans[i][1] for i in range(len(spans) - 1))
+    check(f"{len(events)} events -> {len(runs)} targeted runs, none overlapping", len(runs) == 3 and not overlap and results == [200] * 3)
+    runs.clear()
+    echo = {"detail": {"eventName": "PutBucketPublicAccessBlock", "requestParameters": {
+        "bucketName": "bench-bucket-00000", "PublicAccessBlockConfiguration": {f: True for f in remediate.idempotency.LOCKED_FLAGS}}}}
+    check("Lock echo skipped without a scan", json.loads(remediate.lambda_handler(echo, None)["body"]).get("skipped") and not runs)
+
+    print("\n🎉 Single-flight OK.")